@@ -1,4 +1,50 @@
 # Параметры приложения
 APP_CONFIG = {
-    'session_ttl': 24 * 60 * 60  # 24 часа в секундах
+    'session_ttl': 24 * 60 * 60,  # 24 часа в секундах
+    'api_pool_connections': 4,  # Количество пулов соединений (по хостам)
+    'api_pool_maxsize': 10,  # Максимум соединений в пуле на один хост
+    'api_page_size': 1000,  # Размер страницы при потоковой загрузке задач
+    # Таймауты запросов (подключение, чтение) в секундах; большие списки читаются дольше
+    'api_timeouts': {
+        'default': (5, 30),
+        'tasks/all': (5, 120),
+        'tasks/export_completed': (5, 120),
+        'tasks/insert_from_json': (5, 120),
+        'addresses/full': (5, 120),
+        'acts': (5, 120),
+        'notifications/stream': (5, 60),  # Чтение потока: сервер присылает heartbeat чаще
+    },
+    'api_max_retries': 3,  # Повторы GET-запросов при сетевых сбоях и ответах 5xx
+    'api_breaker_threshold': 5,  # Сбоев подряд до перехода на кешированные данные
+    'api_breaker_reset': 30,  # Пауза (сек) до пробного запроса к недоступному серверу
+    'api_http2': True,  # HTTP/2 для асинхронного клиента (используется, если установлен пакет h2)
+    'api_details_concurrency': 8,  # Параллельных запросов при загрузке деталей нескольких задач
+    'api_details_batch_size': 100,  # Задач в одном пакетном запросе деталей (tasks/details)
+    # Политика локального кеша по наборам данных: (fresh, stale) в секундах - сколько снимок считается
+    # свежим и сколько еще его можно показывать, обновляя в фоне (см. src/database/admin/cache_layer.py)
+    'cache_policies': {
+        'tasks': (300, 7 * 24 * 60 * 60),  # Полный список, проекции и выборки по фильтрам
+        'unmade_tasks': (120, 24 * 60 * 60),
+        'completed_tasks': (3600, 7 * 24 * 60 * 60),
+        'addresses': (3600, 7 * 24 * 60 * 60),
+        'employees': (300, 7 * 24 * 60 * 60),
+        'acts': (3600, 7 * 24 * 60 * 60),
+        'dashboard_stats': (600, 24 * 60 * 60),
+        'task_details': (120, 24 * 60 * 60),
+        'address_details': (120, 24 * 60 * 60),
+        'employee_details': (120, 24 * 60 * 60),
+    },
+    'cache_refresh_workers': 2,  # Потоков фонового обновления устаревших снимков кеша
+    'cache_memory_limit': 256 * 1024 * 1024,  # Объем (байт) распакованных снимков кеша в памяти процесса
+    'prefetch_delay': 0.5,  # Пауза (сек) перед фоновой подгрузкой деталей видимой страницы таблицы
+    'bulk_chunk_size': 500,  # Задач в одной порции при массовой загрузке из файла
+    'bulk_upload_workers': 3,  # Порций, отправляемых одновременно
+    'bulk_journal_ttl': 7 * 24 * 60 * 60,  # Сколько хранится журнал прерванной загрузки (сек)
+    'outbox_batch_size': 50,  # Изменений из очереди, отправляемых за один проход
+    'outbox_retry_interval': 30,  # Пауза (сек) между попытками отправить очередь при отсутствии связи
+    'push_reconnect_max_delay': 60,  # Максимальная пауза (сек) перед переподключением канала уведомлений
+    'push_fallback_check': 5,  # Как часто (сек) проверять канал уведомлений, пока он открыт
+    'notifications_resync': 3600,  # Как часто (сек) журнал уведомлений перечитывается целиком
+    'metrics_dump_path': None,  # Файл для снимка метрик API при выходе (например, 'api_metrics.json')
+    'gc_pause_bulk_decode': False,  # Отключать сборщик мусора на время разбора больших списков (для всего процесса)
 }
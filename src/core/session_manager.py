@@ -61,6 +61,7 @@ class SessionManager:
                 'id': user_id,
                 'login': user_data.get('login'),
                 'password': user_data.get('password'),
+                'token': user_data.get('token'),
                 'privileges': user_data.get('privileges'),
                 'first_name': user_data.get('first_name'),
                 'last_name': user_data.get('last_name')
@@ -1,5 +1,7 @@
 from src.core.session_manager import session_manager
 from src.core.verifications import authentication
+from src.database.api.api_master import close_master_api_clients, stop_notifications_channel
+from src.database.local_cache import cache
 from src.ui.components.navigations import role_definition
 
 
@@ -10,7 +12,9 @@ def check_session(page):
         sessions = session_manager._load_sessions()
         for user_id, session in sessions.items():
             session_data = session_manager.get_session(int(user_id))
-            if session_data and session_data.get('privileges'):
+            # Сессии без токена (созданные до перехода на токены) требуют повторного входа
+            if session_data and session_data.get('privileges') and session_data.get('token'):
+                cache.use_namespace(int(user_id))
                 return role_definition(page)
         return False
     except Exception as e:
@@ -31,6 +35,15 @@ def logout(page):
         sessions = session_manager._load_sessions()
         for user_id in sessions:
             session_manager.delete_session(int(user_id))
+
+        # Канал уведомлений прежнего пользователя не должен переподключаться с новой сессией
+        stop_notifications_channel()
+
+        # Закрываем пул соединений API прежнего пользователя
+        close_master_api_clients()
+
+        # Снимки вышедшего пользователя больше не читаются
+        cache.use_namespace(None)
         
         # Очищаем страницу и перенаправляем на страницу входа
         page.clean()
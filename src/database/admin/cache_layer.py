@@ -0,0 +1,206 @@
+"""Политика локального кеша загрузчиков select_server: срок свежести и stale-while-revalidate.
+
+У каждого набора данных (APP_CONFIG['cache_policies']) два срока:
+  - fresh - сколько секунд снимок считается свежим и отдается без обращения к серверу;
+  - stale - сколько еще секунд после этого снимок можно показывать, пока он обновляется в фоне.
+Запись в diskcache живет fresh + stale секунд, момент окончания свежести вычисляется из срока
+жизни записи, поэтому отдельные ключи с отметками времени не нужны.
+
+Загрузчик, объявленный через CacheLayer.loader, при наличии любого снимка возвращает его сразу;
+устаревший снимок обновляется в фоновом потоке, и если данные изменились, подписчики набора
+(страницы) получают новый снимок и перерисовываются. Запрос с refresh=True всегда идет на сервер.
+
+Записи помечаются тегами зависимостей: набор данных (dataset:tasks) и объекты, из которых собран
+снимок (task:123, address:45, employee:7). После изменения данных записи с тегами затронутых
+объектов удаляются (cache.invalidate), а большие списки только помечаются устаревшими (mark_stale):
+снимок остается и обновляется при следующем чтении, для задач - дельта-синхронизацией.
+"""
+import functools
+import inspect
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from src.config.config import APP_CONFIG
+from src.database.api.metrics import metrics
+
+
+def policy(dataset: str) -> Tuple[int, int]:
+    """(fresh, stale) набора данных в секундах"""
+    return APP_CONFIG['cache_policies'][dataset]
+
+
+def expire(dataset: str) -> int:
+    """Срок жизни записи набора в кеше: пока свежая плюс пока ее можно показывать устаревшей"""
+    fresh, stale = policy(dataset)
+    return fresh + stale
+
+
+def dataset_tag(dataset: str) -> str:
+    """Тег всех записей набора: dataset:tasks"""
+    return f"dataset:{dataset}"
+
+
+def entity_tag(kind: str, entity_id: Any) -> str:
+    """Тег записей, собранных из одного объекта: task:123, address:45, employee:7"""
+    return f"{kind}:{entity_id}"
+
+
+class CacheLayer:
+    """Кеш-слой над diskcache.Cache: свежесть снимков, фоновое обновление и подписки страниц"""
+
+    def __init__(self, cache, workers: Optional[int] = None):
+        self.cache = cache
+        self._executor = ThreadPoolExecutor(max_workers=workers or APP_CONFIG['cache_refresh_workers'],
+                                            thread_name_prefix="cache-refresh")
+        self._lock = threading.Lock()
+        self._refreshing = set()  # (пространство имен, ключ) снимков, которые сейчас обновляются в фоне
+        self._listeners: Dict[str, Dict[Any, Callable[[str, Any], None]]] = {}
+        self._row_listeners: Dict[str, Dict[Any, Callable[[str, List[Any], List[Any]], None]]] = {}
+
+    def lookup(self, cache_key: str, dataset: str) -> Tuple[Any, bool]:
+        """(снимок или None, свежий ли он)"""
+        value, expire_time = self.cache.get(cache_key, expire_time=True)
+        metrics.record_cache(dataset, value is not None)
+        if value is None:
+            return None, False
+        return value, self._fresh(dataset, expire_time)
+
+    def is_fresh(self, cache_key: str, dataset: str) -> bool:
+        """Есть ли свежий снимок (без учета в метриках: для проверок перед фоновой подгрузкой)"""
+        value, expire_time = self.cache.get(cache_key, expire_time=True)
+        return value is not None and self._fresh(dataset, expire_time)
+
+    @staticmethod
+    def _fresh(dataset: str, expire_time: Optional[float]) -> bool:
+        stale = policy(dataset)[1]
+        return expire_time is None or expire_time - stale > time.time()
+
+    def revalidate(self, cache_key: str, dataset: str, fetch: Callable[[], Any], current: Any = None) -> bool:
+        """Обновить снимок в фоне (не больше одного обновления на ключ); False - уже обновляется"""
+        refresh_key = (self.cache.namespace, cache_key)
+        with self._lock:
+            if refresh_key in self._refreshing:
+                return False
+            self._refreshing.add(refresh_key)
+
+        def run():
+            try:
+                new = fetch()
+                # Пользователь сменился, пока шло обновление: его страницы не должны получить чужие данные
+                if not self.cache.detached():
+                    self.publish(dataset, cache_key, current, new)
+            except Exception as e:
+                print(f"Ошибка фонового обновления {cache_key}: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(refresh_key)
+
+        print(f"Данные {cache_key} устарели, показываем сохраненные и обновляем в фоне...")
+        # Обновление пишет в пространство имен пользователя, для которого оно запущено
+        self._executor.submit(self.cache.bind(run))
+        return True
+
+    def mark_stale(self, *datasets: str) -> int:
+        """Пометить снимки наборов устаревшими, не удаляя их; возвращает число помеченных записей.
+
+        Срок жизни записи сокращается до окна stale: следующее чтение отдаст снимок и обновит
+        его в фоне, а refresh=True с sync=True применит к нему только изменения.
+        """
+        marked = 0
+        for dataset in datasets:
+            stale = policy(dataset)[1]
+            for cache_key in self.cache.tagged(dataset_tag(dataset)):
+                marked += bool(self.cache.touch(cache_key, expire=stale))
+        return marked
+
+    def publish(self, dataset: str, cache_key: str, old: Any, new: Any) -> None:
+        """Сообщить подписчикам набора о новом снимке, если он отличается от показанного"""
+        if new is None or new is old or new == old:
+            return
+        with self._lock:
+            listeners = list(self._listeners.get(dataset, {}).values())
+        for listener in listeners:
+            try:
+                listener(cache_key, new)
+            except Exception as e:
+                print(f"Ошибка обработчика обновления {dataset}: {e}")
+
+    def publish_rows(self, dataset: str, cache_key: str, rows: Sequence[Any], removed: Sequence[Any] = ()) -> None:
+        """Сообщить подписчикам набора об отдельных измененных строках снимка cache_key и удаленных ID"""
+        if not rows and not removed:
+            return
+        with self._lock:
+            listeners = list(self._row_listeners.get(dataset, {}).values())
+        for listener in listeners:
+            try:
+                listener(cache_key, list(rows), list(removed))
+            except Exception as e:
+                print(f"Ошибка обработчика изменения строк {dataset}: {e}")
+
+    def _subscribe(self, registry: Dict[str, Dict[Any, Callable]], dataset: str, listener: Callable,
+                   owner: Any) -> Callable[[], None]:
+        owner = owner if owner is not None else listener
+        with self._lock:
+            registry.setdefault(dataset, {})[owner] = listener
+
+        def unsubscribe():
+            with self._lock:
+                listeners = registry.get(dataset, {})
+                if listeners.get(owner) is listener:
+                    del listeners[owner]
+
+        return unsubscribe
+
+    def subscribe(self, dataset: str, listener: Callable[[str, Any], None], owner: Any = None) -> Callable[[], None]:
+        """Подписаться на обновления набора: listener(cache_key, снимок) вызывается из фонового потока.
+
+        owner - владелец подписки (например, имя страницы): повторная подписка того же владельца
+        заменяет прежнюю, так что пересоздаваемые при навигации страницы не копят обработчики.
+        Возвращает функцию отписки.
+        """
+        return self._subscribe(self._listeners, dataset, listener, owner)
+
+    def subscribe_rows(self, dataset: str, listener: Callable[[str, List[Any], List[Any]], None],
+                       owner: Any = None) -> Callable[[], None]:
+        """Подписаться на изменения отдельных строк набора: listener(cache_key, строки, удаленные ID).
+
+        Вызывается после правки кешированного снимка на месте (изменение задачи, назначение и т.п.),
+        чтобы таблица перерисовала только эти строки. owner - как в subscribe.
+        """
+        return self._subscribe(self._row_listeners, dataset, listener, owner)
+
+    def loader(self, dataset: str, key, revalidate_with: Optional[Dict[str, Any]] = None):
+        """Объявить загрузчик набора dataset.
+
+        key - шаблон ключа кеша ("address_details_{address_id}") или функция от аргументов загрузчика.
+        Декорируемая функция всегда загружает данные с сервера и сама сохраняет их в кеш;
+        декоратор решает, нужно ли ее вызывать: снимок свежий - отдается как есть, устаревший -
+        отдается и обновляется в фоне (с аргументами revalidate_with, например sync=True),
+        снимка нет или refresh=True - загрузка выполняется сразу.
+        """
+        def decorator(fetch):
+            signature = inspect.signature(fetch)
+
+            @functools.wraps(fetch)
+            def wrapper(*args, **kwargs):
+                bound = signature.bind(*args, **kwargs)
+                bound.apply_defaults()
+                arguments = {name: value for name, value in bound.arguments.items() if name != 'refresh'}
+                if bound.arguments.get('refresh'):
+                    return fetch(*args, **kwargs)
+
+                cache_key = key.format(**arguments) if isinstance(key, str) else key(**arguments)
+                cached, fresh = self.lookup(cache_key, dataset)
+                if cached is None:
+                    return fetch(*args, **kwargs)
+                if not fresh:
+                    self.revalidate(cache_key, dataset, functools.partial(
+                        fetch, **{**arguments, **(revalidate_with or {}), 'refresh': True}), cached)
+                return cached
+
+            wrapper.dataset = dataset
+            return wrapper
+
+        return decorator
@@ -1,29 +1,27 @@
-from diskcache import Cache
-
 from src.database.api.api_master import create_master_api_client
 from src.database.connection import get_session_credentials
-
-cache = Cache('./local_cache')
+import src.database.admin.outbox as outbox
+import src.database.admin.select_server as select_server
 
 
 def delete_tasks(task_ids):
     try:
         # Получаем учетные данные из текущей сессии
-        login, password = get_session_credentials()
+        login, token = get_session_credentials()
 
-        if not login or not password:
+        if not login or not token:
             print("Ошибка: не удалось получить учетные данные сессии")
             return None
 
-        # Создаем API-клиента с текущими учетными данными
-        api_client = create_master_api_client(login, password)
+        # Удаляем задачи; если сервер недоступен, удаление ставится в очередь
+        result, queued = outbox.submit(login, token, 'delete_tasks', {'task_ids': task_ids})
 
-        # Вызываем метод удаления задач
-        result = api_client.delete_tasks(task_ids)
+        if queued:
+            select_server.patch_cached_tasks(task_ids, remove=True)
+            return result
 
-        # Очищаем кеш связанный с задачами
-        cache.delete("unmade_tasks")
-        cache.delete("all_tasks")
+        # Убираем задачи из кешированных списков и деталей
+        select_server.write_through('delete_tasks', {'task_ids': task_ids}, result)
 
         return result
 
@@ -35,20 +33,20 @@ def delete_tasks(task_ids):
 def delete_employee(employee_ids):
     try:
         # Получаем учетные данные из текущей сессии
-        login, password = get_session_credentials()
+        login, token = get_session_credentials()
 
-        if not login or not password:
+        if not login or not token:
             print("Ошибка: не удалось получить учетные данные сессии")
             return None
 
         # Создаем API-клиента с текущими учетными данными
-        api_client = create_master_api_client(login, password)
+        api_client = create_master_api_client(login, token)
 
         # Удаляем каждого сотрудника по отдельности
         result = api_client.delete_employee(employee_ids)
 
-        # Очищаем кеш связанный с сотрудниками
-        cache.delete("all_employees")
+        # Сбрасываем кеш, связанный с этими сотрудниками
+        select_server.invalidate_for('delete_employees', {'employee_ids': employee_ids})
 
         return result
 
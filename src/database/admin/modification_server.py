@@ -1,31 +1,42 @@
-from typing import Dict, List, Any, Optional, Tuple
+import hashlib
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List, Any, Optional, Tuple, Callable
 
-from diskcache import Cache
+import requests
 
+from src.config.config import APP_CONFIG
 from src.database.api.api_master import create_master_api_client
 from src.database.connection import get_session_credentials
-
-cache = Cache('./local_cache')
+from src.database.local_cache import cache
+import src.database.admin.outbox as outbox
+import src.database.admin.select_server as select_server
 
 
 def send_task_data(task_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
     try:
         # Получаем учетные данные из текущей сессии
-        login, password = get_session_credentials()
+        login, token = get_session_credentials()
 
-        if not login or not password:
+        if not login or not token:
             print("Ошибка: не удалось получить учетные данные сессии")
             return None
 
-        api_client = create_master_api_client(login, password)
-        result = api_client.upsert_task(task_data)
+        result, queued = outbox.submit(login, token, 'upsert_task', {'task_data': task_data})
 
         if not result:
             print(f"Ошибка при отправке данных задачи: {result}")
             return None
 
-        cache.delete("unmade_tasks")
-        cache.delete("all_tasks")
+        if queued:
+            # Сервер недоступен: правим кешированные списки, чтобы изменение было видно сразу
+            if task_data.get('id'):
+                select_server.patch_cached_tasks([task_data['id']],
+                                                 select_server.task_changes_from_payload(task_data))
+            return result
+
+        select_server.write_through('upsert_task', {'task_data': task_data}, result)
 
         return result
 
@@ -34,27 +45,73 @@ def send_task_data(task_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         return None
 
 
-def send_tasks_bulk(tasks_data: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
-    try:
-        login, password = get_session_credentials()
+def _bulk_upload_id(tasks_data: List[Dict[str, Any]], chunk_size: int) -> str:
+    """Идентификатор загрузки: один и тот же файл дает тот же id, по нему продолжается прерванная загрузка"""
+    payload = json.dumps(tasks_data, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(f"{chunk_size}:{payload}".encode('utf-8')).hexdigest()[:32]
 
-        if not login or not password:
-            print("Ошибка: не удалось получить учетные данные сессии")
-            return None
 
-        print(tasks_data)
+def send_tasks_bulk(tasks_data: List[Dict[str, Any]],
+                    on_progress: Optional[Callable[[int, int], None]] = None) -> Optional[Dict[str, Any]]:
+    """Массовая отправка задач порциями с ограниченным параллелизмом.
 
-        api_client = create_master_api_client(login, password)
-        result = api_client.insert_tasks_bulk(tasks_data)
+    Подтвержденные сервером порции записываются в журнал (локальный кеш), поэтому
+    повторный вызов с теми же данными после сбоя отправляет только оставшиеся порции.
+    on_progress(отправлено_порций, всего_порций) вызывается после каждой порции.
+    """
+    try:
+        login, token = get_session_credentials()
 
-        if not result:
-            print(f"Ошибка при массовой отправке задач: {result}")
+        if not login or not token:
+            print("Ошибка: не удалось получить учетные данные сессии")
             return None
 
-        cache.delete("unmade_tasks")
-        cache.delete("all_tasks")
+        chunk_size = APP_CONFIG['bulk_chunk_size']
+        chunks = [tasks_data[start:start + chunk_size] for start in range(0, len(tasks_data), chunk_size)]
+        upload_id = _bulk_upload_id(tasks_data, chunk_size)
+        journal_key = f"bulk_upload_journal_{upload_id}"
+
+        # Журнал: номер порции -> ответ сервера
+        acked: Dict[int, Any] = cache.get(journal_key, {})
+        if acked:
+            print(f"Продолжаем прерванную загрузку: отправлено {len(acked)} из {len(chunks)} порций")
+        if on_progress is not None:
+            on_progress(len(acked), len(chunks))
+
+        api_client = create_master_api_client(login, token)
+        journal_lock = threading.Lock()
+        pending = [index for index in range(len(chunks)) if index not in acked]
+        failed = []
+
+        with ThreadPoolExecutor(max_workers=APP_CONFIG['bulk_upload_workers']) as executor:
+            futures = {
+                executor.submit(api_client.insert_tasks_bulk, chunks[index], f"{upload_id}-{index}"): index
+                for index in pending
+            }
+            for future in as_completed(futures):
+                index = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    print(f"Ошибка при отправке порции {index + 1} из {len(chunks)}: {e}")
+                    failed.append(index)
+                    continue
+
+                with journal_lock:
+                    acked[index] = result
+                    cache.set(journal_key, acked, expire=APP_CONFIG['bulk_journal_ttl'])
+                if on_progress is not None:
+                    on_progress(len(acked), len(chunks))
+
+        # Даже при частичном сбое часть задач уже на сервере
+        select_server.invalidate_for('insert_tasks_bulk', {'tasks': tasks_data})
+
+        if failed:
+            print(f"Не отправлено порций: {len(failed)}, повторите загрузку для продолжения")
+            return None
 
-        return result
+        cache.delete(journal_key)
+        return {"chunks": len(chunks), "results": [acked[index] for index in range(len(chunks))]}
 
     except Exception as e:
         print(f"Ошибка при массовой отправке задач: {e}")
@@ -64,22 +121,25 @@ def send_tasks_bulk(tasks_data: List[Dict[str, Any]]) -> Optional[Dict[str, Any]
 def send_employee_data(employee_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
     try:
         # Получаем учетные данные из текущей сессии
-        login, password = get_session_credentials()
+        login, token = get_session_credentials()
 
-        if not login or not password:
+        if not login or not token:
             print("Ошибка: не удалось получить учетные данные сессии")
             return None
 
-        api_client = create_master_api_client(login, password)
-        result = api_client.upsert_employee(employee_data)
+        result, queued = outbox.submit(login, token, 'upsert_employee', {'employee_data': employee_data})
 
         if not result:
             print(f"Ошибка при отправке данных сотрудника: {result}")
             return None
 
-        cache.delete("all_employees")
-        if 'id' in employee_data:
-            cache.delete(f"employee_details_{employee_data['id']}")
+        if queued:
+            if employee_data.get('id'):
+                select_server.patch_cached_employee(employee_data['id'],
+                                                    select_server.employee_changes_from_payload(employee_data))
+            return result
+
+        select_server.write_through('upsert_employee', {'employee_data': employee_data}, result)
 
         return result
 
@@ -90,9 +150,9 @@ def send_employee_data(employee_data: Dict[str, Any]) -> Optional[Dict[str, Any]
 
 def set_employer_to_task(task_ids, emp_id, fio_name):
     try:
-        login, password = get_session_credentials()
+        login, token = get_session_credentials()
 
-        if not login or not password:
+        if not login or not token:
             print("Ошибка: не удалось получить учетные данные сессии")
             return None
 
@@ -102,17 +162,17 @@ def set_employer_to_task(task_ids, emp_id, fio_name):
             "fio_name": fio_name
         }
 
-        api_client = create_master_api_client(login, password)
-        result = api_client.set_employee_to_task(update_tasks_data)
+        result, queued = outbox.submit(login, token, 'set_employee_to_task', update_tasks_data)
 
         if not result:
             print(f"Ошибка при назначении задачи: {result}")
             return None
 
-        cache.delete("all_employees")
-        cache.delete("unmade_tasks")
-        cache.delete("all_tasks")
-        cache.delete(f"employee_details_{emp_id}")
+        if queued:
+            select_server.patch_cached_tasks(task_ids, {'employer_name': fio_name})
+            return result
+
+        select_server.write_through('set_employee_to_task', update_tasks_data, result)
 
         return result
     except Exception as ex:
@@ -121,16 +181,18 @@ def set_employer_to_task(task_ids, emp_id, fio_name):
 
 def unassign_tasks(task_ids: List[int], fio_emp: List[int]) -> Optional[Dict[str, Any]]:
     try:
-        login, password = get_session_credentials()
-        if not login or not password:
+        login, token = get_session_credentials()
+        if not login or not token:
             print("Ошибка: не удалось получить учетные данные сессии")
             return None
 
-        api_client = create_master_api_client(login, password)
-        result = api_client.unassign_tasks(task_ids, fio_emp)
+        result, queued = outbox.submit(login, token, 'unassign_tasks', {'task_ids': task_ids, 'fio_emp': fio_emp})
 
-        cache.delete("unmade_tasks")
-        cache.delete("all_tasks")
+        if queued:
+            select_server.patch_cached_tasks(task_ids, {'employer_name': ''})
+            return result
+
+        select_server.write_through('unassign_tasks', {'task_ids': task_ids, 'fio_emp': fio_emp}, result)
 
         return result
     except Exception as e:
@@ -138,34 +200,48 @@ def unassign_tasks(task_ids: List[int], fio_emp: List[int]) -> Optional[Dict[str
         return None
 
 
-def mark_notification_as_shown(notification_id: int, refresh: bool = False) -> Tuple:
-    """Пометить уведомление как прочитанное"""
+def mark_notifications_as_shown(notification_ids: List[int]) -> List[Tuple]:
+    """Пометить уведомления как прочитанные одним запросом; журнал в кеше правится на месте"""
     try:
-        login, password = get_session_credentials()
-        if not login or not password:
+        login, token = get_session_credentials()
+        if not login or not token:
             print("Ошибка: не удалось получить учетные данные сессии")
-            return ()
-
-        # Инвалидация кеша уведомлений
-        cache.delete("user_notifications")
-
-        api_client = create_master_api_client(login, password)
-        response = api_client.mark_notification_as_shown(notification_id)
-
-        # Преобразование ответа в кортеж
-        converted_response = (
-            response.get('id', 0),
-            response.get('task_id', 0),
-            response.get('notification_type', ''),
-            response.get('created_at', ''),
-            response.get('is_showed', False)
-        )
+            return []
+
+        notification_ids = list(dict.fromkeys(notification_ids))
+        if not notification_ids:
+            return []
+
+        api_client = create_master_api_client(login, token)
+        try:
+            response = api_client.mark_notifications_as_shown(notification_ids)
+        except requests.exceptions.HTTPError as e:
+            if e.response is None or e.response.status_code != 404:
+                raise
+            # Сервер без пакетного эндпоинта - помечаем по одному
+            response = [api_client.mark_notification_as_shown(notification_id)
+                        for notification_id in notification_ids]
+
+        select_server.patch_cached_notifications(response)
+        return [
+            (
+                notification.get('id', 0),
+                notification.get('task_id', 0),
+                notification.get('notification_type', ''),
+                notification.get('created_at', ''),
+                notification.get('is_showed', False)
+            )
+            for notification in response
+        ]
 
-        if refresh:
-            cache.delete(f"notification_{notification_id}")
+    except Exception as e:
+        print(f"Общая ошибка при обновлении уведомлений: {str(e)}")
+        return []
 
-        return converted_response
 
-    except Exception as e:
-        print(f"Общая ошибка при обновлении уведомления: {str(e)}")
-        return None
+def mark_notification_as_shown(notification_id: int, refresh: bool = False) -> Tuple:
+    """Пометить уведомление как прочитанное"""
+    result = mark_notifications_as_shown([notification_id])
+    if refresh:
+        cache.delete(f"notification_{notification_id}")
+    return result[0] if result else None
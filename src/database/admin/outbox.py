@@ -0,0 +1,223 @@
+"""Очередь исходящих изменений (outbox).
+
+Если сервер недоступен, изменение (правка задачи, назначение, удаление и т.д.) не теряется:
+оно записывается в очередь на диске и отправляется фоновым потоком, когда связь вернется.
+Изменения отправляются строго в порядке постановки; подряд идущие однотипные изменения
+одного объекта склеиваются в одну запись.
+
+У каждого пользователя своя очередь (./local_outbox/<хеш логина>): изменения, оставленные
+другим мастером, не задерживают изменения вошедшего и отправятся, когда их автор войдет снова.
+"""
+import hashlib
+import os
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+import requests
+from diskcache import Deque
+
+from src.config.config import APP_CONFIG
+from src.database.api.api_master import create_master_api_client
+from src.database.api.resilience import CircuitOpenError
+from src.database.connection import get_session_credentials
+from src.database.local_cache import cache
+import src.database.admin.select_server as select_server
+
+OUTBOX_DIRECTORY = './local_outbox'
+
+# Сбои связи, при которых запрос точно не дошел до сервера и изменение ставится в очередь
+# (ответы 4xx/5xx сюда не относятся)
+NETWORK_ERRORS = (requests.exceptions.ConnectionError, requests.exceptions.ConnectTimeout, CircuitOpenError)
+
+# Сервер не ответил вовремя: запрос мог уже выполниться, поэтому изменения не повторяются
+# (повтор создал бы задачу дважды), а затронутые данные перечитываются с сервера
+UNCONFIRMED_ERRORS = (requests.exceptions.ReadTimeout,)
+
+# Вид изменения -> вызов API
+OPERATIONS = {
+    'upsert_task': lambda client, payload: client.upsert_task(payload['task_data']),
+    'upsert_employee': lambda client, payload: client.upsert_employee(payload['employee_data']),
+    'set_employee_to_task': lambda client, payload: client.set_employee_to_task(payload),
+    'unassign_tasks': lambda client, payload: client.unassign_tasks(payload['task_ids'], payload['fio_emp']),
+    'delete_tasks': lambda client, payload: client.delete_tasks(payload['task_ids']),
+}
+
+_lock = threading.Lock()
+_wakeup = threading.Event()
+_flusher: Optional[threading.Thread] = None
+_queues: Dict[str, Deque] = {}
+_sending: Optional[str] = None  # логин, голова очереди которого сейчас отправляется; склеивать с ней нельзя
+
+
+def _queue(login: str) -> Deque:
+    """Очередь пользователя login (каталог назван хешем логина, чтобы он был допустимым именем)"""
+    with _lock:
+        queue = _queues.get(login)
+        if queue is None:
+            name = hashlib.sha1(login.encode('utf-8')).hexdigest()[:16]
+            queue = _queues[login] = Deque(directory=os.path.join(OUTBOX_DIRECTORY, name))
+        return queue
+
+
+def _coalesce(last: Dict[str, Any], entry: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Склеить новое изменение с последним в очереди; None - если склеить нельзя"""
+    if last['kind'] != entry['kind'] or last['login'] != entry['login']:
+        return None
+
+    kind, old, new = entry['kind'], last['payload'], entry['payload']
+    if kind == 'upsert_task' and old['task_data'].get('id') and old['task_data'].get('id') == new['task_data'].get('id'):
+        return {**last, 'payload': {'task_data': {**old['task_data'], **new['task_data']}}}
+    if kind == 'upsert_employee' and old['employee_data'].get('id') and \
+            old['employee_data'].get('id') == new['employee_data'].get('id'):
+        return {**last, 'payload': {'employee_data': {**old['employee_data'], **new['employee_data']}}}
+    if kind == 'delete_tasks':
+        return {**last, 'payload': {'task_ids': old['task_ids'] + new['task_ids']}}
+    if kind == 'unassign_tasks':
+        return {**last, 'payload': {'task_ids': old['task_ids'] + new['task_ids'],
+                                    'fio_emp': old['fio_emp'] + new['fio_emp']}}
+    if kind == 'set_employee_to_task' and (old['emp_id'], old['fio_name']) == (new['emp_id'], new['fio_name']):
+        return {**last, 'payload': {**old, 'task_ids': old['task_ids'] + new['task_ids']}}
+    return None
+
+
+def enqueue(login: str, kind: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Поставить изменение в очередь и разбудить поток отправки"""
+    entry = {'login': login, 'kind': kind, 'payload': payload}
+    queue = _queue(login)
+    with _lock:
+        merged = None
+        if len(queue) > (1 if _sending == login else 0):
+            merged = _coalesce(queue[-1], entry)
+        if merged is not None:
+            queue[-1] = merged
+        else:
+            queue.append(entry)
+        pending = len(queue)
+
+    print(f"Изменение {kind} поставлено в очередь, ожидают отправки: {pending}")
+    start_flusher()
+    _wakeup.set()
+    return {'queued': True, 'pending': pending}
+
+
+def pending_count(login: Optional[str] = None) -> int:
+    """Количество изменений пользователя login (по умолчанию вошедшего), ожидающих отправки"""
+    if login is None:
+        login, _ = get_session_credentials()
+        if not login:
+            return 0
+    return len(_queue(login))
+
+
+def submit(login: str, token: str, kind: str, payload: Dict[str, Any]) -> Tuple[Any, bool]:
+    """Отправить изменение сразу, а если сервер недоступен - поставить в очередь.
+
+    Возвращает (ответ, поставлено_в_очередь). Пока в очереди пользователя есть неотправленные
+    изменения, новые тоже идут в очередь, чтобы сервер получил их в исходном порядке.
+    """
+    if pending_count(login):
+        return enqueue(login, kind, payload), True
+
+    api_client = create_master_api_client(login, token)
+    try:
+        return OPERATIONS[kind](api_client, payload), False
+    except NETWORK_ERRORS as e:
+        print(f"Сервер недоступен ({e}), изменение будет отправлено позже")
+        return enqueue(login, kind, payload), True
+    except UNCONFIRMED_ERRORS as e:
+        print(f"Сервер не подтвердил {kind} ({e}), изменение могло быть применено - данные будут перечитаны")
+        select_server.invalidate_for(kind, payload)
+        raise
+
+
+def _invalidate_after_flush(entries) -> None:
+    """После отправки очереди сбрасывается кеш затронутых объектов, а списки, поправленные
+    на время ожидания, перечитываются с сервера (в том числе после изменений, отклоненных сервером)"""
+    for entry in entries:
+        select_server.invalidate_for(entry['kind'], entry['payload'])
+
+
+def flush(max_entries: Optional[int] = None) -> int:
+    """Отправить изменения из головы очереди вошедшего пользователя по порядку (не больше max_entries за раз).
+
+    Останавливается на первом сбое связи; изменение, отклоненное сервером (4xx), удаляется
+    из очереди, иначе оно блокировало бы все последующие. Изменение без ответа за отведенное время
+    тоже удаляется, не повторяясь: кеш затронутых объектов сбрасывается, как после отправки.
+    Возвращает число отправленных.
+    """
+    global _sending
+    max_entries = max_entries or APP_CONFIG['outbox_batch_size']
+    login, token = get_session_credentials()
+    if not login or not token:
+        return 0
+    # Кеш сбрасывается только у пользователя, чьи изменения отправлены:
+    # если он успел выйти, кеш вошедшего после него не трогаем
+    namespace = cache.namespace
+
+    queue = _queue(login)
+    api_client = create_master_api_client(login, token)
+    sent = 0
+    done = []
+    while sent < max_entries:
+        with _lock:
+            if not len(queue):
+                break
+            entry = queue[0]
+            _sending = login
+
+        processed = False
+        try:
+            OPERATIONS[entry['kind']](api_client, entry['payload'])
+            processed = True
+        except NETWORK_ERRORS as e:
+            print(f"Очередь изменений: сервер по-прежнему недоступен ({e})")
+        except UNCONFIRMED_ERRORS as e:
+            # Повторная отправка могла бы применить изменение дважды
+            print(f"Очередь изменений: сервер не подтвердил {entry['kind']} ({e}), изменение не повторяется")
+            processed = True
+        except requests.exceptions.HTTPError as e:
+            if e.response is not None and e.response.status_code >= 500:
+                print(f"Очередь изменений: ошибка сервера ({e}), повторим позже")
+            else:
+                print(f"Очередь изменений: сервер отклонил {entry['kind']} ({e}), изменение удалено")
+                processed = True
+        finally:
+            # Голова снимается под той же блокировкой, под которой снова разрешается склейка:
+            # иначе enqueue успел бы склеить новое изменение с уже отправленной головой
+            with _lock:
+                _sending = None
+                if processed:
+                    queue.popleft()
+
+        if not processed:
+            break
+        done.append(entry)
+        sent += 1
+
+    if sent:
+        print(f"Очередь изменений: отправлено {sent}, осталось {len(queue)}")
+        with cache.bound(namespace):
+            _invalidate_after_flush(done)
+    return sent
+
+
+def _flush_loop() -> None:
+    while True:
+        _wakeup.wait(timeout=APP_CONFIG['outbox_retry_interval'])
+        _wakeup.clear()
+        try:
+            while pending_count() and flush():
+                pass
+        except Exception as e:
+            print(f"Ошибка при отправке очереди изменений: {e}")
+
+
+def start_flusher() -> None:
+    """Запустить фоновый поток отправки очереди (один на процесс)"""
+    global _flusher
+    with _lock:
+        if _flusher is None or not _flusher.is_alive():
+            _flusher = threading.Thread(target=_flush_loop, daemon=True)
+            _flusher.start()
+    if pending_count():
+        _wakeup.set()
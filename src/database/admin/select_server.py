@@ -1,79 +1,540 @@
+import asyncio
+import functools
+import inspect
+import threading
+import time
 from datetime import datetime
-from typing import Optional, List, Tuple, Dict, Any
+from typing import Optional, List, Tuple, Dict, Any, Iterator
 from datetime import date
 
-from diskcache import Cache
+import requests
 
-from src.database.api.api_master import create_master_api_client
+import src.database.admin.cache_layer as cache_layer
+from src.config.config import APP_CONFIG
+from src.database.api.api_master import create_master_api_client, create_async_master_api_client, is_api_offline
+from src.database.api.metrics import metrics
+from src.database.api.records import ACTS, ADDRESSES, EMPLOYEES, TASKS
 from src.database.connection import get_session_credentials
+from src.database.local_cache import cache
+
+# Свежесть снимков и фоновое обновление устаревших (stale-while-revalidate)
+layer = cache_layer.CacheLayer(cache)
+# Страницы подписываются на обновления набора: subscribe('addresses', on_update, owner='address_tab'),
+# и на правки отдельных строк: subscribe_rows('tasks', on_rows, owner='search_tab')
+subscribe = layer.subscribe
+subscribe_rows = layer.subscribe_rows
+
+# Проекции списка задач: страница запрашивает только те поля, которые показывает.
+# Поля, не вошедшие в проекцию, заполняются в кортеже значениями по умолчанию,
+# поэтому позиции в кортеже (task[-3] и т.д.) остаются прежними.
+TASK_FIELDS_TABLE = [
+    'task_id', 'customer_name', 'address_id', 'city', 'district', 'street', 'hamlet', 'dom',
+    'apartment', 'entrance', 'registered_residing', 'address_status', 'standarts', 'area',
+    'phone_number', 'personal_account', 'task_date', 'remark', 'task_status', 'purpose', 'saldo',
+    'employer_name', 'date_end', 'master', 'meters',
+]  # таблицы задач: без актов и фото
+TASK_FIELDS_METERS = ['task_id', 'address_id', 'street', 'hamlet', 'dom', 'apartment', 'meters']
+TASK_FIELDS = list(TASKS.fields)  # все поля в порядке кортежа TaskRecord
+# Поля строки неназначенной задачи (_convert_unmade_task) в порядке кортежа
+UNMADE_TASK_FIELDS = TASK_FIELDS[:TASK_FIELDS.index('employer_name')] + ['date_end']
+
+# Тег diskcache производных выборок задач (фильтры, проекции) - чтобы сбросить их разом через cache.evict
+TASK_VIEWS_TAG = "task_views"
+
+# Детали, собранные вокруг одного объекта: набор -> вид объекта в теге (cache_layer.entity_tag)
+_DETAIL_ENTITIES = {'task_details': 'task', 'address_details': 'address', 'employee_details': 'employee'}
+
+
+# Преобразование ответов API в структуры, с которыми работает UI
+# (строки больших списков - задачи, адреса, акты, сотрудники - собирают кодеки из records)
+
+def _convert_unmade_task(task: Dict[str, Any]) -> Tuple:
+    """Задача из tasks/unassigned -> кортеж строки таблицы"""
+    return (
+        task.get('task_id', 0),  # ID задачи
+        task.get('customer_name', ''),  # ФИО клиента
+        task.get('address_id', ''),  # Адрес клиента
+        task.get('city', ''),  # Город
+        task.get('district', ''),  # Район
+        task.get('street', ''),  # Улица
+        task.get('hamlet', ''),
+        task.get('dom', ''),  # Дом
+        task.get('apartment', ''),  # Квартира
+        task.get('entrance', ''),  # Подъезд
+        task.get('registered_residing', ''),  # Зарегистрированные жильцы
+        task.get('address_status', ''),  # Статус адреса
+        task.get('standarts', ''),  # Стандарты
+        task.get('area', ''),  # Площадь
+        task.get('phone_number') or '',  # Телефон
+        task.get('personal_account') or '',  # Лицевой счет
+        task.get('task_date', ''),  # Дата задачи
+        task.get('remark', ''),  # Примечание
+        task.get('task_status', ''),  # Статус задачи
+        task.get('purpose', ''),  # Цель
+        task.get('saldo', ''),  # Сальдо
+        task.get('date_end', ''),
+    )
+
+
+def _convert_address_details(address: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        'address_info': address.get('address_info', []),
+        'meters': address.get('meters', []),
+        'tasks': address.get('tasks', []),
+    }
+
+
+def _convert_task_details(tasks: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        'task': tasks.get('task', []),
+        'acts': tasks.get('acts', []),
+        'meters': tasks.get('meters', []),
+        'photos': tasks.get('photos', []),
+    }
+
+
+def _convert_employee_details(employee: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        'employee': employee.get('employee', []),
+        'tasks': employee.get('tasks', [])
+    }
+
+
+def _convert_dashboard_stats(stats: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        'tasks_by_status': [
+            {
+                "status": s['status'],
+                "count": s['count']
+            } for s in stats.get('tasks_by_status', [])
+            if s['count'] > 0
+        ],
+        'tasks_by_month': [
+            {"month": m['month'], "count": m['count']}
+            for m in stats.get('tasks_by_month', [])
+        ],
+        'employee_stats': [
+            {
+                "employee_id": e['employee_id'],
+                "employee_name": e['employee_name'],
+                "completed_tasks": e['completed_tasks'],
+                "avg_completion_time": e['avg_completion_time']
+            }
+            for e in stats.get('employee_stats', [])
+        ],
+        'general_stats': stats.get('general_stats', {})
+    }
+
+
+def _convert_notification(notification: Dict[str, Any]) -> Tuple:
+    # Исправление: проверяем тип created_at
+    created_at = notification.get('created_at', datetime.now())
+    if isinstance(created_at, datetime):
+        created_at_str = created_at.isoformat()
+    else:
+        # Если это строка, оставляем как есть
+        created_at_str = created_at
+
+    return (
+        notification.get('id', 0),
+        notification.get('task_id', 0),
+        notification.get('notification_type', ''),
+        created_at_str,  # Исправленное поле
+        notification.get('is_showed', False)
+    )
+
+
+# Объединение одновременных одинаковых запросов (single-flight).
+# Если поток уведомлений и UI одновременно вызывают один загрузчик с теми же аргументами,
+# HTTP-запрос выполняет только первый вызов, остальные ждут и получают тот же результат.
+
+class _Flight:
+    """Выполняющийся запрос, результат которого ждут остальные вызовы"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+
+
+_inflight_lock = threading.Lock()
+_inflight: Dict[str, _Flight] = {}
+_inflight_async: Dict[Tuple, "asyncio.Future"] = {}
+
+
+def _single_flight(key: str, fetch):
+    """Выполнить fetch(), либо дождаться уже выполняющегося вызова с тем же ключом"""
+    with _inflight_lock:
+        flight = _inflight.get(key)
+        is_leader = flight is None
+        if is_leader:
+            flight = _Flight()
+            _inflight[key] = flight
+
+    if not is_leader:
+        print(f"Запрос {key} уже выполняется, ожидаем его результат...")
+        flight.done.wait()
+        if flight.error is not None:
+            raise flight.error
+        return flight.result
+
+    try:
+        flight.result = fetch()
+        return flight.result
+    except BaseException as e:
+        flight.error = e
+        raise
+    finally:
+        with _inflight_lock:
+            _inflight.pop(key, None)
+        flight.done.set()
+
+
+def single_flight(func):
+    """Декоратор загрузчика: одновременные вызовы с одинаковыми аргументами делят один запрос"""
+    signature = inspect.signature(func)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        # Загрузки разных пользователей (пространств имен кеша) не объединяются
+        key = f"{cache.namespace}:{func.__name__}{sorted(bound.arguments.items())!r}"
+        return _single_flight(key, lambda: func(*args, **kwargs))
+
+    return wrapper
+
+
+def _cached_snapshot(cache_key: str, default):
+    """Последний сохраненный снимок данных - его показываем, если сервер не ответил"""
+    cached = cache.get(cache_key)
+    if cached is None:
+        return default
+    print(f"Сервер недоступен, показываем сохраненные данные {cache_key}")
+    return cached
+
+
+# Префиксы ключей кеша, после которых идут параметры; метрики кеша считаются по набору данных
+_CACHE_DATASET_PREFIXES = (
+    "all_tasks_fields", "tasks_filtered", "completed_tasks", "task_details",
+    "address_details", "employee_details", "dashboard_stats",
+)
+
+
+def _cache_lookup(cache_key: str) -> Any:
+    """Запись из кеша или None (попадание или промах учитывается в метриках); значение читается
+    одним обращением, чтобы запись не могла истечь между проверкой и чтением"""
+    cached = cache.get(cache_key)
+    dataset = next((prefix for prefix in _CACHE_DATASET_PREFIXES if cache_key.startswith(f"{prefix}_")), cache_key)
+    metrics.record_cache(dataset, cached is not None)
+    return cached
+
+
+def _fresh_snapshot(cache_key: str, dataset: str) -> Any:
+    """Свежий снимок из кеша или None; устаревший снимок в пакетных загрузках - промах,
+    он загружается заново вместе с отсутствующими (как refresh в загрузчиках CacheLayer)"""
+    cached, fresh = layer.lookup(cache_key, dataset)
+    return cached if fresh else None
+
+
+def _entity_id(item: Any, *names: str) -> Any:
+    """Идентификатор объекта из ответа API (поле id в разных эндпоинтах называется по-разному)"""
+    if isinstance(item, dict):
+        for name in names:
+            if item.get(name) is not None:
+                return item[name]
+    return None
+
+
+def _cache_tags(dataset: str, value: Any = None, entity_id: Any = None) -> List[str]:
+    """Теги записи кеша: набор данных и объекты, из которых собран снимок.
+
+    Детали задачи зависят от задачи и ее адреса, детали адреса и сотрудника - от всех задач в них,
+    поэтому изменение задачи сбрасывает и детали ее адреса, и детали прежнего исполнителя.
+    """
+    tags = [cache_layer.dataset_tag(dataset)]
+    kind = _DETAIL_ENTITIES.get(dataset)
+    if kind is None or not isinstance(value, dict):
+        return tags
+
+    tags.append(cache_layer.entity_tag(kind, entity_id))
+    if dataset == 'task_details':
+        tasks = value.get('task')
+        for task in tasks if isinstance(tasks, list) else [tasks]:
+            address_id = _entity_id(task, 'address_id') or _entity_id(
+                task.get('address') if isinstance(task, dict) else None, 'id', 'address_id')
+            if address_id is not None:
+                tags.append(cache_layer.entity_tag('address', address_id))
+    else:
+        for task in value.get('tasks', []):
+            task_id = _entity_id(task, 'task_id', 'id')
+            if task_id is not None:
+                tags.append(cache_layer.entity_tag('task', task_id))
+    return tags
+
+
+def task_list_key(fields: Optional[List[str]] = None) -> str:
+    """Ключ кеша полного списка задач; у каждой проекции полей свой ключ"""
+    return f"all_tasks_fields_{','.join(fields)}" if fields else "all_tasks"
+
+
+def _fetch_list_conditional(api_client, cache_key: str, dataset: str, codec, expire: Optional[int] = None,
+                            fields: Optional[List[str]] = None, tag: Optional[str] = None):
+    """Загрузить большой список условным GET.
+
+    Рядом с кешированным списком хранятся ETag/Last-Modified. Если сервер ответил 304,
+    список не скачивается заново, а срок жизни записи в кеше продлевается.
+    Ответ разбирается сразу в строки codec (records.RecordCodec), без промежуточного списка словарей.
+    """
+    expire = expire or cache_layer.expire(dataset)
+    validators_key = f"{cache_key}_validators"
+    cached = cache.get(cache_key)
+    validators = cache.get(validators_key) if cached is not None else None
+
+    converted, new_validators = api_client.get_list_if_modified(
+        dataset, validators, fields=fields, decode=lambda content: codec.decode(content, fields)
+    )
+
+    if converted is None:
+        print(f"Данные {cache_key} не изменились (304), продлеваем кеш...")
+        cache.touch(cache_key, expire=expire)
+        cache.touch(validators_key, expire=expire)
+        return cached
+
+    cache.set(cache_key, converted, expire=expire, tag=tag, tags=_cache_tags(dataset))
+    if new_validators:
+        cache.set(validators_key, new_validators, expire=expire, tag=tag)
+    else:
+        cache.delete(validators_key)
+    return converted
+
+
+def _merge_task_changes(snapshot: List[Tuple], upserted: List[Dict[str, Any]], deleted: List[int]) -> List[Tuple]:
+    """Применить дельту (измененные и удаленные задачи) к кешированному снимку"""
+    deleted_ids = set(deleted)
+    changed = {task.get('task_id', 0): TASKS.from_dict(task) for task in upserted}
+
+    merged = []
+    for row in snapshot:
+        task_id = row[0]
+        if task_id in deleted_ids:
+            continue
+        merged.append(changed.pop(task_id, row))
+
+    # Оставшиеся задачи - новые
+    merged.extend(row for task_id, row in changed.items() if task_id not in deleted_ids)
+    return merged
+
+
+def _sync_task_data_all(api_client, fields: Optional[List[str]] = None, expire: Optional[int] = None) -> List[Tuple]:
+    """Дельта-синхронизация списка задач: скачиваются только изменения после водяного знака"""
+    expire = expire or cache_layer.expire('tasks')
+    cache_key = task_list_key(fields)
+    tag = TASK_VIEWS_TAG if fields else None
+    watermark_key = f"{cache_key}_watermark"
+    snapshot = cache.get(cache_key)
+    watermark = cache.get(watermark_key) if snapshot is not None else None
+
+    changes = api_client.get_tasks_changes(since=watermark, fields=fields)
+    upserted = changes.get('upserted', [])
+    deleted = changes.get('deleted', [])
+    print(f"Синхронизация задач: изменено {len(upserted)}, удалено {len(deleted)}")
+
+    if watermark is not None and not upserted and not deleted:
+        cache.touch(cache_key, expire=expire)
+        cache.set(watermark_key, changes.get('watermark', watermark), expire=expire, tag=tag)
+        return snapshot
+
+    if watermark is None:
+        # Без водяного знака сервер прислал полный снимок - он заменяет кеш целиком
+        merged = TASKS.convert(upserted, fields)
+    else:
+        merged = _merge_task_changes(snapshot, upserted, deleted)
+
+    cache.set(cache_key, merged, expire=expire, tag=tag, tags=_cache_tags('tasks'))
+    cache.set(watermark_key, changes.get('watermark'), expire=expire, tag=tag)
+    # Версия снимка растет при каждом изменении, по ней страницы понимают, что данные обновились
+    cache.incr(f"{cache_key}_version")
+    return merged
+
+
+def _stream_task_data_all(api_client, fields: Optional[List[str]] = None,
+                          expire: Optional[int] = None) -> Iterator[List[Tuple]]:
+    """Потоковая загрузка задач: каждая страница сразу преобразуется и отдается вызывающему.
+
+    Ограничен объем исходного JSON: в памяти одновременно находится только одна страница словарей.
+    Преобразованные кортежи всех страниц накапливаются - снимок в кеше хранится одним списком,
+    с которым работают дельта-синхронизация и правка строк на месте, и сохраняется после последней
+    страницы. Поэтому пик памяти - весь список кортежей (заметно меньше словарей JSON) плюс одна
+    страница; таблица страницы все равно держит все строки. Прерванный поток снимок не сохраняет.
+    """
+    expire = expire or cache_layer.expire('tasks')
+    cache_key = task_list_key(fields)
+    tag = TASK_VIEWS_TAG if fields else None
+    converted_tasks = []
+    meta = {}
+    for tasks_page in api_client.get_all_tasks_pages(page_size=APP_CONFIG['api_page_size'], meta=meta,
+                                                     fields=fields):
+        with metrics.measure("convert tasks"):
+            chunk = TASKS.convert(tasks_page, fields)
+        converted_tasks.extend(chunk)
+        yield chunk
+
+    _store_task_snapshot(converted_tasks, meta.get('watermark'), fields, expire)
+
+
+def _store_task_snapshot(rows: List[Tuple], watermark: Optional[str], fields: Optional[List[str]] = None,
+                         expire: Optional[int] = None) -> List[Tuple]:
+    """Сохранить полный снимок списка задач вместе со служебными ключами.
+
+    ETag/Last-Modified относятся к другому ответу и удаляются, водяной знак заменяется знаком
+    этой загрузки, версия снимка растет (как после дельта-синхронизации).
+    """
+    expire = expire or cache_layer.expire('tasks')
+    cache_key = task_list_key(fields)
+    tag = TASK_VIEWS_TAG if fields else None
+    cache.set(cache_key, rows, expire=expire, tag=tag, tags=_cache_tags('tasks'))
+    cache.delete(f"{cache_key}_validators")
+    if watermark is not None:
+        cache.set(f"{cache_key}_watermark", watermark, expire=expire, tag=tag)
+    else:
+        cache.delete(f"{cache_key}_watermark")
+    cache.incr(f"{cache_key}_version")
+    return rows
+
+
+def iter_task_data_all(fields: Optional[List[str]] = None) -> Iterator[List[Tuple]]:
+    """Получить все задачи порциями, чтобы таблица могла показать первую страницу до конца загрузки.
+
+    fields - проекция полей (например, TASK_FIELDS_TABLE), None - все поля.
+    """
+    cache_key = task_list_key(fields)
+    cached, fresh = layer.lookup(cache_key, 'tasks')
+    if cached is not None:
+        print("Загружаем данные из кеша...")
+        if not fresh:
+            # Как у select_task_data_all: устаревший снимок показывается и синхронизируется в фоне
+            layer.revalidate(cache_key, 'tasks', functools.partial(
+                select_task_data_all, refresh=True, sync=True, fields=fields), cached)
+        yield cached
+        return
+
+    login, token = get_session_credentials()
+    if not login or not token:
+        print("Ошибка: не удалось получить учетные данные сессии")
+        return
+
+    api_client = create_master_api_client(login, token)
+    try:
+        yield from _stream_task_data_all(api_client, fields)
+    except Exception as e:
+        print(f"Ошибка при потоковой загрузке задач: {e}")
 
-cache = Cache('./local_cache')
 
+@layer.loader('tasks', key=lambda sync, fields: task_list_key(fields), revalidate_with={'sync': True})
+@single_flight
+def select_task_data_all(refresh: bool = False, sync: bool = False, fields: Optional[List[str]] = None):
+    """Получить все задачи.
 
-def select_task_data_all(refresh: bool = False):
-    """Получить все задачи"""
+    При refresh=True и sync=True запрашиваются только изменения с последней синхронизации
+    (так же обновляется в фоне устаревший снимок).
+    fields - проекция полей (например, TASK_FIELDS_METERS), None - все поля.
+    """
     try:
-        cache_key = "all_tasks"  # Ключ для кеша
+        cache_key = task_list_key(fields)  # Ключ для кеша
 
         if refresh:
             print("Обновление данных...")
-            cache.delete(cache_key)
 
-        # Проверяем кеш, если не требуется обновление
-        if not refresh and cache_key in cache:
-            print("Загружаем данные из кеша...")
-            return cache[cache_key]
+        login, token = get_session_credentials()
+
+        if not login or not token:
+            print("Ошибка: не удалось получить учетные данные сессии")
+            return []
+
+        api_client = create_master_api_client(login, token)
+
+        if sync and cache_key in cache:
+            try:
+                return _sync_task_data_all(api_client, fields)
+            except requests.exceptions.HTTPError as e:
+                # Сервер без поддержки дельта-синхронизации: загружаем список целиком
+                print(f"Дельта-синхронизация недоступна, полная загрузка: {e}")
+
+        # Кеша нет - условный запрос бесполезен, загружаем постранично
+        if cache_key not in cache:
+            converted_tasks = []
+            for chunk in _stream_task_data_all(api_client, fields):
+                converted_tasks.extend(chunk)
+            return converted_tasks
+
+        # Преобразование словарей в кортежи (при ответе 304 возвращается кеш)
+        return _fetch_list_conditional(
+            api_client, cache_key, "tasks", TASKS,
+            fields=fields, tag=TASK_VIEWS_TAG if fields else None
+        )
+    except Exception as e:
+        print(f"Ошибка при получении всех задач: {e}")
+        return _cached_snapshot(cache_key, [])
+
 
-        login, password = get_session_credentials()
+def _filtered_tasks_key(master=None, status=None, date_from=None, date_to=None, district=None, employee_id=None,
+                        fields: Optional[List[str]] = None) -> str:
+    cache_key = f"tasks_filtered_{master}_{status}_{date_from}_{date_to}_{district}_{employee_id}"
+    if fields:
+        cache_key += f"_fields_{','.join(fields)}"
+    return cache_key
 
-        if not login or not password:
+
+@layer.loader('tasks', key=_filtered_tasks_key)
+@single_flight
+def select_task_data_filtered(
+        master: Optional[str] = None,
+        status: Optional[str] = None,
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None,
+        district: Optional[str] = None,
+        employee_id: Optional[int] = None,
+        fields: Optional[List[str]] = None,
+        refresh: bool = False
+):
+    """Получить задачи, отфильтрованные на сервере (кеш отдельный для каждого набора фильтров и полей)"""
+    try:
+        cache_key = _filtered_tasks_key(master, status, date_from, date_to, district, employee_id, fields)
+
+        if refresh:
+            print("Обновление отфильтрованных задач...")
+
+        login, token = get_session_credentials()
+
+        if not login or not token:
             print("Ошибка: не удалось получить учетные данные сессии")
             return []
 
-        api_client = create_master_api_client(login, password)
-        tasks_data = api_client.get_all_tasks()
+        api_client = create_master_api_client(login, token)
+        tasks_data = api_client.get_all_tasks(
+            master=master,
+            status=status,
+            date_from=date_from,
+            date_to=date_to,
+            district=district,
+            employee_id=employee_id,
+            fields=fields
+        )
+
+        converted_tasks = TASKS.convert(tasks_data, fields)
 
-        # Преобразование словарей в кортежи
-        converted_tasks = []
-        for task in tasks_data:
-            converted_task = (
-                task.get('task_id', 0),  # ID задачи
-                task.get('customer_name', ''),  # ФИО клиента
-                task.get('address_id', ''),  # Адрес клиента
-                task.get('city', ''),  # Город
-                task.get('district', ''),  # Район
-                task.get('street', ''),  # Улица
-                task.get('hamlet', ''),
-                task.get('dom', ''),  # Дом
-                task.get('apartment', ''),  # Квартира
-                task.get('entrance', ''),  # Подъезд
-                task.get('registered_residing', ''),  # Зарегистрированные жильцы
-                task.get('address_status', ''),  # Статус адреса
-                task.get('standarts', ''),  # Стандарты
-                task.get('area', ''),  # Площадь
-                task.get('phone_number') or '',  # Телефон
-                task.get('personal_account', 0),  # Лицевой счет
-                task.get('task_date', ''),  # Дата задачи
-                task.get('remark', ''),  # Примечание
-                task.get('task_status', ''),  # Статус задачи
-                task.get('purpose', ''),  # Цель
-                task.get('saldo', ''),  # Сальдо
-                task.get('employer_name', ''),
-                task.get('date_end', ''),
-                task.get('master', ''),
-                task.get('meters', {}),
-                task.get('acts', {}),
-                task.get('photos', {})
-            )
-            converted_tasks.append(converted_task)
-
-        cache.set(cache_key, converted_tasks, expire=3600)
+        # Тег позволяет сбросить все отфильтрованные выборки разом после изменения задач
+        cache.set(cache_key, converted_tasks, expire=cache_layer.expire('tasks'), tag=TASK_VIEWS_TAG,
+                  tags=_cache_tags('tasks'))
         return converted_tasks
     except Exception as e:
-        print(f"Ошибка при получении всех задач: {e}")
-        return []
+        print(f"Ошибка при получении отфильтрованных задач: {e}")
+        return _cached_snapshot(cache_key, [])
 
 
+@layer.loader('completed_tasks', key="completed_tasks_{start_date}_{end_date}")
+@single_flight
 def get_completed_tasks_export(
         start_date: Optional[date] = None,
         end_date: Optional[date] = None,
@@ -86,18 +547,13 @@ def get_completed_tasks_export(
 
         if refresh:
             print("Обновление данных завершенных задач...")
-            cache.delete(cache_key)
 
-        if not refresh and cache_key in cache:
-            print("Загружаем данные завершенных задач из кеша...")
-            return cache[cache_key]
-
-        login, password = get_session_credentials()
-        if not login or not password:
+        login, token = get_session_credentials()
+        if not login or not token:
             print("Ошибка: не удалось получить учетные данные сессии")
             return []
 
-        api_client = create_master_api_client(login, password)
+        api_client = create_master_api_client(login, token)
 
         response = api_client.export_completed_tasks(
             start_date=start_date,
@@ -106,72 +562,46 @@ def get_completed_tasks_export(
 
         tasks = response.get("tasks", [])
 
-        cache.set(cache_key, tasks, expire=3600)
+        cache.set(cache_key, tasks, expire=cache_layer.expire('completed_tasks'),
+                  tags=_cache_tags('completed_tasks'))
         return tasks
 
     except Exception as e:
         print(f"Ошибка при получении завершенных задач: {e}")
-        return []
+        return _cached_snapshot(cache_key, [])
 
 
+@layer.loader('addresses', key="all_addresses")
+@single_flight
 def select_address_data_all(refresh: bool = False):
     """Получить все адреса с кешированием"""
     try:
         cache_key = "all_addresses"  # Уникальный ключ кеша
 
-        # Принудительное обновление кеша
+        # Принудительное обновление кеша (условным запросом)
         if refresh:
             print("Инициировано обновление кеша адресов...")
-            cache.delete(cache_key)
-
-        # Попытка загрузки из кеша
-        if not refresh and cache_key in cache:
-            print("Загрузка адресов из кеша...")
-            return cache[cache_key]
 
         # Получение учетных данных
-        login, password = get_session_credentials()
-        if not login or not password:
+        login, token = get_session_credentials()
+        if not login or not token:
             print("Ошибка аутентификации: отсутствуют учетные данные")
             return []
 
-        # Запрос данных через API
-        api_client = create_master_api_client(login, password)
-        raw_addresses = api_client.get_all_addresses()  # Предполагаем существование метода
-
-        # Преобразование данных
-        processed_addresses = []
-        for addr in raw_addresses:
-            address_entry = (
-                addr.get('address_id', 0),
-                addr.get('customer_id', 0),
-                addr.get('customer_full_name', ''),
-                addr.get('hamlet_id', 0),
-                addr.get('hamlet_name', ''),
-                addr.get('street_id', 0),
-                addr.get('street_name', ''),
-                addr.get('city', ''),
-                addr.get('district', ''),
-                addr.get('address_type', ''),
-                addr.get('house_number', ''),
-                addr.get('apartment', ''),
-                addr.get('entrance', ''),
-                addr.get('area', 0),
-                addr.get('standarts', 0),
-                addr.get('registered_residing', '')
-            )
-            processed_addresses.append(address_entry)
-
-        # Кеширование на 1 час
-        cache.set(cache_key, processed_addresses, expire=3600)
-        return processed_addresses
+        # Запрос данных через API, срок кеширования - по политике набора
+        api_client = create_master_api_client(login, token)
+        return _fetch_list_conditional(
+            api_client, cache_key, "addresses", ADDRESSES
+        )
 
     except Exception as e:
         print(f"Критическая ошибка в select_address_data_all: {str(e)}")
         # Можно добавить отправку ошибки в систему мониторинга
-        return []
+        return _cached_snapshot(cache_key, [])
 
 
+@layer.loader('address_details', key="address_details_{address_id}")
+@single_flight
 def get_address_details(address_id, refresh: bool = False):
     """Получить детали конкретной задачи"""
     try:
@@ -179,40 +609,34 @@ def get_address_details(address_id, refresh: bool = False):
 
         if refresh:
             print("Обновление данных...")
-            cache.delete(cache_key)
-
-        # Проверяем кеш, если не требуется обновление
-        if not refresh and cache_key in cache:
-            print("Загружаем данные из кеша...")
-            return cache[cache_key]
 
-        login, password = get_session_credentials()
+        login, token = get_session_credentials()
 
-        if not login or not password:
+        if not login or not token:
             print("Ошибка: не удалось получить учетные данные сессии")
             return None
 
-        api_client = create_master_api_client(login, password)
+        api_client = create_master_api_client(login, token)
 
         address = api_client.get_address_details(address_id)
 
         if not address:
             print(f"Задача с ID {address_id} не найдена")
+            cache.delete(cache_key)
             return None
 
-        converted_task = {
-            'address_info': address.get('address_info', []),
-            'meters': address.get('meters', []),
-            'tasks': address.get('tasks', []),
-        }
+        converted_task = _convert_address_details(address)
 
-        cache.set(cache_key, converted_task, expire=3600)
+        cache.set(cache_key, converted_task, expire=cache_layer.expire('address_details'),
+                  tags=_cache_tags('address_details', converted_task, address_id))
         return converted_task
     except Exception as e:
         print(f"Ошибка при получении деталей задачи {address_id}: {e}")
-        return None
+        return _cached_snapshot(cache_key, None)
 
 
+@layer.loader('unmade_tasks', key="unmade_tasks")
+@single_flight
 def select_task_data_unmade(refresh: bool = False):
     """Получить неназначенные задачи"""
     try:
@@ -220,60 +644,31 @@ def select_task_data_unmade(refresh: bool = False):
 
         if refresh:
             print("Обновление данных...")
-            cache.delete(cache_key)
-
-        # Проверяем кеш, если не требуется обновление
-        if not refresh and cache_key in cache:
-            print("Загружаем данные из кеша...")
-            return cache[cache_key]
 
-        login, password = get_session_credentials()
+        login, token = get_session_credentials()
 
-        if not login or not password:
+        if not login or not token:
             print("Ошибка: не удалось получить учетные данные сессии")
             return []
 
-        api_client = create_master_api_client(login, password)
+        api_client = create_master_api_client(login, token)
         tasks = api_client.get_unassigned_tasks()
 
         print(tasks)
 
         # Преобразование словарей в кортежи
-        converted_tasks = []
-        for task in tasks:
-            converted_task = (
-                task.get('task_id', 0),  # ID задачи
-                task.get('customer_name', ''),  # ФИО клиента
-                task.get('address_id', ''),  # Адрес клиента
-                task.get('city', ''),  # Город
-                task.get('district', ''),  # Район
-                task.get('street', ''),  # Улица
-                task.get('hamlet', ''),
-                task.get('dom', ''),  # Дом
-                task.get('apartment', ''),  # Квартира
-                task.get('entrance', ''),  # Подъезд
-                task.get('registered_residing', ''),  # Зарегистрированные жильцы
-                task.get('address_status', ''),  # Статус адреса
-                task.get('standarts', ''),  # Стандарты
-                task.get('area', ''),  # Площадь
-                task.get('phone_number') or '',  # Телефон
-                task.get('personal_account') or '',  # Лицевой счет
-                task.get('task_date', ''),  # Дата задачи
-                task.get('remark', ''),  # Примечание
-                task.get('task_status', ''),  # Статус задачи
-                task.get('purpose', ''),  # Цель
-                task.get('saldo', ''),  # Сальдо
-                task.get('date_end', ''),
-            )
-            converted_tasks.append(converted_task)
-
-        cache.set(cache_key, converted_tasks, expire=3600)
+        converted_tasks = [_convert_unmade_task(task) for task in tasks]
+
+        cache.set(cache_key, converted_tasks, expire=cache_layer.expire('unmade_tasks'),
+                  tags=_cache_tags('unmade_tasks'))
         return converted_tasks
     except Exception as e:
         print(f"Ошибка при получении всех задач: {e}")
-        return []
+        return _cached_snapshot(cache_key, [])
 
 
+@layer.loader('task_details', key="task_details_{task_id}")
+@single_flight
 def get_task_details(task_id, refresh: bool = False):
     """Получить детали конкретной задачи"""
     try:
@@ -281,41 +676,158 @@ def get_task_details(task_id, refresh: bool = False):
 
         if refresh:
             print("Обновление данных...")
-            cache.delete(cache_key)
-
-        # Проверяем кеш, если не требуется обновление
-        if not refresh and cache_key in cache:
-            print("Загружаем данные из кеша...")
-            return cache[cache_key]
 
-        login, password = get_session_credentials()
+        login, token = get_session_credentials()
 
-        if not login or not password:
+        if not login or not token:
             print("Ошибка: не удалось получить учетные данные сессии")
             return None
 
-        api_client = create_master_api_client(login, password)
+        api_client = create_master_api_client(login, token)
 
         tasks = api_client.get_task_details(task_id)
 
         if not tasks:
             print(f"Задача с ID {task_id} не найдена")
+            cache.delete(cache_key)
             return None
 
-        converted_task = {
-            'task': tasks.get('task', []),
-            'acts': tasks.get('acts', []),
-            'meters': tasks.get('meters', []),
-            'photos': tasks.get('photos', []),
-        }
+        converted_task = _convert_task_details(tasks)
 
-        cache.set(cache_key, converted_task, expire=3600)
+        cache.set(cache_key, converted_task, expire=cache_layer.expire('task_details'),
+                  tags=_cache_tags('task_details', converted_task, task_id))
         return converted_task
     except Exception as e:
         print(f"Ошибка при получении деталей задачи {task_id}: {e}")
-        return None
+        return _cached_snapshot(cache_key, None)
+
+
+def get_task_details_many(task_ids, refresh: bool = False) -> Iterator[Tuple[int, Optional[Dict[str, Any]]]]:
+    """Получить детали нескольких задач.
+
+    Закешированные детали отдаются сразу, остальные запрашиваются параллельно
+    и отдаются по мере готовности парами (task_id, детали).
+    """
+    missing = []
+    for task_id in task_ids:
+        cached = None if refresh else _fresh_snapshot(f"task_details_{task_id}", 'task_details')
+        if cached is not None:
+            yield task_id, cached
+        else:
+            missing.append(task_id)
+
+    if not missing:
+        return
+
+    login, token = get_session_credentials()
+    if not login or not token:
+        print("Ошибка: не удалось получить учетные данные сессии")
+        return
+
+    api_client = create_master_api_client(login, token)
+    for task_id, details in api_client.get_task_details_many(missing,
+                                                             concurrency=APP_CONFIG['api_details_concurrency']):
+        cache_key = f"task_details_{task_id}"
+        if not details:
+            yield task_id, _cached_snapshot(cache_key, None)
+            continue
+
+        converted_task = _convert_task_details(details)
+        cache.set(cache_key, converted_task, expire=cache_layer.expire('task_details'),
+                  tags=_cache_tags('task_details', converted_task, task_id))
+        yield task_id, converted_task
+
+
+@single_flight
+def get_task_details_batch(task_ids, refresh: bool = False) -> Dict[int, Optional[Dict[str, Any]]]:
+    """Получить детали нескольких задач одним запросом (пакетами по api_details_batch_size).
+
+    Детали сразу раскладываются по отдельным ключам task_details_{id}, так что get_task_details
+    потом берет их из кеша. Если сервер не поддерживает пакетный запрос (404),
+    детали загружаются параллельными запросами по одной задаче.
+    """
+    result = {}
+    missing = []
+    for task_id in task_ids:
+        cached = None if refresh else _fresh_snapshot(f"task_details_{task_id}", 'task_details')
+        if cached is not None:
+            result[task_id] = cached
+        else:
+            missing.append(task_id)
+
+    if not missing:
+        return result
+
+    try:
+        login, token = get_session_credentials()
+        if not login or not token:
+            print("Ошибка: не удалось получить учетные данные сессии")
+            return result
+
+        api_client = create_master_api_client(login, token)
+        batch_size = APP_CONFIG['api_details_batch_size']
+        for start in range(0, len(missing), batch_size):
+            batch = missing[start:start + batch_size]
+            details_by_id = api_client.get_task_details_batch(batch)
+
+            # Все записи пакета сохраняются в одной транзакции кеша
+            with cache.transact():
+                for task_id in batch:
+                    details = details_by_id.get(int(task_id))
+                    if not details:
+                        print(f"Задача с ID {task_id} не найдена")
+                        result[task_id] = None
+                        continue
+                    converted_task = _convert_task_details(details)
+                    cache.set(f"task_details_{task_id}", converted_task, expire=cache_layer.expire('task_details'),
+                              tags=_cache_tags('task_details', converted_task, task_id))
+                    result[task_id] = converted_task
+    except requests.exceptions.HTTPError as e:
+        if e.response is None or e.response.status_code != 404:
+            print(f"Ошибка при пакетной загрузке деталей задач: {e}")
+        else:
+            print("Пакетная загрузка деталей недоступна, загружаем по одной задаче...")
+            remaining = [task_id for task_id in missing if task_id not in result]
+            result.update(get_task_details_many(remaining, refresh=True))
+    except Exception as e:
+        print(f"Ошибка при пакетной загрузке деталей задач: {e}")
+
+    for task_id in missing:
+        if task_id not in result:
+            result[task_id] = _cached_snapshot(f"task_details_{task_id}", None)
+    return result
+
+
+# Фоновая подгрузка деталей для строк, видимых в таблице (см. FilterableDataTable, параметр prefetch).
+# Загружается то, чего нет в кеше или что устарело; перед каждым запросом проверяется отмена (смена страницы).
 
+def prefetch_task_details(task_ids, cancelled: threading.Event) -> None:
+    """Прогреть кеш task_details_{id} для видимой страницы (один пакетный запрос)"""
+    missing = [task_id for task_id in task_ids if not layer.is_fresh(f"task_details_{task_id}", 'task_details')]
+    if missing and not cancelled.is_set():
+        get_task_details_batch(missing)
 
+
+def prefetch_address_details(address_ids, cancelled: threading.Event) -> None:
+    """Прогреть кеш address_details_{id} для видимой страницы"""
+    for address_id in address_ids:
+        if cancelled.is_set():
+            return
+        if not layer.is_fresh(f"address_details_{address_id}", 'address_details'):
+            get_address_details(address_id)
+
+
+def prefetch_employee_details(employee_ids, cancelled: threading.Event) -> None:
+    """Прогреть кеш employee_details_{id} для видимой страницы"""
+    for employee_id in employee_ids:
+        if cancelled.is_set():
+            return
+        if not layer.is_fresh(f"employee_details_{employee_id}", 'employee_details'):
+            get_employee_details(employee_id)
+
+
+@layer.loader('employees', key="all_employees")
+@single_flight
 def get_all_employees(refresh: bool = False):
     """Получить список всех сотрудников"""
     try:
@@ -323,46 +835,26 @@ def get_all_employees(refresh: bool = False):
 
         if refresh:
             print("Обновление данных...")
-            cache.delete(cache_key)
-
-        # Проверяем кеш, если не требуется обновление
-        if not refresh and cache_key in cache:
-            print("Загружаем данные из кеша...")
-            return cache[cache_key]
 
-        login, password = get_session_credentials()
+        login, token = get_session_credentials()
 
-        if not login or not password:
+        if not login or not token:
             print("Ошибка: не удалось получить учетные данные сессии")
             return []
 
-        api_client = create_master_api_client(login, password)
-        employees = api_client.get_all_employees()
+        api_client = create_master_api_client(login, token)
 
         # Преобразование словарей в кортежи
-        converted_employees = []
-        for employee in employees:
-            converted_employee = (
-                employee.get('emp_id', 0),  # ID сотрудника
-                employee.get('full_name', ''),  # ФИО
-                employee.get('post_name', ''),  # Должность
-                employee.get('phone_number', ''),  # Номер телефона
-                employee.get('email', ''),  # Электронная почта
-                employee.get('health_status', ''),  # Статус здоровья
-                employee.get('total_tasks_today', ''),  # Количество задач сегодня
-                employee.get('total_tasks_executed_today', ''),  # Количество выполненных задач сегодня               
-                employee.get('total_tasks_unmade_today', ''),  # Отчество                 
-                employee.get('total_tasks_all_unmade', ''),
-            )
-            converted_employees.append(converted_employee)
-
-        cache.set(cache_key, converted_employees, expire=3600)
-        return converted_employees
+        return _fetch_list_conditional(
+            api_client, cache_key, "employees", EMPLOYEES
+        )
     except Exception as e:
         print(f"Ошибка при получении списка сотрудников: {e}")
-        return []
+        return _cached_snapshot(cache_key, [])
 
 
+@layer.loader('employee_details', key="employee_details_{employee_id}")
+@single_flight
 def get_employee_details(employee_id: int, refresh: bool = False):
     """Получить детальную информацию о сотруднике"""
     try:
@@ -370,39 +862,34 @@ def get_employee_details(employee_id: int, refresh: bool = False):
 
         if refresh:
             print("Обновление данных...")
-            cache.delete(cache_key)
 
-        # Проверяем кеш, если не требуется обновление
-        if not refresh and cache_key in cache:
-            print("Загружаем данные из кеша...")
-            return cache[cache_key]
+        login, token = get_session_credentials()
 
-        login, password = get_session_credentials()
-
-        if not login or not password:
+        if not login or not token:
             print("Ошибка: не удалось получить учетные данные сессии")
             return None
 
-        api_client = create_master_api_client(login, password)
+        api_client = create_master_api_client(login, token)
         employee = api_client.get_employee_details(employee_id)
 
         if not employee:
             print(f"Сотрудник с ID {employee_id} не найден")
+            cache.delete(cache_key)
             return None
 
         # Преобразование деталей сотрудника в кортеж или словарь
-        converted_employee = {
-            'employee': employee.get('employee', []),
-            'tasks': employee.get('tasks', [])
-        }
+        converted_employee = _convert_employee_details(employee)
 
-        cache.set(cache_key, converted_employee, expire=3600)
+        cache.set(cache_key, converted_employee, expire=cache_layer.expire('employee_details'),
+                  tags=_cache_tags('employee_details', converted_employee, employee_id))
         return converted_employee
     except Exception as e:
         print(f"Ошибка при получении деталей сотрудника {employee_id}: {e}")
-        return None
+        return _cached_snapshot(cache_key, None)
 
 
+@layer.loader('acts', key="all_acts")
+@single_flight
 def select_acts_with_tasks_and_addresses(refresh: bool = False) -> List[Tuple]:
     """Получить акты с задачами и адресами"""
     try:
@@ -410,52 +897,24 @@ def select_acts_with_tasks_and_addresses(refresh: bool = False) -> List[Tuple]:
 
         if refresh:
             print("Обновление данных актов...")
-            cache.delete(cache_key)
 
-        if not refresh and cache_key in cache:
-            print("Загружаем акты из кеша...")
-            return cache[cache_key]
-
-        login, password = get_session_credentials()
-        if not login or not password:
+        login, token = get_session_credentials()
+        if not login or not token:
             print("Ошибка аутентификации")
             return []
 
-        api_client = create_master_api_client(login, password)
-        acts_data = api_client.get_acts_with_tasks_and_addresses()
-
-        converted_acts = []
-        for act in acts_data:
-            converted_act = (
-                act.get('act_id', 0),
-                act.get('act_date', ''),
-                act.get('act_reason', ''),
-                act.get('task_id', 0),
-                act.get('task_date', ''),
-                act.get('task_date_end', ''),
-                act.get('task_status', ''),
-                act.get('task_fio_requestor', ''),
-                act.get('task_fio_employer', ''),
-                act.get('task_remark', ''),
-                act.get('address_city', ''),
-                act.get('address_district', ''),
-                act.get('address_type', ''),
-                act.get('address_dom', ''),
-                act.get('address_apartment', ''),
-                act.get('address_entrance', ''),
-                act.get('street_name', ''),
-                act.get('hamlet_name', '')
-            )
-            converted_acts.append(converted_act)
-
-        cache.set(cache_key, converted_acts, expire=3600)
-        return converted_acts
+        api_client = create_master_api_client(login, token)
+        return _fetch_list_conditional(
+            api_client, cache_key, "acts", ACTS
+        )
 
     except Exception as e:
         print(f"Ошибка при получении актов: {e}")
-        return []
+        return _cached_snapshot(cache_key, [])
 
 
+@layer.loader('dashboard_stats', key="dashboard_stats_{start_date}_{end_date}_{employee_id}")
+@single_flight
 def get_dashboard_stats_data(
         start_date: Optional[date] = None,
         end_date: Optional[date] = None,
@@ -468,18 +927,13 @@ def get_dashboard_stats_data(
 
         if refresh:
             print("Обновление статистики дашборда...")
-            cache.delete(cache_key)
 
-        if not refresh and cache_key in cache:
-            print("Загружаем статистику из кеша...")
-            return cache[cache_key]
-
-        login, password = get_session_credentials()
-        if not login or not password:
+        login, token = get_session_credentials()
+        if not login or not token:
             print("Ошибка аутентификации")
             return {}
 
-        api_client = create_master_api_client(login, password)
+        api_client = create_master_api_client(login, token)
         stats = api_client.get_dashboard_stats(
             start_date=start_date,
             end_date=end_date,
@@ -487,81 +941,659 @@ def get_dashboard_stats_data(
         )
 
         # Преобразование данных при необходимости
-        processed_stats = {
-            'tasks_by_status': [
-                {
-                    "status": s['status'],
-                    "count": s['count']
-                } for s in stats.get('tasks_by_status', [])
-                if s['count'] > 0
-            ],
-            'tasks_by_month': [
-                {"month": m['month'], "count": m['count']}
-                for m in stats.get('tasks_by_month', [])
-            ],
-            'employee_stats': [
-                {
-                    "employee_id": e['employee_id'],
-                    "employee_name": e['employee_name'],
-                    "completed_tasks": e['completed_tasks'],
-                    "avg_completion_time": e['avg_completion_time']
-                }
-                for e in stats.get('employee_stats', [])
-            ],
-            'general_stats': stats.get('general_stats', {})
-        }
-
-        cache.set(cache_key, processed_stats, expire=600)  # Короткий срок кеширования
+        processed_stats = _convert_dashboard_stats(stats)
+
+        cache.set(cache_key, processed_stats, expire=cache_layer.expire('dashboard_stats'),
+                  tags=_cache_tags('dashboard_stats'))
         return processed_stats
 
     except Exception as e:
         print(f"Ошибка при получении статистики: {e}")
-        return {}
+        return _cached_snapshot(cache_key, {})
 
 
-def select_notifications(refresh: bool = False) -> List[Tuple]:
-    """Получить уведомления пользователя"""
-    try:
-        cache_key = "user_notifications"
+NOTIFICATIONS_KEY = "user_notifications"
 
-        if refresh:
-            print("Обновление уведомлений...")
-            cache.delete(cache_key)
+# Журнал уведомлений дополняют и поток опроса, и push-канал
+_notifications_lock = threading.Lock()
 
-        if not refresh and cache_key in cache:
-            print("Загружаем уведомления из кеша...")
-            return cache[cache_key]
 
-        login, password = get_session_credentials()
-        if not login or not password:
-            print("Ошибка аутентификации")
-            return []
+def _store_notifications(notifications: List[Dict[str, Any]], replace: bool = False) -> List[Tuple]:
+    """Добавить уведомления в кешированный журнал (упорядочен по id), вернуть только новые.
 
-        api_client = create_master_api_client(login, password)
-        notifications = api_client.get_notifications()
+    Уже известные уведомления обновляются на месте. Журнал целиком перечитывается с сервера
+    раз в notifications_resync секунд (replace=True), чтобы подтянуть изменения, сделанные в других сеансах.
+    """
+    converted = [_convert_notification(notification) for notification in notifications]
+    with _notifications_lock:
+        log, expire_time = cache.get(NOTIFICATIONS_KEY, expire_time=True)
+        if log is None and not replace:
+            # Журнала нет (еще не загружен или пора перечитать) - не создаем его из обрывка
+            return converted
+        log = [] if replace or log is None else list(log)
 
-        converted_notifications = []
-        for notification in notifications:
-            # Исправление: проверяем тип created_at
-            created_at = notification.get('created_at', datetime.now())
-            if isinstance(created_at, datetime):
-                created_at_str = created_at.isoformat()
+        positions = {row[0]: index for index, row in enumerate(log)}
+        tail = len(log)
+        new_rows = []
+        for row in converted:
+            if row[0] in positions:
+                log[positions[row[0]]] = row
             else:
-                # Если это строка, оставляем как есть
-                created_at_str = created_at
+                positions[row[0]] = len(log)
+                log.append(row)
+                new_rows.append(row)
+        # Обычно новые уведомления идут по возрастанию id, и сортировать журнал не нужно
+        if any(log[index - 1][0] > log[index][0] for index in range(max(tail, 1), len(log))):
+            log.sort(key=lambda row: row[0])
 
-            converted_notification = (
-                notification.get('id', 0),
-                notification.get('task_id', 0),
-                notification.get('notification_type', ''),
-                created_at_str,  # Исправленное поле
-                notification.get('is_showed', False)
-            )
-            converted_notifications.append(converted_notification)
+        if replace or not expire_time:
+            expire = APP_CONFIG['notifications_resync']
+        else:
+            expire = max(1, expire_time - time.time())
+        cache.set(NOTIFICATIONS_KEY, log, expire=expire)
+    return new_rows
 
-        cache.set(cache_key, converted_notifications, expire=300)
-        return converted_notifications
+
+def append_notifications(notifications: List[Dict[str, Any]]) -> List[Tuple]:
+    """Добавить в журнал уведомления, полученные без запроса (из push-канала); вернуть новые"""
+    return _store_notifications(notifications)
+
+
+@single_flight
+def fetch_new_notifications() -> List[Tuple]:
+    """Догрузить уведомления, появившиеся после последнего в журнале; вернуть только новые"""
+    try:
+        login, token = get_session_credentials()
+        if not login or not token:
+            print("Ошибка аутентификации")
+            return []
+
+        api_client = create_master_api_client(login, token)
+        log = cache.get(NOTIFICATIONS_KEY)
+        if log is None:
+            return _store_notifications(api_client.get_notifications(), replace=True)
+
+        since_id = log[-1][0] if log else None
+        return _store_notifications(api_client.get_notifications(since_id=since_id))
 
     except Exception as e:
         print(f"Ошибка при получении уведомлений: {e}")
         return []
+
+
+@single_flight
+def select_notifications(refresh: bool = False) -> List[Tuple]:
+    """Получить журнал уведомлений пользователя (refresh догружает только новые)"""
+    if refresh:
+        print("Обновление уведомлений...")
+    else:
+        cached = _cache_lookup(NOTIFICATIONS_KEY)
+        if cached is not None:
+            print("Загружаем уведомления из кеша...")
+            return cached
+
+    fetch_new_notifications()
+    return cache.get(NOTIFICATIONS_KEY, [])
+
+
+def patch_cached_notifications(notifications: List[Dict[str, Any]]) -> None:
+    """Обновить уведомления в журнале по ответу сервера (например, после пометки прочитанными)"""
+    _store_notifications(notifications)
+
+
+# Правка кеша на месте: изменение, ожидающее отправки в очереди (см. outbox), сразу отражается
+# в кешированных списках, чтобы таблицы показывали его без сервера; подтвержденное сервером
+# изменение так же применяется к снимкам (write_through), чтобы не скачивать их заново.
+
+# Поля запроса tasks/changes_tasks -> поля кортежа задачи
+_TASK_PAYLOAD_FIELDS = {
+    'fio_customer': 'customer_name',
+    'fio_requestor': 'customer_name',
+    'date': 'task_date',
+    'status': 'task_status',
+    'city': 'city',
+    'district': 'district',
+    'street': 'street',
+    'hamlet': 'hamlet',
+    'dom': 'dom',
+    'apartment': 'apartment',
+    'phone_number': 'phone_number',
+    'personal_account': 'personal_account',
+    'remark': 'remark',
+    'purpose': 'purpose',
+    'date_end': 'date_end',
+}
+
+
+def task_changes_from_payload(task_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Изменения полей кортежа задачи по данным формы редактирования"""
+    return {field: task_data[key] for key, field in _TASK_PAYLOAD_FIELDS.items() if key in task_data}
+
+
+def _task_list_keys() -> List[str]:
+    """Ключи всех кешированных списков задач: полный список, проекции и выборки по фильтрам"""
+    return [
+        key for key in cache.iterkeys()
+        if isinstance(key, str)
+        and (key == "all_tasks" or key.startswith("all_tasks_fields_") or key.startswith("tasks_filtered_"))
+        and not key.endswith(("_validators", "_watermark", "_version"))
+    ]
+
+
+def _rewrite_cached(cache_key: str, rewrite) -> bool:
+    """Переписать кешированный список, сохранив срок жизни и тег записи"""
+    value, expire_time, tag = cache.get(cache_key, expire_time=True, tag=True)
+    if value is None:
+        return False
+    expire = max(1, expire_time - time.time()) if expire_time else None
+    cache.set(cache_key, rewrite(value), expire=expire, tag=tag)
+    return True
+
+
+def _list_fields(cache_key: str) -> Optional[set]:
+    """Поля строк кешированного списка задач; None - все поля"""
+    fields = cache_key.partition("_fields_")[2]
+    return set(fields.split(',')) if fields else None
+
+
+def _patch_row(row, positions: Dict[int, Any]):
+    """Строка с замененными значениями; тип строки (TaskRecord или кортеж) сохраняется"""
+    values = [positions.get(index, value) for index, value in enumerate(row)]
+    return row._make(values) if hasattr(row, '_make') else tuple(values)
+
+
+def patch_cached_tasks(task_ids, changes: Optional[Dict[str, Any]] = None, remove: bool = False,
+                       added: List[Tuple] = ()) -> None:
+    """Поправить задачи во всех кешированных списках: изменить поля (changes), удалить строки (remove)
+    или дописать новые задачи (added - строки TaskRecord).
+
+    Версия каждого списка растет, подписчики наборов tasks и unmade_tasks (subscribe_rows)
+    получают только затронутые строки.
+    """
+    ids = set(task_ids)
+    changes = changes or {}
+    positions = {TASK_FIELDS.index(field): value for field, value in changes.items() if field in TASK_FIELDS}
+    complete_rows = {}  # строки со всеми полями строки неназначенной задачи - из них она собирается
+
+    for cache_key in _task_list_keys():
+        patched_rows = []
+
+        def rewrite(rows):
+            patched = []
+            for row in rows:
+                if row[0] not in ids:
+                    patched.append(row)
+                elif not remove:
+                    patched.append(_patch_row(row, positions))
+                    patched_rows.append(patched[-1])
+            if cache_key.startswith("all_tasks"):
+                patched.extend(added)
+            return patched
+
+        # В отфильтрованную выборку новую задачу не добавить: неизвестно, проходит ли она фильтр
+        if added and cache_key.startswith("tasks_filtered_"):
+            cache.delete(cache_key)
+            continue
+        if not _rewrite_cached(cache_key, rewrite):
+            continue
+        if cache_key.startswith("all_tasks"):
+            cache.incr(f"{cache_key}_version")
+        fields = _list_fields(cache_key)
+        if fields is None or set(UNMADE_TASK_FIELDS) <= fields:
+            complete_rows.update((row[0], row) for row in patched_rows)
+        layer.publish_rows('tasks', cache_key, patched_rows + list(added), sorted(ids) if remove else [])
+
+    _patch_unmade_tasks(ids, changes, remove, complete_rows, added)
+
+
+def _patch_unmade_tasks(ids, changes: Dict[str, Any], remove: bool, complete_rows: Dict[Any, Tuple],
+                        added: List[Tuple]) -> None:
+    """Неназначенные задачи: назначенные и удаленные уходят из списка, снятые с исполнителя
+    и новые без исполнителя добавляются, остальные правятся на месте"""
+    employer = changes.get('employer_name')
+    positions = {UNMADE_TASK_FIELDS.index(field): value for field, value in changes.items()
+                 if field in UNMADE_TASK_FIELDS}
+    dropped = ids if remove or employer else set()
+    returned = [] if remove or employer != '' else [complete_rows.get(task_id) for task_id in ids]
+    if None in returned:
+        # Снятой задачи нет в кешированных списках целиком - строку не собрать, список перечитается
+        layer.mark_stale('unmade_tasks')
+        returned = []
+    returned += [row for row in added if not row.employer_name]
+    returned = [_convert_unmade_task(dict(zip(TASK_FIELDS, row))) for row in returned]
+    patched_rows = []
+
+    def rewrite(rows):
+        present = {row[0] for row in rows}
+        patched = []
+        for row in rows:
+            if row[0] in dropped:
+                continue
+            if row[0] in ids and positions:
+                row = _patch_row(row, positions)
+                patched_rows.append(row)
+            patched.append(row)
+        new_rows = [row for row in returned if row[0] not in present]
+        patched_rows.extend(new_rows)
+        return patched + new_rows
+
+    if _rewrite_cached("unmade_tasks", rewrite):
+        layer.publish_rows('unmade_tasks', "unmade_tasks", patched_rows, sorted(dropped))
+
+
+def employee_changes_from_payload(employee_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Изменения полей строки сотрудника (full_name, phone_number, email) по данным формы"""
+    full_name = " ".join(filter(None, (employee_data.get('last_name'), employee_data.get('first_name'),
+                                       employee_data.get('patronimyc'))))
+    return {
+        'full_name': full_name or None,
+        'phone_number': employee_data.get('phone_number'),
+        'email': employee_data.get('email'),
+    }
+
+
+def patch_cached_employee(employee_id, changes: Dict[str, Any]) -> None:
+    """Поправить сотрудника в кешированном списке (поля full_name, phone_number, email)"""
+    positions = {1: changes.get('full_name'), 3: changes.get('phone_number'), 4: changes.get('email')}
+    positions = {index: value for index, value in positions.items() if value is not None}
+    patched_rows = []
+
+    def rewrite(rows):
+        patched = []
+        for row in rows:
+            if row[0] == employee_id:
+                row = _patch_row(row, positions)
+                patched_rows.append(row)
+            patched.append(row)
+        return patched
+
+    if _rewrite_cached("all_employees", rewrite):
+        layer.publish_rows('employees', "all_employees", patched_rows)
+
+
+# Поле строки задачи -> имена этого поля у задачи в деталях (задача, детали адреса и сотрудника)
+_TASK_DETAIL_FIELDS = {
+    'customer_name': ('customer_name', 'fio_customer'),
+    'task_date': ('task_date', 'start_date'),
+    'date_end': ('date_end', 'end_date'),
+    'task_status': ('task_status', 'status'),
+    'remark': ('remark', 'remarks'),
+    'employer_name': ('employer_name', 'employer'),
+}
+
+
+def _patch_detail_task(task: Any, changes: Dict[str, Any]) -> Any:
+    """Задача из деталей с примененными изменениями; меняются только поля, которые в ней уже есть"""
+    if not isinstance(task, dict):
+        return task
+    patched = dict(task)
+    for field, value in changes.items():
+        for name in _TASK_DETAIL_FIELDS.get(field, (field,)):
+            if name in patched:
+                patched[name] = value
+    return patched
+
+
+_UNCHANGED = object()
+
+
+def patch_cached_details(task_ids, changes: Optional[Dict[str, Any]] = None, remove: bool = False,
+                         assignee: Any = _UNCHANGED) -> None:
+    """Поправить задачи в кешированных деталях задач, адресов и сотрудников (записи ищутся по тегам task:{id}).
+
+    assignee - новый исполнитель (ID сотрудника, None - снятие с исполнителя): из деталей
+    прежних исполнителей задачи убираются. Удаленные задачи убираются из всех деталей.
+    """
+    ids = {str(task_id) for task_id in task_ids}
+    changes = changes or {}
+
+    def is_changed(task):
+        return str(_entity_id(task, 'task_id', 'id')) in ids
+
+    def patch_list(tasks, drop):
+        return [_patch_detail_task(task, changes) if is_changed(task) else task
+                for task in tasks if not (drop and is_changed(task))]
+
+    for cache_key in cache.tagged(*(cache_layer.entity_tag('task', task_id) for task_id in task_ids)):
+        if not isinstance(cache_key, str):
+            continue
+        if cache_key.startswith("task_details_"):
+            if remove:
+                cache.delete(cache_key)
+                continue
+            _rewrite_cached(cache_key, lambda details: {**details, 'task': (
+                patch_list(details['task'], False) if isinstance(details.get('task'), list)
+                else _patch_detail_task(details.get('task'), changes))})
+        else:
+            drop = remove or (assignee is not _UNCHANGED and cache_key.startswith("employee_details_")
+                              and cache_key != f"employee_details_{assignee}")
+            _rewrite_cached(cache_key, lambda details, drop=drop: {
+                **details, 'tasks': patch_list(details.get('tasks', []), drop)})
+
+
+# Списки, в строках которых видны задачи (в сотрудниках - счетчики задач): после изменения задач
+# снимки остаются и помечаются устаревшими
+_TASK_LISTS = ('tasks', 'unmade_tasks', 'employees', 'acts')
+# Сводки по задачам за период небольшие и зависят от параметров запроса - удаляются
+_TASK_AGGREGATES = ('dashboard_stats', 'completed_tasks')
+
+
+def _change_tags(kind: str, payload: Dict[str, Any]) -> Tuple[List[str], Tuple[str, ...]]:
+    """Что сбросить после изменения: (теги удаляемых записей, наборы, помечаемые устаревшими)"""
+    task_tag = functools.partial(cache_layer.entity_tag, 'task')
+    employee_tag = functools.partial(cache_layer.entity_tag, 'employee')
+    aggregates = [cache_layer.dataset_tag(dataset) for dataset in _TASK_AGGREGATES]
+
+    if kind == 'upsert_task':
+        task_data = payload['task_data']
+        if task_data.get('id'):
+            return [task_tag(task_data['id'])] + aggregates, _TASK_LISTS
+        # Новая задача появится в деталях адреса, но какого - по данным формы не определить
+        return [cache_layer.dataset_tag('address_details')] + aggregates, _TASK_LISTS
+    if kind == 'insert_tasks_bulk':
+        return [cache_layer.dataset_tag('address_details')] + aggregates, _TASK_LISTS
+    if kind in ('set_employee_to_task', 'unassign_tasks', 'delete_tasks'):
+        # Детали прежних исполнителей и адресов содержат эти задачи и сбрасываются по тегу задачи
+        tags = [task_tag(task_id) for task_id in payload['task_ids']] + aggregates
+        if kind == 'set_employee_to_task':
+            tags.append(employee_tag(payload['emp_id']))
+        return tags, _TASK_LISTS
+    if kind == 'upsert_employee':
+        employee_id = payload['employee_data'].get('id')
+        return ([employee_tag(employee_id)] if employee_id else []), ('employees',)
+    if kind == 'delete_employees':
+        # Задачи удаленных сотрудников остаются без исполнителя
+        return [employee_tag(employee_id) for employee_id in payload['employee_ids']] + aggregates, _TASK_LISTS
+    raise ValueError(f"Неизвестный вид изменения: {kind}")
+
+
+def invalidate_for(kind: str, payload: Dict[str, Any]) -> None:
+    """Сбросить кеш после изменения на сервере (виды и данные - как в outbox.OPERATIONS).
+
+    Удаляются только записи, собранные из затронутых объектов (детали задач, адресов, сотрудников)
+    и сводки; большие списки не удаляются, а помечаются устаревшими, так что обновление страницы
+    (refresh=True, sync=True) скачивает только изменения.
+    """
+    tags, stale = _change_tags(kind, payload)
+    removed = cache.invalidate(*tags)
+    marked = layer.mark_stale(*stale)
+    print(f"Кеш после {kind}: удалено записей {removed}, помечено устаревшими {marked}")
+
+
+def write_through(kind: str, payload: Dict[str, Any], response: Any = None) -> None:
+    """Применить подтвержденное сервером изменение к кешированным снимкам на месте.
+
+    Строки задач, неназначенных задач и сотрудников и задачи в деталях правятся по данным изменения
+    (и по ответу сервера, если он вернул задачу целиком), так что после правки одной задачи список
+    не скачивается и не преобразуется заново. Сводки удаляются; счетчики сотрудников и акты,
+    которые по изменению не пересчитать, помечаются устаревшими. Изменения, которые применить
+    на месте нельзя (массовая загрузка, удаление сотрудников), сбрасываются через invalidate_for.
+    """
+    tags = [cache_layer.dataset_tag(dataset) for dataset in _TASK_AGGREGATES]
+    stale = ('employees', 'acts')
+    task = response if isinstance(response, dict) and response.get('task_id') else None
+
+    if kind == 'upsert_task' and payload['task_data'].get('id'):
+        task_id = payload['task_data']['id']
+        changes = task_changes_from_payload(payload['task_data'])
+        if task is not None:
+            changes.update({field: task[field] for field in TASK_FIELDS[1:] if field in task})
+        patch_cached_tasks([task_id], changes)
+        patch_cached_details([task_id], changes)
+    elif kind == 'upsert_task' and task is not None:
+        patch_cached_tasks([], added=[TASKS.from_dict(task)])
+        tags.append(cache_layer.entity_tag('address', task['address_id']) if task.get('address_id')
+                    else cache_layer.dataset_tag('address_details'))
+    elif kind in ('set_employee_to_task', 'unassign_tasks'):
+        assignee = payload['emp_id'] if kind == 'set_employee_to_task' else None
+        changes = {'employer_name': payload['fio_name'] if assignee is not None else ''}
+        patch_cached_tasks(payload['task_ids'], changes)
+        patch_cached_details(payload['task_ids'], changes, assignee=assignee)
+        if assignee is not None:
+            # Строку задачи в деталях нового исполнителя не собрать - они перечитаются
+            tags.append(cache_layer.entity_tag('employee', assignee))
+    elif kind == 'delete_tasks':
+        patch_cached_tasks(payload['task_ids'], remove=True)
+        patch_cached_details(payload['task_ids'], remove=True)
+    elif kind == 'upsert_employee' and payload['employee_data'].get('id'):
+        employee_data = payload['employee_data']
+        patch_cached_employee(employee_data['id'], employee_changes_from_payload(employee_data))
+        _rewrite_cached(f"employee_details_{employee_data['id']}", lambda details: {
+            **details, 'employee': {**details['employee'], **{
+                field: value for field, value in employee_data.items() if field in details['employee']}}
+        } if isinstance(details.get('employee'), dict) else details)
+        tags, stale = [], ()
+    else:
+        invalidate_for(kind, payload)
+        return
+
+    removed = cache.invalidate(*tags) if tags else 0
+    marked = layer.mark_stale(*stale)
+    print(f"Кеш после {kind}: изменения применены на месте, удалено записей {removed}, "
+          f"помечено устаревшими {marked}")
+
+
+# Асинхронные варианты загрузчиков для async-обработчиков Flet.
+# Используют тот же кеш и те же преобразования, что и синхронные версии,
+# поэтому несколько наборов данных можно запрашивать параллельно через asyncio.gather.
+
+_background_async = set()  # фоновые обновления устаревших снимков (держим ссылки до завершения)
+
+
+def _revalidate_async(cache_key: str, fetch, convert, dataset: str, default, current, entity_id=None,
+                      store=None) -> None:
+    """Обновить устаревший снимок задачей текущего цикла событий и сообщить подписчикам набора"""
+    if (id(asyncio.get_running_loop()), cache.namespace, cache_key, True) in _inflight_async:
+        return
+
+    async def refresh():
+        new = await _load_async(cache_key, fetch, convert, dataset, True, default, entity_id=entity_id, store=store)
+        if not cache.detached():
+            layer.publish(dataset, cache_key, current, new)
+
+    print(f"Данные {cache_key} устарели, показываем сохраненные и обновляем в фоне...")
+    task = asyncio.get_running_loop().create_task(refresh())
+    _background_async.add(task)
+    task.add_done_callback(_background_async.discard)
+
+
+async def _load_async(cache_key: str, fetch, convert, dataset: Optional[str], refresh: bool, default,
+                      expire: Optional[int] = None, entity_id=None, store=None):
+    """Общая схема асинхронного загрузчика: кеш -> API -> преобразование -> кеш.
+
+    Срок жизни и свежесть снимка - по политике набора dataset (cache_layer); устаревший снимок
+    отдается сразу и обновляется в фоне. Без dataset запись живет expire секунд.
+    entity_id - идентификатор объекта для тегов деталей (task_details и т.п.).
+    store - сохранение результата вместо записи одного ключа (для снимков со служебными ключами).
+    Одновременные вызовы с тем же ключом кеша в одном цикле событий ждут первый вызов.
+    """
+    flight_key = (id(asyncio.get_running_loop()), cache.namespace, cache_key, refresh)
+    pending = _inflight_async.get(flight_key)
+    if pending is not None:
+        print(f"Запрос {cache_key} уже выполняется, ожидаем его результат...")
+        return await asyncio.shield(pending)
+
+    pending = asyncio.get_running_loop().create_future()
+    _inflight_async[flight_key] = pending
+    try:
+        result = await _load_async_uncoalesced(cache_key, fetch, convert, dataset, refresh, default, expire,
+                                               entity_id, store)
+        pending.set_result(result)
+        return result
+    except asyncio.CancelledError:
+        # Ошибки загрузчик обрабатывает сам, прерваться может только отменой
+        pending.cancel()
+        raise
+    finally:
+        _inflight_async.pop(flight_key, None)
+
+
+async def _load_async_uncoalesced(cache_key: str, fetch, convert, dataset: Optional[str], refresh: bool, default,
+                                  expire: Optional[int] = None, entity_id=None, store=None):
+    # Запись идет в пространство имен пользователя, начавшего загрузку (фоновое обновление,
+    # созданное отсюда, наследует его); если пользователь сменился, результат не сохраняется
+    with cache.bound():
+        try:
+            if not refresh and dataset is None:
+                cached = _cache_lookup(cache_key)
+                if cached is not None:
+                    return cached
+            if not refresh and dataset is not None:
+                cached, fresh = layer.lookup(cache_key, dataset)
+                if cached is not None:
+                    if not fresh:
+                        _revalidate_async(cache_key, fetch, convert, dataset, default, cached, entity_id, store)
+                    return cached
+
+            login, token = get_session_credentials()
+            if not login or not token:
+                print("Ошибка: не удалось получить учетные данные сессии")
+                return default
+
+            api_client = create_async_master_api_client(login, token)
+            raw_data = await fetch(api_client)
+            if raw_data is None:
+                return default
+
+            converted = convert(raw_data)
+            if store is not None:
+                return store(converted)
+            cache.set(cache_key, converted, expire=cache_layer.expire(dataset) if dataset else expire,
+                      tags=_cache_tags(dataset, converted, entity_id) if dataset else ())
+            return converted
+        except Exception as e:
+            print(f"Ошибка при асинхронной загрузке {cache_key}: {e}")
+            return _cached_snapshot(cache_key, default)
+
+
+async def _fetch_task_pages_async(api_client) -> Tuple[List[Tuple], Optional[str]]:
+    """Все задачи постранично (как _stream_task_data_all) и водяной знак первой страницы"""
+    meta = {}
+    converted_tasks = []
+    async for tasks_page in api_client.get_all_tasks_pages(page_size=APP_CONFIG['api_page_size'], meta=meta):
+        converted_tasks.extend(TASKS.convert(tasks_page))
+    return converted_tasks, meta.get('watermark')
+
+
+async def select_task_data_all_async(refresh: bool = False):
+    """Получить все задачи (асинхронно); снимок сохраняется так же, как в select_task_data_all"""
+    return await _load_async(
+        "all_tasks",
+        _fetch_task_pages_async,
+        lambda snapshot: snapshot,
+        'tasks', refresh, [],
+        store=lambda snapshot: _store_task_snapshot(*snapshot)
+    )
+
+
+async def get_completed_tasks_export_async(
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        refresh: bool = False
+):
+    """Получить экспортированные завершенные задачи (асинхронно)"""
+    return await _load_async(
+        f"completed_tasks_{start_date}_{end_date}",
+        lambda client: client.export_completed_tasks(start_date=start_date, end_date=end_date),
+        lambda data: data.get("tasks", []),
+        'completed_tasks', refresh, []
+    )
+
+
+async def select_address_data_all_async(refresh: bool = False):
+    """Получить все адреса (асинхронно)"""
+    return await _load_async(
+        "all_addresses",
+        lambda client: client.get_all_addresses(),
+        ADDRESSES.convert,
+        'addresses', refresh, []
+    )
+
+
+async def get_address_details_async(address_id, refresh: bool = False):
+    """Получить детали адреса (асинхронно)"""
+    return await _load_async(
+        f"address_details_{address_id}",
+        lambda client: client.get_address_details(address_id),
+        _convert_address_details,
+        'address_details', refresh, None, entity_id=address_id
+    )
+
+
+async def select_task_data_unmade_async(refresh: bool = False):
+    """Получить неназначенные задачи (асинхронно)"""
+    return await _load_async(
+        "unmade_tasks",
+        lambda client: client.get_unassigned_tasks(),
+        lambda data: [_convert_unmade_task(task) for task in data],
+        'unmade_tasks', refresh, []
+    )
+
+
+async def get_task_details_async(task_id, refresh: bool = False):
+    """Получить детали задачи (асинхронно)"""
+    return await _load_async(
+        f"task_details_{task_id}",
+        lambda client: client.get_task_details(task_id),
+        _convert_task_details,
+        'task_details', refresh, None, entity_id=task_id
+    )
+
+
+async def get_all_employees_async(refresh: bool = False):
+    """Получить список всех сотрудников (асинхронно)"""
+    return await _load_async(
+        "all_employees",
+        lambda client: client.get_all_employees(),
+        EMPLOYEES.convert,
+        'employees', refresh, []
+    )
+
+
+async def get_employee_details_async(employee_id: int, refresh: bool = False):
+    """Получить детальную информацию о сотруднике (асинхронно)"""
+    return await _load_async(
+        f"employee_details_{employee_id}",
+        lambda client: client.get_employee_details(employee_id),
+        _convert_employee_details,
+        'employee_details', refresh, None, entity_id=employee_id
+    )
+
+
+async def select_acts_with_tasks_and_addresses_async(refresh: bool = False) -> List[Tuple]:
+    """Получить акты с задачами и адресами (асинхронно)"""
+    return await _load_async(
+        "all_acts",
+        lambda client: client.get_acts_with_tasks_and_addresses(),
+        ACTS.convert,
+        'acts', refresh, []
+    )
+
+
+async def get_dashboard_stats_data_async(
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        employee_id: Optional[int] = None,
+        refresh: bool = False
+) -> Dict[str, Any]:
+    """Получить статистику для дашборда (асинхронно)"""
+    return await _load_async(
+        f"dashboard_stats_{start_date}_{end_date}_{employee_id}",
+        lambda client: client.get_dashboard_stats(
+            start_date=start_date,
+            end_date=end_date,
+            employee_id=employee_id
+        ),
+        _convert_dashboard_stats,
+        'dashboard_stats', refresh, {}
+    )
+
+
+async def select_notifications_async(refresh: bool = False) -> List[Tuple]:
+    """Получить уведомления пользователя (асинхронно)"""
+    return await _load_async(
+        NOTIFICATIONS_KEY,
+        lambda client: client.get_notifications(),
+        lambda data: sorted((_convert_notification(notification) for notification in data), key=lambda row: row[0]),
+        None, refresh, [], expire=APP_CONFIG['notifications_resync']
+    )
@@ -1,47 +1,300 @@
-from typing import Optional, List, Dict, Any
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Optional, List, Dict, Any, Callable, Tuple, Iterator, Iterable
 from datetime import date
 import requests
+from requests.adapters import HTTPAdapter
+
+from src.database.api.metrics import body_size, metrics
+from src.database.api.records import loads
+from src.database.api.resilience import (
+    CircuitBreaker, CircuitOpenError, RETRYABLE_STATUSES, endpoint_timeout, get_circuit_breaker, retry_delay
+)
 
 
 class WaterUtilityAPIClient:
-    def __init__(self, base_url: str, username: str, password: str):
+    # Большие списки, которые поддерживают условный GET
+    LIST_ENDPOINTS = {
+        "tasks": "tasks/all",
+        "addresses": "addresses/full",
+        "acts": "acts",
+        "employees": "employees",
+    }
+
+    def __init__(self, base_url: str, username: str, password: Optional[str] = None,
+                 token: Optional[str] = None,
+                 pool_connections: int = 4, pool_maxsize: int = 10,
+                 password_provider: Optional[Callable[[], Optional[str]]] = None,
+                 on_token_refresh: Optional[Callable[[str], None]] = None,
+                 timeouts: Optional[Dict[str, Tuple[float, float]]] = None,
+                 max_retries: int = 3,
+                 circuit_breaker: Optional[CircuitBreaker] = None):
         self.base_url = base_url
         self.username = username
         self.password = password
-        self.session = requests.Session()
+        self.token = token
+        # Пароль нужен только для повторного входа, когда токен истек (ответ 401)
+        self.password_provider = password_provider
+        self.on_token_refresh = on_token_refresh
+        self._token_lock = threading.Lock()
+        self.session = self._create_session(pool_connections, pool_maxsize)
+        # Таймауты по эндпоинтам ({"tasks/all": (5, 120), "default": (5, 30)}) и повторы только для GET
+        self.timeouts = timeouts or {}
+        self.max_retries = max_retries
+        self.circuit_breaker = circuit_breaker or get_circuit_breaker(base_url)
 
-    def _make_request(self, method: str, endpoint: str,
-                      data: Dict[str, Any] = None, params: Dict[str, Any] = None) -> Dict[str, Any]:
+    @staticmethod
+    def _create_session(pool_connections: int, pool_maxsize: int) -> requests.Session:
+        """Создать сессию с пулом keep-alive соединений"""
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        session.headers.update({"Connection": "keep-alive"})
+        return session
+
+    def close(self):
+        """Закрыть все соединения пула"""
+        self.session.close()
+
+    def _send(self, method: str, url: str, data: Any = None,
+              params: Dict[str, Any] = None, headers: Dict[str, str] = None,
+              timeout: Optional[Tuple[float, float]] = None, stream: bool = False) -> requests.Response:
+        timeout = timeout or endpoint_timeout("default", self.timeouts)
+        if method == "GET":
+            return self.session.get(url, params=params, headers=headers, timeout=timeout, stream=stream)
+        elif method == "POST":
+            return self.session.post(url, json=data, params=params, headers=headers, timeout=timeout)
+        elif method == "DELETE":
+            return self.session.delete(url, params=params, json=data, headers=headers, timeout=timeout)
+        else:
+            raise ValueError(f"Unsupported HTTP method: {method}")
+
+    def _ensure_token(self) -> str:
+        """Вернуть действующий токен, при необходимости выполнив вход"""
+        with self._token_lock:
+            if not self.token:
+                self._login_locked()
+            if not self.token:
+                raise PermissionError("Сервер не выдал токен доступа")
+            return self.token
+
+    def _refresh_token(self, expired_token: str) -> str:
+        """Обновить токен после 401 (если другой поток еще не успел это сделать)"""
+        with self._token_lock:
+            if self.token == expired_token:
+                self.token = None
+                self._login_locked()
+            if not self.token:
+                raise PermissionError("Не удалось обновить токен доступа")
+            return self.token
+
+    def _login_locked(self) -> Dict[str, Any]:
+        password = self.password
+        if password is None and self.password_provider is not None:
+            password = self.password_provider()
+        if not password:
+            raise PermissionError("Токен недействителен, а пароль для повторного входа недоступен")
+
+        url = f"{self.base_url}/login"
+        print(f"Making request to {url}")
+        response = self._send("POST", url, data={"username": self.username, "password": password})
+        response.raise_for_status()
+        auth_response = response.json()
+
+        token = auth_response.get('access_token') if isinstance(auth_response, dict) else None
+        if token:
+            self.token = token
+            if self.on_token_refresh is not None:
+                self.on_token_refresh(token)
+        return auth_response
+
+    def _send_authorized(self, method: str, url: str, timeout: Tuple[float, float], data: Any = None,
+                         params: Dict[str, Any] = None, headers: Dict[str, str] = None,
+                         stream: bool = False) -> requests.Response:
+        token = self._ensure_token()
+        response = self._send(method, url, data=data, params=params, timeout=timeout, stream=stream,
+                              headers={**(headers or {}), "Authorization": f"Bearer {token}"})
+
+        if response.status_code == 401:
+            # Токен истек: входим заново и повторяем запрос один раз
+            response.close()
+            token = self._refresh_token(token)
+            response = self._send(method, url, data=data, params=params, timeout=timeout, stream=stream,
+                                  headers={**(headers or {}), "Authorization": f"Bearer {token}"})
+        return response
+
+    def _request(self, method: str, endpoint: str, data: Any = None,
+                 params: Dict[str, Any] = None, headers: Dict[str, str] = None) -> requests.Response:
+        """Запрос с таймаутом, повторами GET при сетевых сбоях и 5xx и автоматом отключения"""
         url = f"{self.base_url}/{endpoint}"
         print(f"Making request to {url}")
-        print(f"Data: {data}")
 
-        params = params or {}
-        params.update({"username": self.username, "password": self.password})
+        timeout = endpoint_timeout(endpoint, self.timeouts)
+        # Повторять безопасно только идемпотентные запросы
+        attempts = self.max_retries + 1 if method == "GET" else 1
 
         try:
-            if method == "GET":
-                response = self.session.get(url, params=params)
-            elif method == "POST":
-                response = self.session.post(url, json=data, params=params)
-            elif method == "DELETE":
-                response = self.session.delete(url, params=params, json=data)
-            else:
-                raise ValueError(f"Unsupported HTTP method: {method}")
-
-            response.raise_for_status()
-            return response.json()
+            for attempt in range(attempts):
+                if not self.circuit_breaker.allow_request():
+                    raise CircuitOpenError(f"Сервер недоступен, запрос к {endpoint} не отправлялся")
+
+                started = time.perf_counter()
+                try:
+                    response = self._send_authorized(method, url, timeout, data=data, params=params,
+                                                     headers=headers)
+                except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                    metrics.record_request(method, endpoint, None, time.perf_counter() - started)
+                    self.circuit_breaker.record_failure()
+                    if attempt + 1 == attempts:
+                        raise
+                    print(f"Сбой запроса к {url} ({e}), повтор {attempt + 1} из {self.max_retries}")
+                    metrics.record_retry(method, endpoint)
+                    time.sleep(retry_delay(attempt))
+                    continue
+
+                metrics.record_request(method, endpoint, response.status_code, time.perf_counter() - started,
+                                       bytes_out=body_size(response.request.body),
+                                       bytes_in=len(response.content))
+
+                if response.status_code in RETRYABLE_STATUSES:
+                    self.circuit_breaker.record_failure()
+                    if attempt + 1 < attempts:
+                        print(f"Сервер ответил {response.status_code}, повтор {attempt + 1} из {self.max_retries}")
+                        metrics.record_retry(method, endpoint)
+                        time.sleep(retry_delay(attempt))
+                        continue
+                else:
+                    self.circuit_breaker.record_success()
+
+                response.raise_for_status()
+                return response
         except requests.exceptions.RequestException as e:
             print(f"Error making request to {url}: {e}")
             raise
 
+    def _make_request(self, method: str, endpoint: str,
+                      data: Dict[str, Any] = None, params: Dict[str, Any] = None) -> Dict[str, Any]:
+        return self._decode(method, endpoint, self._request(method, endpoint, data=data, params=params))
+
+    @staticmethod
+    def _decode(method: str, endpoint: str, response: requests.Response,
+                decode: Optional[Callable[[bytes], Any]] = None) -> Any:
+        """Разобрать JSON ответа (decode - свой разборщик байтов), учитывая время разбора в метриках"""
+        started = time.perf_counter()
+        data = (decode or loads)(response.content)
+        metrics.record_decode(method, endpoint, time.perf_counter() - started)
+        return data
+
+    def _make_conditional_request(self, endpoint: str, validators: Optional[Dict[str, str]] = None,
+                                  params: Dict[str, Any] = None,
+                                  decode: Optional[Callable[[bytes], Any]] = None) -> Tuple[Any, Dict[str, str]]:
+        """Условный GET по ETag/Last-Modified.
+
+        Возвращает (данные, валидаторы); при ответе 304 данные равны None,
+        а валидаторы остаются прежними.
+        """
+        validators = validators or {}
+        headers = {}
+        if validators.get('etag'):
+            headers["If-None-Match"] = validators['etag']
+        if validators.get('last_modified'):
+            headers["If-Modified-Since"] = validators['last_modified']
+
+        response = self._request("GET", endpoint, params=params, headers=headers)
+
+        if response.status_code == 304:
+            return None, validators
+
+        new_validators = {}
+        if response.headers.get("ETag"):
+            new_validators['etag'] = response.headers["ETag"]
+        if response.headers.get("Last-Modified"):
+            new_validators['last_modified'] = response.headers["Last-Modified"]
+        return self._decode("GET", endpoint, response, decode), new_validators
+
+    def get_list_if_modified(self, dataset: str, validators: Optional[Dict[str, str]] = None,
+                             fields: Optional[List[str]] = None,
+                             decode: Optional[Callable[[bytes], Any]] = None) -> Tuple[Any, Dict[str, str]]:
+        """Получить большой список (tasks, addresses, acts, employees), только если он изменился.
+
+        decode разбирает байты ответа сразу в строки (см. records.RecordCodec.decode).
+        """
+        return self._make_conditional_request(self.LIST_ENDPOINTS[dataset], validators,
+                                              params={"fields": self._fields_param(fields)}, decode=decode)
+
     def login(self) -> Dict[str, Any]:
-        return self._make_request("POST", "login", data={"username": self.username, "password": self.password})
+        """Войти в систему и сохранить выданный сервером токен доступа"""
+        with self._token_lock:
+            return self._login_locked()
+
+    @staticmethod
+    def _fields_param(fields: Optional[List[str]]) -> Optional[str]:
+        """Проекция полей списка: fields=task_id,street,... (None - сервер отдает все поля)"""
+        return ",".join(fields) if fields else None
 
     # Методы для работы с задачами
-    def get_all_tasks(self) -> List[Dict[str, Any]]:
-        """Получить все задачи"""
-        return self._make_request("GET", "tasks/all")
+    @staticmethod
+    def _task_filter_params(master: Optional[str] = None, status: Optional[str] = None,
+                            date_from: Optional[date] = None, date_to: Optional[date] = None,
+                            district: Optional[str] = None, employee_id: Optional[int] = None) -> Dict[str, Any]:
+        return {
+            "master": master,
+            "status": status,
+            "date_from": date_from.isoformat() if date_from else None,
+            "date_to": date_to.isoformat() if date_to else None,
+            "district": district,
+            "employee_id": employee_id,
+        }
+
+    def get_all_tasks(self, master: Optional[str] = None, status: Optional[str] = None,
+                      date_from: Optional[date] = None, date_to: Optional[date] = None,
+                      district: Optional[str] = None, employee_id: Optional[int] = None,
+                      fields: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """Получить все задачи (фильтры и проекция полей применяются на сервере)"""
+        params = self._task_filter_params(master, status, date_from, date_to, district, employee_id)
+        params["fields"] = self._fields_param(fields)
+        return self._make_request("GET", "tasks/all", params=params)
+
+    def get_all_tasks_pages(self, page_size: int = 1000, meta: Optional[Dict[str, Any]] = None,
+                            fields: Optional[List[str]] = None) -> Iterator[List[Dict[str, Any]]]:
+        """Получить все задачи постранично (по курсору).
+
+        Ответ сервера: {"items": [...], "next_cursor": "...", "watermark": "..."}; сервер без
+        пагинации возвращает обычный список, он отдается одной страницей. Водяной знак первой
+        страницы (для дельта-синхронизации) записывается в meta, если он передан.
+        """
+        cursor = None
+        while True:
+            payload = self._make_request("GET", "tasks/all", params={
+                "limit": page_size, "cursor": cursor, "fields": self._fields_param(fields)
+            })
+            if isinstance(payload, list):
+                yield payload
+                return
+
+            if meta is not None and cursor is None and payload.get("watermark") is not None:
+                meta['watermark'] = payload["watermark"]
+
+            yield payload.get("items", [])
+            cursor = payload.get("next_cursor")
+            if not cursor:
+                return
+
+    def get_all_tasks_iter(self, page_size: int = 1000) -> Iterator[Dict[str, Any]]:
+        """Получить все задачи по одной, подгружая страницы по мере чтения"""
+        for tasks_page in self.get_all_tasks_pages(page_size):
+            yield from tasks_page
+
+    def get_tasks_changes(self, since: Optional[str] = None,
+                          fields: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Получить изменения задач после водяного знака since.
+
+        Ответ: {"upserted": [задачи], "deleted": [task_id], "watermark": "..."};
+        без since сервер возвращает все задачи как upserted.
+        """
+        return self._make_request("GET", "tasks/changes", params={"since": since, "fields": self._fields_param(fields)})
 
     def export_completed_tasks(self, start_date: Optional[date] = None,
                                end_date: Optional[date] = None):
@@ -52,9 +305,9 @@ class WaterUtilityAPIClient:
 
         return self._make_request("GET", "tasks/export_completed", params=params)
 
-    def get_all_addresses(self) -> List[Dict[str, Any]]:
+    def get_all_addresses(self, fields: Optional[List[str]] = None) -> List[Dict[str, Any]]:
         """Получить все задачи"""
-        return self._make_request("GET", "addresses/full")
+        return self._make_request("GET", "addresses/full", params={"fields": self._fields_param(fields)})
 
     def get_address_details(self, address_id: int) -> Dict[str, Any]:
         """Получить детали конкретной задачи"""
@@ -68,9 +321,16 @@ class WaterUtilityAPIClient:
         """Обновить или создать задачу"""
         return self._make_request("POST", "tasks/changes_tasks", data=task_data)
 
-    def insert_tasks_bulk(self, tasks_data: List[Dict[str, Any]]) -> Dict[str, Any]:
-        """Вставить несколько задач"""
-        return self._make_request("POST", "tasks/insert_from_json", data=tasks_data)
+    def insert_tasks_bulk(self, tasks_data: List[Dict[str, Any]],
+                          idempotency_key: Optional[str] = None) -> Dict[str, Any]:
+        """Вставить несколько задач.
+
+        idempotency_key позволяет серверу распознать повторную отправку той же порции
+        (например, если ответ на первую попытку потерялся из-за таймаута).
+        """
+        headers = {"Idempotency-Key": idempotency_key} if idempotency_key else None
+        response = self._request("POST", "tasks/insert_from_json", data=tasks_data, headers=headers)
+        return self._decode("POST", "tasks/insert_from_json", response)
 
     def delete_tasks(self, task_ids: List[int]):
         """Удалить задачи"""
@@ -80,14 +340,41 @@ class WaterUtilityAPIClient:
         """Получить детали конкретной задачи"""
         return self._make_request("GET", f"tasks/{task_id}/details")
 
+    def get_task_details_batch(self, task_ids: Iterable[int]) -> Dict[int, Dict[str, Any]]:
+        """Получить детали нескольких задач одним запросом.
+
+        Ответ сервера: {"<task_id>": {"task": [...], "acts": [...], "meters": [...], "photos": [...]}};
+        задачи, которых нет на сервере, в ответ не попадают.
+        """
+        payload = self._make_request("GET", "tasks/details",
+                                     params={"ids": ",".join(str(task_id) for task_id in task_ids)})
+        return {int(task_id): details for task_id, details in payload.items()}
+
+    def get_task_details_many(self, task_ids: Iterable[int],
+                              concurrency: int = 4) -> Iterator[Tuple[int, Optional[Dict[str, Any]]]]:
+        """Получить детали нескольких задач параллельно.
+
+        Пары (task_id, детали) отдаются по мере готовности, а не в порядке task_ids;
+        если запрос по задаче не удался, вместо деталей отдается None.
+        """
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            futures = {executor.submit(self.get_task_details, task_id): task_id for task_id in task_ids}
+            for future in as_completed(futures):
+                task_id = futures[future]
+                try:
+                    yield task_id, future.result()
+                except Exception as e:
+                    print(f"Ошибка при получении деталей задачи {task_id}: {e}")
+                    yield task_id, None
+
     # Методы для работы с сотрудниками
-    def get_all_employees(self) -> List[Dict[str, Any]]:
+    def get_all_employees(self, fields: Optional[List[str]] = None) -> List[Dict[str, Any]]:
         """Получить список всех сотрудников"""
-        return self._make_request("GET", "employees")
+        return self._make_request("GET", "employees", params={"fields": self._fields_param(fields)})
 
-    def get_acts_with_tasks_and_addresses(self) -> List[Dict[str, Any]]:
+    def get_acts_with_tasks_and_addresses(self, fields: Optional[List[str]] = None) -> List[Dict[str, Any]]:
         """Получить акты с задачами и адресами"""
-        return self._make_request("GET", "acts")
+        return self._make_request("GET", "acts", params={"fields": self._fields_param(fields)})
 
     def get_dashboard_stats(
             self,
@@ -103,14 +390,40 @@ class WaterUtilityAPIClient:
         }
         return self._make_request("GET", "dashboard/stats", params=params)
 
-    def get_notifications(self) -> List[Dict[str, Any]]:
-        """Получить уведомления пользователя"""
-        return self._make_request("GET", "notifications")
+    def get_notifications(self, since_id: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Получить уведомления пользователя (с since_id - только новее уведомления с этим id)"""
+        params = {"since_id": since_id} if since_id is not None else None
+        return self._make_request("GET", "notifications", params=params)
+
+    def open_notifications_stream(self, last_event_id: Optional[str] = None) -> requests.Response:
+        """Открыть поток push-уведомлений (Server-Sent Events).
+
+        Ответ не читается целиком: события разбираются по мере поступления (см. push_channel).
+        last_event_id - номер последнего полученного события, сервер пришлет пропущенные после него.
+        Таймаут чтения ограничивает паузу между событиями, сервер шлет heartbeat чаще.
+        """
+        endpoint = "notifications/stream"
+        url = f"{self.base_url}/{endpoint}"
+        print(f"Making request to {url}")
+        headers = {"Accept": "text/event-stream", "Cache-Control": "no-cache"}
+        if last_event_id:
+            headers["Last-Event-ID"] = last_event_id
+
+        response = self._send_authorized("GET", url, endpoint_timeout(endpoint, self.timeouts),
+                                         headers=headers, stream=True)
+        if response.status_code >= 400:
+            response.close()
+        response.raise_for_status()
+        return response
 
     def mark_notification_as_shown(self, notification_id: int) -> Dict[str, Any]:
         """Пометить уведомление как прочитанное"""
         return self._make_request("POST", f"notifications/{notification_id}/mark-as-shown")
 
+    def mark_notifications_as_shown(self, notification_ids: List[int]) -> List[Dict[str, Any]]:
+        """Пометить несколько уведомлений как прочитанные одним запросом"""
+        return self._make_request("POST", "notifications/mark-as-shown", data={"ids": list(notification_ids)})
+
     def unassign_tasks(self, task_ids: List[int], fio_emp: List[int]) -> Dict[str, Any]:
         """Отменить назначение задач"""
         return self._make_request("POST", "tasks/unassign", data={"task_ids": task_ids, "fio_emp": fio_emp})
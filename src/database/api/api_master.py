@@ -1,6 +1,16 @@
-from typing import Dict, List, Any, Optional
+import asyncio
+import atexit
+import threading
+from typing import Dict, List, Any, Optional, Tuple, Callable
 
+from src.config.config import APP_CONFIG
 from src.database.api.api_client import WaterUtilityAPIClient
+from src.database.api.async_api_client import AsyncWaterUtilityAPIClient
+from src.database.api.metrics import metrics
+from src.database.api.push_channel import PushChannel
+from src.database.api.resilience import CircuitBreaker, get_circuit_breaker
+from src.database.connection import get_session_credentials, get_session_password, store_session_token
+from src.database.local_cache import cache
 
 from dotenv import load_dotenv
 import os
@@ -10,14 +20,160 @@ load_dotenv()
 
 API_BASE_URL = os.getenv("API_BASE_URL")
 
-def create_master_api_client(login: str, password: str) -> WaterUtilityAPIClient:
-    return WaterUtilityAPIClient(API_BASE_URL, login, password)
+# Снимок метрик API записывается в файл при выходе из приложения (если путь задан)
+if APP_CONFIG['metrics_dump_path']:
+    atexit.register(metrics.dump, APP_CONFIG['metrics_dump_path'])
+
+# Общий для процесса реестр клиентов: один клиент (и один пул соединений) на пользователя.
+# Используется и потоком UI, и фоновым потоком опроса уведомлений.
+_clients: Dict[Tuple[str, str], WaterUtilityAPIClient] = {}
+_clients_lock = threading.Lock()
+
+# Асинхронные клиенты привязаны к циклу событий, поэтому ключ включает цикл;
+# сам цикл хранится рядом с клиентом - закрыть клиент можно только в нем
+_async_clients: Dict[Tuple[int, str, str], Tuple[asyncio.AbstractEventLoop, AsyncWaterUtilityAPIClient]] = {}
+
+# Канал push-уведомлений процесса: один на вошедшего пользователя
+_notifications_channel: Optional[PushChannel] = None
+
+
+def get_api_circuit_breaker() -> CircuitBreaker:
+    """Автомат отключения для сервера API (общий для всех клиентов процесса)"""
+    return get_circuit_breaker(
+        API_BASE_URL,
+        failure_threshold=APP_CONFIG['api_breaker_threshold'],
+        reset_timeout=APP_CONFIG['api_breaker_reset'],
+    )
+
+
+def is_api_offline() -> bool:
+    """Сервер недоступен и данные берутся из кеша (для пометки "нет связи" в UI)"""
+    return get_api_circuit_breaker().is_open
+
+
+def _update_client_credentials(client, token: Optional[str], password: Optional[str]) -> None:
+    if password:
+        client.password = password
+    # Токен клиента может оказаться новее токена сессии, поэтому заменяем только пустой
+    if token and not client.token:
+        client.token = token
+
+
+def create_master_api_client(login: str, token: Optional[str] = None,
+                             password: Optional[str] = None) -> WaterUtilityAPIClient:
+    """Получить API-клиент из реестра (соединения и токен переиспользуются между вызовами)"""
+    key = (API_BASE_URL, login)
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = WaterUtilityAPIClient(
+                API_BASE_URL, login, password=password, token=token,
+                pool_connections=APP_CONFIG['api_pool_connections'],
+                pool_maxsize=APP_CONFIG['api_pool_maxsize'],
+                password_provider=get_session_password,
+                on_token_refresh=store_session_token,
+                timeouts=APP_CONFIG['api_timeouts'],
+                max_retries=APP_CONFIG['api_max_retries'],
+                circuit_breaker=get_api_circuit_breaker(),
+            )
+            _clients[key] = client
+        else:
+            _update_client_credentials(client, token, password)
+        return client
+
+
+def create_async_master_api_client(login: str, token: Optional[str] = None,
+                                   password: Optional[str] = None) -> AsyncWaterUtilityAPIClient:
+    """Получить асинхронный API-клиент для текущего цикла событий"""
+    loop = asyncio.get_running_loop()
+    key = (id(loop), API_BASE_URL, login)
+    with _clients_lock:
+        loop_and_client = _async_clients.get(key)
+        client = loop_and_client[1] if loop_and_client is not None and loop_and_client[0] is loop else None
+        if client is None:
+            client = AsyncWaterUtilityAPIClient(
+                API_BASE_URL, login, password=password, token=token,
+                max_connections=APP_CONFIG['api_pool_maxsize'],
+                max_keepalive_connections=APP_CONFIG['api_pool_connections'],
+                password_provider=get_session_password,
+                on_token_refresh=store_session_token,
+                timeouts=APP_CONFIG['api_timeouts'],
+                max_retries=APP_CONFIG['api_max_retries'],
+                circuit_breaker=get_api_circuit_breaker(),
+                http2=APP_CONFIG['api_http2'],
+            )
+            _async_clients[key] = (loop, client)
+        else:
+            _update_client_credentials(client, token, password)
+        return client
+
+
+def create_notifications_channel(on_event: Callable[[Dict[str, Any]], None],
+                                 on_connect: Optional[Callable[[], None]] = None) -> PushChannel:
+    """Канал push-уведомлений для пользователя текущей сессии (запускается вызовом start()).
+
+    Прежний канал останавливается: иначе при повторном входе открылся бы второй поток событий
+    и уведомления приходили бы дважды.
+    """
+    global _notifications_channel
+
+    def client_factory() -> Optional[WaterUtilityAPIClient]:
+        login, token = get_session_credentials()
+        if not login or not token:
+            return None
+        return create_master_api_client(login, token)
+
+    stop_notifications_channel()
+    # События канала относятся к пользователю, для которого он открыт, и пишутся в его кеш
+    channel = PushChannel(client_factory, cache.bind(on_event),
+                          on_connect=cache.bind(on_connect) if on_connect is not None else None,
+                          max_reconnect_delay=APP_CONFIG['push_reconnect_max_delay'])
+    with _clients_lock:
+        _notifications_channel = channel
+    return channel
+
+
+def stop_notifications_channel() -> None:
+    """Остановить канал push-уведомлений (при выходе из системы)"""
+    global _notifications_channel
+    with _clients_lock:
+        channel, _notifications_channel = _notifications_channel, None
+    if channel is not None:
+        channel.stop()
+
+
+def close_master_api_clients() -> None:
+    """Закрыть все клиенты реестра (например, при выходе из системы)"""
+    with _clients_lock:
+        clients = list(_clients.values())
+        _clients.clear()
+        async_clients = list(_async_clients.values())
+        _async_clients.clear()
+    for client in clients:
+        client.close()
+    for loop, client in async_clients:
+        _close_async_client(loop, client)
+
+
+def _close_async_client(loop: asyncio.AbstractEventLoop, client: AsyncWaterUtilityAPIClient) -> None:
+    """Закрыть асинхронный клиент в его цикле событий (httpx не закрывает соединения сам)"""
+    if loop.is_closed():
+        # Цикл уже завершен, выполнить aclose негде
+        return
+    try:
+        if loop.is_running():
+            # Цикл работает в другом потоке (цикл UI): закрытие выполнится в нем, не ждем его
+            asyncio.run_coroutine_threadsafe(client.aclose(), loop)
+        else:
+            loop.run_until_complete(client.aclose())
+    except Exception as e:
+        print(f"Ошибка при закрытии асинхронного API-клиента: {e}")
 
 
 # Функции-обертки для удобного использования
 def get_all_tasks(login: str, password: str) -> Optional[List[Dict[str, Any]]]:
     """Получить все задачи"""
-    api_client = create_master_api_client(login, password)
+    api_client = create_master_api_client(login, password=password)
     try:
         return api_client.get_all_tasks()
     except Exception as e:
@@ -27,7 +183,7 @@ def get_all_tasks(login: str, password: str) -> Optional[List[Dict[str, Any]]]:
 
 def get_unassigned_tasks(login: str, password: str) -> Optional[List[Dict[str, Any]]]:
     """Получить незакрепленные задачи"""
-    api_client = create_master_api_client(login, password)
+    api_client = create_master_api_client(login, password=password)
     try:
         return api_client.get_unassigned_tasks()
     except Exception as e:
@@ -37,7 +193,7 @@ def get_unassigned_tasks(login: str, password: str) -> Optional[List[Dict[str, A
 
 def upsert_task(login: str, password: str, task_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
     """Обновить данные задачи или создать новую"""
-    api_client = create_master_api_client(login, password)
+    api_client = create_master_api_client(login, password=password)
     try:
         return api_client.upsert_task(task_data)
     except Exception as e:
@@ -47,7 +203,7 @@ def upsert_task(login: str, password: str, task_data: Dict[str, Any]) -> Optiona
 
 def insert_tasks_bulk(login: str, password: str, tasks_data: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
     """Массовая вставка задач"""
-    api_client = create_master_api_client(login, password)
+    api_client = create_master_api_client(login, password=password)
     try:
         return api_client.insert_tasks_bulk(tasks_data)
     except Exception as e:
@@ -57,7 +213,7 @@ def insert_tasks_bulk(login: str, password: str, tasks_data: List[Dict[str, Any]
 
 def delete_tasks(login: str, password: str, task_ids: List[int]) -> Optional[Dict[str, Any]]:
     """Удалить задачи"""
-    api_client = create_master_api_client(login, password)
+    api_client = create_master_api_client(login, password=password)
     try:
         return api_client.delete_tasks(task_ids)
     except Exception as e:
@@ -67,7 +223,7 @@ def delete_tasks(login: str, password: str, task_ids: List[int]) -> Optional[Dic
 
 def get_task_details(login: str, password: str, task_id: int) -> Optional[Dict[str, Any]]:
     """Получить детали задачи"""
-    api_client = create_master_api_client(login, password)
+    api_client = create_master_api_client(login, password=password)
     try:
         return api_client.get_task_details(task_id)
     except Exception as e:
@@ -78,7 +234,7 @@ def get_task_details(login: str, password: str, task_id: int) -> Optional[Dict[s
 # Аналогичные функции для работы с сотрудниками
 def get_all_employees(login: str, password: str, refresh: bool = False) -> Optional[List[Dict[str, Any]]]:
     """Получить список всех сотрудников"""
-    api_client = create_master_api_client(login, password)
+    api_client = create_master_api_client(login, password=password)
     try:
         return api_client.get_all_employees(refresh)
     except Exception as e:
@@ -88,7 +244,7 @@ def get_all_employees(login: str, password: str, refresh: bool = False) -> Optio
 
 def upsert_employee(login: str, password: str, employee_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
     """Обновить данные сотрудника или создать нового"""
-    api_client = create_master_api_client(login, password)
+    api_client = create_master_api_client(login, password=password)
     try:
         return api_client.upsert_employee(employee_data)
     except Exception as e:
@@ -98,7 +254,7 @@ def upsert_employee(login: str, password: str, employee_data: Dict[str, Any]) ->
 
 def delete_employee(login: str, password: str, employee_id: int) -> Optional[Dict[str, Any]]:
     """Удалить сотрудника"""
-    api_client = create_master_api_client(login, password)
+    api_client = create_master_api_client(login, password=password)
     try:
         return api_client.delete_employee(employee_id)
     except Exception as e:
@@ -108,7 +264,7 @@ def delete_employee(login: str, password: str, employee_id: int) -> Optional[Dic
 
 def get_employee_details(login: str, password: str, employee_id: int) -> Optional[Dict[str, Any]]:
     """Получить детали сотрудника"""
-    api_client = create_master_api_client(login, password)
+    api_client = create_master_api_client(login, password=password)
     try:
         return api_client.get_employee_details(employee_id)
     except Exception as e:
@@ -118,7 +274,7 @@ def get_employee_details(login: str, password: str, employee_id: int) -> Optiona
 
 def set_employee_to_task(login: str, password: str, update_tasks_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
     """Назначить сотрудника на задачу"""
-    api_client = create_master_api_client(login, password)
+    api_client = create_master_api_client(login, password=password)
     try:
         return api_client.set_employee_to_task(update_tasks_data)
     except Exception as e:
@@ -0,0 +1,315 @@
+import asyncio
+import time
+from typing import Optional, List, Dict, Any, AsyncIterator, Callable, Tuple, Iterable
+from datetime import date
+
+import httpx
+
+# HTTP/2 в httpx требует пакет h2 (pip install httpx[http2]); без него работаем по HTTP/1.1
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+from src.database.api.api_client import WaterUtilityAPIClient
+from src.database.api.metrics import metrics
+from src.database.api.records import loads
+from src.database.api.resilience import (
+    CircuitBreaker, CircuitOpenError, RETRYABLE_STATUSES, endpoint_timeout, get_circuit_breaker, retry_delay
+)
+
+
+class AsyncWaterUtilityAPIClient:
+    """Асинхронный клиент API (httpx) с тем же набором методов, что и WaterUtilityAPIClient"""
+
+    def __init__(self, base_url: str, username: str, password: Optional[str] = None,
+                 token: Optional[str] = None,
+                 max_connections: int = 10, max_keepalive_connections: int = 4,
+                 password_provider: Optional[Callable[[], Optional[str]]] = None,
+                 on_token_refresh: Optional[Callable[[str], None]] = None,
+                 timeouts: Optional[Dict[str, Tuple[float, float]]] = None,
+                 max_retries: int = 3,
+                 circuit_breaker: Optional[CircuitBreaker] = None,
+                 http2: bool = False):
+        self.base_url = base_url
+        self.username = username
+        self.password = password
+        self.token = token
+        self.password_provider = password_provider
+        self.on_token_refresh = on_token_refresh
+        self._token_lock = asyncio.Lock()
+        self.timeouts = timeouts or {}
+        self.max_retries = max_retries
+        self.circuit_breaker = circuit_breaker or get_circuit_breaker(base_url)
+        # По HTTP/2 параллельные запросы мультиплексируются в одном соединении
+        self.http2 = http2 and HTTP2_AVAILABLE
+        if http2 and not HTTP2_AVAILABLE:
+            print("HTTP/2 включен в настройках (api_http2), но пакет h2 не установлен "
+                  "(pip install httpx[http2]) - запросы идут по HTTP/1.1")
+        self.client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections,
+            ),
+            timeout=self._httpx_timeout("default"),
+            http2=self.http2,
+        )
+
+    def _httpx_timeout(self, endpoint: str) -> httpx.Timeout:
+        connect, read = endpoint_timeout(endpoint, self.timeouts)
+        return httpx.Timeout(read, connect=connect)
+
+    async def aclose(self):
+        """Закрыть все соединения клиента"""
+        await self.client.aclose()
+
+    async def _ensure_token(self) -> str:
+        """Вернуть действующий токен, при необходимости выполнив вход"""
+        async with self._token_lock:
+            if not self.token:
+                await self._login_locked()
+            if not self.token:
+                raise PermissionError("Сервер не выдал токен доступа")
+            return self.token
+
+    async def _refresh_token(self, expired_token: str) -> str:
+        """Обновить токен после 401 (если другая корутина еще не успела это сделать)"""
+        async with self._token_lock:
+            if self.token == expired_token:
+                self.token = None
+                await self._login_locked()
+            if not self.token:
+                raise PermissionError("Не удалось обновить токен доступа")
+            return self.token
+
+    async def _login_locked(self) -> Dict[str, Any]:
+        password = self.password
+        if password is None and self.password_provider is not None:
+            password = self.password_provider()
+        if not password:
+            raise PermissionError("Токен недействителен, а пароль для повторного входа недоступен")
+
+        response = await self.client.post(f"{self.base_url}/login",
+                                          json={"username": self.username, "password": password})
+        response.raise_for_status()
+        auth_response = response.json()
+
+        token = auth_response.get('access_token') if isinstance(auth_response, dict) else None
+        if token:
+            self.token = token
+            if self.on_token_refresh is not None:
+                self.on_token_refresh(token)
+        return auth_response
+
+    async def _make_request(self, method: str, endpoint: str,
+                            data: Any = None, params: Dict[str, Any] = None) -> Any:
+        url = f"{self.base_url}/{endpoint}"
+        print(f"Making async request to {url}")
+
+        params = {key: value for key, value in (params or {}).items() if value is not None}
+
+        timeout = self._httpx_timeout(endpoint)
+        # Повторять безопасно только идемпотентные запросы
+        attempts = self.max_retries + 1 if method == "GET" else 1
+
+        try:
+            if method not in ("GET", "POST", "DELETE"):
+                raise ValueError(f"Unsupported HTTP method: {method}")
+
+            for attempt in range(attempts):
+                if not self.circuit_breaker.allow_request():
+                    raise CircuitOpenError(f"Сервер недоступен, запрос к {endpoint} не отправлялся")
+
+                started = time.perf_counter()
+                try:
+                    response = await self._send_authorized(method, url, timeout, data=data, params=params)
+                except httpx.TransportError as e:
+                    metrics.record_request(method, endpoint, None, time.perf_counter() - started)
+                    self.circuit_breaker.record_failure()
+                    if attempt + 1 == attempts:
+                        raise
+                    print(f"Сбой запроса к {url} ({e}), повтор {attempt + 1} из {self.max_retries}")
+                    metrics.record_retry(method, endpoint)
+                    await asyncio.sleep(retry_delay(attempt))
+                    continue
+
+                metrics.record_request(method, endpoint, response.status_code, time.perf_counter() - started,
+                                       bytes_out=len(response.request.content), bytes_in=len(response.content))
+
+                if response.status_code in RETRYABLE_STATUSES:
+                    self.circuit_breaker.record_failure()
+                    if attempt + 1 < attempts:
+                        print(f"Сервер ответил {response.status_code}, повтор {attempt + 1} из {self.max_retries}")
+                        metrics.record_retry(method, endpoint)
+                        await asyncio.sleep(retry_delay(attempt))
+                        continue
+                else:
+                    self.circuit_breaker.record_success()
+
+                response.raise_for_status()
+                started = time.perf_counter()
+                payload = loads(response.content)
+                metrics.record_decode(method, endpoint, time.perf_counter() - started)
+                return payload
+        except httpx.HTTPError as e:
+            print(f"Error making request to {url}: {e}")
+            raise
+
+    async def _send_authorized(self, method: str, url: str, timeout: httpx.Timeout,
+                               data: Any = None, params: Dict[str, Any] = None) -> httpx.Response:
+        token = await self._ensure_token()
+        response = await self.client.request(method, url, params=params, json=data, timeout=timeout,
+                                             headers={"Authorization": f"Bearer {token}"})
+
+        if response.status_code == 401:
+            # Токен истек: входим заново и повторяем запрос один раз
+            token = await self._refresh_token(token)
+            response = await self.client.request(method, url, params=params, json=data, timeout=timeout,
+                                                 headers={"Authorization": f"Bearer {token}"})
+        return response
+
+    async def login(self) -> Dict[str, Any]:
+        """Войти в систему и сохранить выданный сервером токен доступа"""
+        async with self._token_lock:
+            return await self._login_locked()
+
+    # Методы для работы с задачами
+    async def get_all_tasks(self, master: Optional[str] = None, status: Optional[str] = None,
+                            date_from: Optional[date] = None, date_to: Optional[date] = None,
+                            district: Optional[str] = None, employee_id: Optional[int] = None,
+                            fields: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """Получить все задачи (фильтры и проекция полей применяются на сервере)"""
+        params = WaterUtilityAPIClient._task_filter_params(master, status, date_from, date_to, district, employee_id)
+        params["fields"] = WaterUtilityAPIClient._fields_param(fields)
+        return await self._make_request("GET", "tasks/all", params=params)
+
+    async def get_all_tasks_pages(self, page_size: int = 1000, meta: Optional[Dict[str, Any]] = None,
+                                  fields: Optional[List[str]] = None) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Получить все задачи постранично (по курсору), как WaterUtilityAPIClient.get_all_tasks_pages;
+        водяной знак первой страницы записывается в meta, если он передан"""
+        cursor = None
+        while True:
+            payload = await self._make_request("GET", "tasks/all", params={
+                "limit": page_size, "cursor": cursor, "fields": WaterUtilityAPIClient._fields_param(fields)
+            })
+            if isinstance(payload, list):
+                yield payload
+                return
+
+            if meta is not None and cursor is None and payload.get("watermark") is not None:
+                meta['watermark'] = payload["watermark"]
+
+            yield payload.get("items", [])
+            cursor = payload.get("next_cursor")
+            if not cursor:
+                return
+
+    async def get_tasks_changes(self, since: Optional[str] = None,
+                                fields: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Получить изменения задач после водяного знака since"""
+        return await self._make_request("GET", "tasks/changes", params={
+            "since": since, "fields": WaterUtilityAPIClient._fields_param(fields)
+        })
+
+    async def export_completed_tasks(self, start_date: Optional[date] = None,
+                                     end_date: Optional[date] = None):
+        params = {
+            "start_date": start_date.isoformat() if start_date else None,
+            "end_date": end_date.isoformat() if end_date else None,
+        }
+
+        return await self._make_request("GET", "tasks/export_completed", params=params)
+
+    async def get_all_addresses(self, fields: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """Получить все адреса"""
+        return await self._make_request("GET", "addresses/full",
+                                        params={"fields": WaterUtilityAPIClient._fields_param(fields)})
+
+    async def get_address_details(self, address_id: int) -> Dict[str, Any]:
+        """Получить детали конкретного адреса"""
+        return await self._make_request("GET", f"addresses/{address_id}/details")
+
+    async def get_unassigned_tasks(self) -> List[Dict[str, Any]]:
+        """Получить незакрепленные задачи"""
+        return await self._make_request("GET", "tasks/unassigned")
+
+    async def upsert_task(self, task_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Обновить или создать задачу"""
+        return await self._make_request("POST", "tasks/changes_tasks", data=task_data)
+
+    async def insert_tasks_bulk(self, tasks_data: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Вставить несколько задач"""
+        return await self._make_request("POST", "tasks/insert_from_json", data=tasks_data)
+
+    async def delete_tasks(self, task_ids: List[int]):
+        """Удалить задачи"""
+        return await self._make_request("DELETE", "tasks/delete", data=task_ids)
+
+    async def get_task_details(self, task_id: int) -> Dict[str, Any]:
+        """Получить детали конкретной задачи"""
+        return await self._make_request("GET", f"tasks/{task_id}/details")
+
+    async def get_task_details_batch(self, task_ids: Iterable[int]) -> Dict[int, Dict[str, Any]]:
+        """Получить детали нескольких задач одним запросом"""
+        payload = await self._make_request("GET", "tasks/details",
+                                           params={"ids": ",".join(str(task_id) for task_id in task_ids)})
+        return {int(task_id): details for task_id, details in payload.items()}
+
+    # Методы для работы с сотрудниками
+    async def get_all_employees(self, fields: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """Получить список всех сотрудников"""
+        return await self._make_request("GET", "employees",
+                                        params={"fields": WaterUtilityAPIClient._fields_param(fields)})
+
+    async def get_acts_with_tasks_and_addresses(self, fields: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """Получить акты с задачами и адресами"""
+        return await self._make_request("GET", "acts",
+                                        params={"fields": WaterUtilityAPIClient._fields_param(fields)})
+
+    async def get_dashboard_stats(
+            self,
+            start_date: Optional[date] = None,
+            end_date: Optional[date] = None,
+            employee_id: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """Получить статистику для дашборда"""
+        params = {
+            "start_date": start_date.isoformat() if start_date else None,
+            "end_date": end_date.isoformat() if end_date else None,
+            "employee_id": employee_id
+        }
+        return await self._make_request("GET", "dashboard/stats", params=params)
+
+    async def get_notifications(self, since_id: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Получить уведомления пользователя (с since_id - только новее уведомления с этим id)"""
+        params = {"since_id": since_id} if since_id is not None else None
+        return await self._make_request("GET", "notifications", params=params)
+
+    async def mark_notification_as_shown(self, notification_id: int) -> Dict[str, Any]:
+        """Пометить уведомление как прочитанное"""
+        return await self._make_request("POST", f"notifications/{notification_id}/mark-as-shown")
+
+    async def mark_notifications_as_shown(self, notification_ids: List[int]) -> List[Dict[str, Any]]:
+        """Пометить несколько уведомлений как прочитанные одним запросом"""
+        return await self._make_request("POST", "notifications/mark-as-shown", data={"ids": list(notification_ids)})
+
+    async def unassign_tasks(self, task_ids: List[int], fio_emp: List[int]) -> Dict[str, Any]:
+        """Отменить назначение задач"""
+        return await self._make_request("POST", "tasks/unassign", data={"task_ids": task_ids, "fio_emp": fio_emp})
+
+    async def upsert_employee(self, employee_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Обновить или создать сотрудника"""
+        return await self._make_request("POST", "employees/changes_employees", data=employee_data)
+
+    async def delete_employee(self, employee_ids: List[int]):
+        """Удалить сотрудника"""
+        return await self._make_request("DELETE", "employees/delete", data=employee_ids)
+
+    async def get_employee_details(self, employee_id: int) -> Dict[str, Any]:
+        """Получить детали конкретного сотрудника"""
+        return await self._make_request("GET", f"employees/{employee_id}/details")
+
+    async def set_employee_to_task(self, update_tasks_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Назначить сотрудника на задачу"""
+        return await self._make_request("POST", "employees/update_task_employer", data=update_tasks_data)
@@ -0,0 +1,956 @@
+"""Локальный сервер-заглушка, повторяющий контракт API для работы без боевого бэкенда.
+
+Реализует все эндпоинты, к которым обращается WaterUtilityAPIClient, умеет заполнять себя
+синтетическими данными (от тысячи до сотен тысяч задач) и изображать медленную или
+нестабильную сеть: задержку, ограничение пропускной способности, долю ошибок и обрывов.
+Используется как стенд для замеров и нагрузочных тестов клиента.
+
+Запуск: python -m src.database.api.local_server [порт] [--tasks 100000] [--latency 50] [--jitter 20]
+        [--bandwidth 1024] [--error-rate 0.05] [--disconnect-rate 0.01]
+После запуска укажите API_BASE_URL="http://127.0.0.1:<порт>" в .env.
+
+Из кода (тесты, замеры):
+    server = LocalAPIServer(store=LocalDataStore.synthetic(tasks=50000), faults=FaultInjection(latency=0.05))
+    server.start()
+    ...
+    server.faults.error_rate = 0.2   # условия сети можно менять на ходу
+    server.stop()
+"""
+import argparse
+import inspect
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional
+from urllib.parse import urlparse, parse_qs
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# Наборы данных с ETag (условный GET) и ревизией изменений
+DATASETS = ('tasks', 'addresses', 'employees', 'acts')
+
+TASK_STATUSES = ('выполнен', 'не выполнен', 'в работе')
+COMPLETED_STATUS = 'выполнен'
+
+# Справочники для синтетических данных
+_CITIES = ('Калининград', 'Гурьевск', 'Светлогорск', 'Зеленоградск', 'Пионерский')
+_DISTRICTS = ('Центральный', 'Ленинградский', 'Московский', 'Гурьевский', 'Зеленоградский')
+_STREETS = ('Ленина', 'Мира', 'Советская', 'Гагарина', 'Победы', 'Садовая', 'Лесная', 'Школьная',
+            'Молодежная', 'Набережная', 'Октябрьская', 'Пушкина', 'Чкалова', 'Береговая', 'Луговая')
+_HAMLETS = ('', '', '', 'Васильково', 'Малое Исаково', 'Прибрежное', 'Люблино')
+_LAST_NAMES = ('Иванов', 'Смирнов', 'Кузнецов', 'Попов', 'Васильев', 'Петров', 'Соколов', 'Михайлов',
+               'Новиков', 'Федоров', 'Морозов', 'Волков', 'Алексеев', 'Лебедев', 'Семенов', 'Егоров')
+_FIRST_NAMES = ('Александр', 'Сергей', 'Дмитрий', 'Андрей', 'Алексей', 'Максим', 'Иван', 'Михаил',
+                'Анна', 'Мария', 'Елена', 'Ольга', 'Наталья', 'Татьяна', 'Ирина', 'Светлана')
+_PATRONYMICS = ('Александрович', 'Сергеевич', 'Дмитриевич', 'Андреевич', 'Иванович', 'Петрович')
+_POSTS = ('Контролер', 'Старший контролер', 'Мастер', 'Слесарь')
+_PURPOSES = ('Опломбировка счетчика', 'Замена счетчика', 'Проверка показаний', 'Контрольное обследование',
+             'Отключение за долги', 'Подключение после оплаты')
+_ADDRESS_TYPES = ('квартира', 'частный дом')
+_ACT_REASONS = ('Нарушение пломбы', 'Истек срок поверки', 'Самовольное подключение', 'Плановая проверка')
+
+
+def encode_json(payload: Any) -> bytes:
+    """Сериализовать ответ (orjson, если установлен - на больших списках в разы быстрее)"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(payload, default=str)
+    return json.dumps(payload, ensure_ascii=False, default=str).encode('utf-8')
+
+
+class FaultInjection:
+    """Искусственные условия сети для замеров и нагрузочных тестов клиента.
+
+    latency и jitter - задержка перед ответом в секундах (jitter - случайная добавка до этого значения);
+    bandwidth - скорость отдачи тела ответа, байт/с (None - без ограничения);
+    error_rate - доля запросов, на которые сервер отвечает error_status вместо данных;
+    disconnect_rate - доля запросов, на которые соединение закрывается без ответа (сбой связи).
+    Ошибки и обрывы не затрагивают вход в систему, иначе клиент не смог бы получить токен.
+    """
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, bandwidth: Optional[float] = None,
+                 error_rate: float = 0.0, error_status: int = 503, disconnect_rate: float = 0.0,
+                 seed: Optional[int] = None):
+        self.latency = latency
+        self.jitter = jitter
+        self.bandwidth = bandwidth
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.disconnect_rate = disconnect_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _roll(self) -> float:
+        with self._lock:
+            return self._random.random()
+
+    def delay(self) -> float:
+        """Задержка перед ответом на очередной запрос"""
+        return self.latency + (self._roll() * self.jitter if self.jitter else 0.0)
+
+    def should_fail(self) -> bool:
+        return self.error_rate > 0 and self._roll() < self.error_rate
+
+    def should_disconnect(self) -> bool:
+        return self.disconnect_rate > 0 and self._roll() < self.disconnect_rate
+
+
+class Encoded(bytes):
+    """Уже сериализованное тело ответа (повторно не кодируется)"""
+
+
+class LocalDataStore:
+    """Данные заглушки. Каждое изменение получает номер ревизии, он же служит водяным знаком синхронизации"""
+
+    def __init__(self, tasks: Optional[List[Dict[str, Any]]] = None):
+        self.lock = threading.RLock()
+        self.revision = 0
+        self.tasks: Dict[int, Dict[str, Any]] = {}
+        self.task_revisions: Dict[int, int] = {}
+        self.deleted_tasks: Dict[int, int] = {}  # task_id -> ревизия удаления
+        self.addresses: Dict[int, Dict[str, Any]] = {}
+        self.employees: Dict[int, Dict[str, Any]] = {}
+        self.acts: Dict[int, Dict[str, Any]] = {}
+        # Ревизия последнего изменения каждого набора - из нее строится ETag списка
+        self.dataset_revisions: Dict[str, int] = dict.fromkeys(DATASETS, 0)
+        self.notifications: List[Dict[str, Any]] = []
+        # Будит потоки уведомлений, когда появилось новое
+        self.notifications_changed = threading.Condition(self.lock)
+        for task in tasks or []:
+            self.upsert_task(task)
+
+    @classmethod
+    def synthetic(cls, tasks: int = 1000, seed: int = 0) -> "LocalDataStore":
+        """Синтетический набор данных заданного размера (воспроизводимый при одном seed).
+
+        На каждые две задачи - один адрес, сотрудников - по одному на 500 задач (от 5 до 200),
+        акты - у части выполненных задач. Строки и даты берутся из справочников и не копируются,
+        пустые meters/acts/photos - общий кортеж; 500 тысяч задач занимают около 700 МБ.
+        """
+        rnd = random.Random(seed)
+        store = cls()
+        today = date.today()
+        dates = [(today - timedelta(days=offset)).isoformat() for offset in range(365 + 30)]
+
+        for emp_id in range(1, max(5, min(200, tasks // 500)) + 1):
+            last_name, first_name = rnd.choice(_LAST_NAMES), rnd.choice(_FIRST_NAMES)
+            store.employees[emp_id] = {
+                'emp_id': emp_id,
+                'last_name': last_name,
+                'first_name': first_name,
+                'full_name': f"{last_name} {first_name} {rnd.choice(_PATRONYMICS)}",
+                'post_name': rnd.choice(_POSTS),
+                'phone_number': f"+7900{emp_id:07d}",
+                'email': f"employee{emp_id}@example.com",
+                'health_status': 'здоров',
+                'login': f"employee{emp_id}",
+                'password': f"employee{emp_id}",
+            }
+        employees = list(store.employees.values())
+
+        for address_id in range(1, max(1, tasks // 2) + 1):
+            street_index = rnd.randrange(len(_STREETS))
+            hamlet_index = rnd.randrange(len(_HAMLETS))
+            city_index = rnd.randrange(len(_CITIES))
+            address_type = rnd.choice(_ADDRESS_TYPES)
+            store.addresses[address_id] = {
+                'address_id': address_id,
+                'customer_id': address_id,
+                'customer_full_name': f"{rnd.choice(_LAST_NAMES)} {rnd.choice(_FIRST_NAMES)} "
+                                      f"{rnd.choice(_PATRONYMICS)}",
+                'hamlet_id': hamlet_index,
+                'hamlet_name': _HAMLETS[hamlet_index],
+                'street_id': street_index + 1,
+                'street_name': _STREETS[street_index],
+                'city': _CITIES[city_index],
+                'district': _DISTRICTS[city_index],
+                'address_type': address_type,
+                'house_number': str(rnd.randint(1, 150)),
+                'apartment': str(rnd.randint(1, 200)) if address_type == 'квартира' else '',
+                'entrance': str(rnd.randint(1, 8)) if address_type == 'квартира' else '',
+                'area': round(rnd.uniform(25, 180), 1),
+                'standarts': rnd.randint(1, 5),
+                'registered_residing': rnd.randint(1, 6),
+                'personal_account': 100000 + address_id,
+                'phone_number': f"+7911{address_id:07d}" if rnd.random() < 0.8 else None,
+            }
+        addresses = list(store.addresses.values())
+
+        for task_id in range(1, tasks + 1):
+            address = rnd.choice(addresses)
+            status = rnd.choice(TASK_STATUSES)
+            task_age = rnd.randrange(30, 365 + 30)
+            employee = rnd.choice(employees) if status != 'не выполнен' or rnd.random() < 0.5 else None
+            task = {
+                'task_id': task_id,
+                'customer_name': address['customer_full_name'],
+                'address_id': address['address_id'],
+                'city': address['city'],
+                'district': address['district'],
+                'street': address['street_name'],
+                'hamlet': address['hamlet_name'],
+                'dom': address['house_number'],
+                'apartment': address['apartment'],
+                'entrance': address['entrance'],
+                'registered_residing': address['registered_residing'],
+                'address_status': address['address_type'],
+                'standarts': address['standarts'],
+                'area': address['area'],
+                'phone_number': address['phone_number'],
+                'personal_account': address['personal_account'],
+                'task_date': dates[task_age],
+                'remark': '',
+                'task_status': status,
+                'purpose': rnd.choice(_PURPOSES),
+                'saldo': round(rnd.uniform(-5000, 5000), 2),
+                'employer_name': employee['full_name'] if employee else '',
+                'employee_id': employee['emp_id'] if employee else None,
+                'date_end': dates[task_age - rnd.randrange(30)] if status == COMPLETED_STATUS else '',
+                'master': 'master',
+                'meters': (),
+                'acts': (),
+                'photos': (),
+            }
+            store.tasks[task_id] = task
+            store.task_revisions[task_id] = task_id
+
+            if status == COMPLETED_STATUS and rnd.random() < 0.1:
+                act_id = len(store.acts) + 1
+                store.acts[act_id] = store._make_act(act_id, task, address, rnd.choice(_ACT_REASONS))
+
+        store.revision = tasks
+        for dataset in DATASETS:
+            store.dataset_revisions[dataset] = store.revision
+        return store
+
+    @staticmethod
+    def _make_act(act_id: int, task: Dict[str, Any], address: Dict[str, Any], reason: str) -> Dict[str, Any]:
+        return {
+            'act_id': act_id,
+            'act_date': task['date_end'] or task['task_date'],
+            'act_reason': reason,
+            'task_id': task['task_id'],
+            'task_date': task['task_date'],
+            'task_date_end': task['date_end'],
+            'task_status': task['task_status'],
+            'task_fio_requestor': task['customer_name'],
+            'task_fio_employer': task['employer_name'],
+            'task_remark': task['remark'],
+            'address_city': address['city'],
+            'address_district': address['district'],
+            'address_type': address['address_type'],
+            'address_dom': address['house_number'],
+            'address_apartment': address['apartment'],
+            'address_entrance': address['entrance'],
+            'street_name': address['street_name'],
+            'hamlet_name': address['hamlet_name'],
+        }
+
+    def _next_revision(self) -> int:
+        self.revision += 1
+        return self.revision
+
+    def _touch(self, dataset: str) -> int:
+        revision = self._next_revision()
+        self.dataset_revisions[dataset] = revision
+        return revision
+
+    def upsert_task(self, task: Dict[str, Any]) -> Dict[str, Any]:
+        with self.lock:
+            task_id = task.get('task_id') or (max(self.tasks, default=0) + 1)
+            stored = {**self.tasks.get(task_id, {}), **task, 'task_id': task_id}
+            self.tasks[task_id] = stored
+            self.task_revisions[task_id] = self._touch('tasks')
+            self.deleted_tasks.pop(task_id, None)
+            return stored
+
+    def delete_tasks(self, task_ids: List[int]) -> int:
+        with self.lock:
+            deleted = 0
+            for task_id in task_ids:
+                if self.tasks.pop(task_id, None) is not None:
+                    self.task_revisions.pop(task_id, None)
+                    self.deleted_tasks[task_id] = self._touch('tasks')
+                    deleted += 1
+            return deleted
+
+    def upsert_employee(self, employee: Dict[str, Any]) -> Dict[str, Any]:
+        with self.lock:
+            emp_id = employee.get('emp_id') or (max(self.employees, default=0) + 1)
+            stored = {**self.employees.get(emp_id, {}), **employee, 'emp_id': emp_id}
+            if not employee.get('full_name'):
+                stored['full_name'] = " ".join(
+                    part for part in (stored.get('last_name'), stored.get('first_name'), stored.get('patronymic'))
+                    if part)
+            self.employees[emp_id] = stored
+            self._touch('employees')
+            return stored
+
+    def delete_employees(self, employee_ids: List[int]) -> int:
+        with self.lock:
+            deleted = sum(1 for emp_id in employee_ids if self.employees.pop(emp_id, None) is not None)
+            if deleted:
+                self._touch('employees')
+            return deleted
+
+    def add_notification(self, task_id: int, notification_type: str) -> Dict[str, Any]:
+        with self.lock:
+            notification = {
+                'id': len(self.notifications) + 1,
+                'task_id': task_id,
+                'notification_type': notification_type,
+                'created_at': datetime.now().isoformat(),
+                'is_showed': False,
+            }
+            self.notifications.append(notification)
+            self.notifications_changed.notify_all()
+            return notification
+
+    def notifications_after(self, last_id: int) -> List[Dict[str, Any]]:
+        with self.lock:
+            return [notification for notification in self.notifications if notification['id'] > last_id]
+
+    def task_changes(self, since: Optional[int]) -> Dict[str, Any]:
+        """Изменения задач после ревизии since (без since — полный снимок)"""
+        with self.lock:
+            since = since or 0
+            return {
+                'upserted': [self.tasks[task_id] for task_id, rev in self.task_revisions.items() if rev > since],
+                'deleted': [task_id for task_id, rev in self.deleted_tasks.items() if rev > since],
+                'watermark': str(self.revision),
+            }
+
+
+class LocalAPIServer:
+    """HTTP-сервер заглушки на стандартной библиотеке"""
+
+    # Сколько сериализованных тел больших списков держать (ключ - путь, параметры и ETag)
+    BODY_CACHE_SIZE = 16
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, store: Optional[LocalDataStore] = None,
+                 users: Optional[Dict[str, str]] = None, heartbeat_interval: float = 15,
+                 faults: Optional[FaultInjection] = None):
+        self.store = store or LocalDataStore()
+        self.heartbeat_interval = heartbeat_interval
+        self.faults = faults or FaultInjection()
+        self._bodies: "OrderedDict[Any, Encoded]" = OrderedDict()
+        self._bodies_lock = threading.Lock()
+        self._stopping = threading.Event()
+        self.users = users or {"master": "master"}
+        self.tokens: Dict[str, str] = {}
+        self.idempotent_responses: Dict[str, Any] = {}  # Idempotency-Key -> ответ
+        self._routes = []
+        self._register_routes()
+        self.httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "LocalAPIServer":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        # Завершаем открытые потоки уведомлений, иначе клиенты не заметят остановку
+        self._stopping.set()
+        with self.store.lock:
+            self.store.notifications_changed.notify_all()
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def route(self, method: str, pattern: str, handler, auth: bool = True) -> None:
+        self._routes.append((method, re.compile(f"^/{pattern}$"), handler, auth))
+
+    def _register_routes(self) -> None:
+        self.route("POST", "login", self._login, auth=False)
+        self.route("GET", "tasks/all", self._get_all_tasks)
+        self.route("GET", "tasks/changes", self._get_task_changes)
+        self.route("GET", "tasks/export_completed", self._export_completed_tasks)
+        self.route("GET", "tasks/unassigned", self._get_unassigned_tasks)
+        self.route("GET", r"tasks/(\d+)/details", self._get_task_details)
+        self.route("GET", "tasks/details", self._get_task_details_batch)
+        self.route("POST", "tasks/insert_from_json", self._insert_tasks)
+        self.route("POST", "tasks/changes_tasks", self._upsert_task)
+        self.route("DELETE", "tasks/delete", self._delete_tasks)
+        self.route("POST", "tasks/unassign", self._unassign_tasks)
+        self.route("POST", "employees/update_task_employer", self._set_employee_to_task)
+        self.route("GET", "addresses/full", self._get_all_addresses)
+        self.route("GET", r"addresses/(\d+)/details", self._get_address_details)
+        self.route("GET", "employees", self._get_all_employees)
+        self.route("GET", r"employees/(\d+)/details", self._get_employee_details)
+        self.route("POST", "employees/changes_employees", self._upsert_employee)
+        self.route("DELETE", "employees/delete", self._delete_employees)
+        self.route("GET", "acts", self._get_acts)
+        self.route("GET", "dashboard/stats", self._get_dashboard_stats)
+        self.route("GET", "notifications", self._get_notifications)
+        self.route("GET", "notifications/stream", self._stream_notifications)
+        self.route("POST", r"notifications/(\d+)/mark-as-shown", self._mark_notification_as_shown)
+        self.route("POST", "notifications/mark-as-shown", self._mark_notifications_as_shown)
+
+    # Обработчики
+
+    def _login(self, request: "Request"):
+        body = request.json or {}
+        username = body.get('username')
+        if not username or self.users.get(username) != body.get('password'):
+            return 401, {"detail": "Неверный логин или пароль"}
+        token = uuid.uuid4().hex
+        self.tokens[token] = username
+        return 200, {
+            'employee_id': 1,
+            'login': username,
+            'privileges': 1,
+            'first_name': username,
+            'last_name': '',
+            'access_token': token,
+        }
+
+    def _list_response(self, request: "Request", dataset: str, build: Callable[[], Any], depends_on=()):
+        """Ответ со списком набора dataset: ETag по ревизии набора, 304 на совпавший If-None-Match.
+
+        depends_on - наборы, от которых тоже зависит содержимое списка (их изменения меняют ETag).
+
+        Сериализованное тело запоминается до следующего изменения набора, чтобы при замерах
+        клиента сервер не тратил секунды на повторное кодирование сотен тысяч строк.
+        """
+        with self.store.lock:
+            revision = max(self.store.dataset_revisions[name] for name in (dataset, *depends_on))
+        etag = f'"{dataset}-{revision}"'
+        headers = {"ETag": etag}
+        if request.headers.get("If-None-Match") == etag:
+            return 304, None, headers
+
+        key = (request.path, tuple(sorted(request.query.items())), etag)
+        with self._bodies_lock:
+            body = self._bodies.get(key)
+            if body is not None:
+                self._bodies.move_to_end(key)
+        if body is None:
+            body = Encoded(encode_json(build()))
+            with self._bodies_lock:
+                self._bodies[key] = body
+                while len(self._bodies) > self.BODY_CACHE_SIZE:
+                    self._bodies.popitem(last=False)
+        return 200, body, headers
+
+    def _sorted_tasks(self) -> List[Dict[str, Any]]:
+        with self.store.lock:
+            return sorted(self.store.tasks.values(), key=lambda task: task['task_id'])
+
+    def _get_all_tasks(self, request: "Request"):
+        # Без limit - старый формат ответа (весь список, поддерживает условный GET), с limit - страница по курсору
+        if 'limit' not in request.query:
+            return self._list_response(request, 'tasks', lambda: self._project(
+                self._filter_tasks(self._sorted_tasks(), request.query), request.query))
+
+        with self.store.lock:
+            tasks = self._sorted_tasks()
+            watermark = str(self.store.revision)
+        tasks = self._filter_tasks(tasks, request.query)
+
+        limit = int(request.query['limit'])
+        cursor = int(request.query.get('cursor') or 0)
+        items = [task for task in tasks if task['task_id'] > cursor][:limit]
+        next_cursor = str(items[-1]['task_id']) if len(items) == limit else None
+        return 200, {'items': self._project(items, request.query), 'next_cursor': next_cursor, 'watermark': watermark}
+
+    @staticmethod
+    def _project(items: List[Dict[str, Any]], query: Dict[str, str]) -> List[Dict[str, Any]]:
+        """Проекция полей: fields=task_id,street,... (без параметра - все поля)"""
+        if not query.get('fields'):
+            return items
+        fields = query['fields'].split(',')
+        return [{field: item[field] for field in fields if field in item} for item in items]
+
+    @staticmethod
+    def _filter_tasks(tasks: List[Dict[str, Any]], query: Dict[str, str]) -> List[Dict[str, Any]]:
+        """Серверные фильтры tasks/all: master, status, district, employee_id, date_from, date_to"""
+        for field in ('master', 'task_status', 'district'):
+            param = 'status' if field == 'task_status' else field
+            if query.get(param):
+                tasks = [task for task in tasks if str(task.get(field, '')) == query[param]]
+        if query.get('employee_id'):
+            tasks = [task for task in tasks if str(task.get('employee_id', '')) == query['employee_id']]
+        if query.get('date_from'):
+            tasks = [task for task in tasks if str(task.get('task_date') or '') >= query['date_from']]
+        if query.get('date_to'):
+            tasks = [task for task in tasks if str(task.get('task_date') or '')[:10] <= query['date_to']]
+        return tasks
+
+    def _get_task_changes(self, request: "Request"):
+        since = request.query.get('since')
+        try:
+            since = int(since) if since else None
+        except ValueError:
+            return 400, {"detail": "Некорректный водяной знак"}
+        changes = self.store.task_changes(since)
+        changes['upserted'] = self._project(changes['upserted'], request.query)
+        return 200, changes
+
+    @staticmethod
+    def _task_details(task: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            'task': [task],
+            'acts': task.get('acts', []),
+            'meters': task.get('meters', []),
+            'photos': task.get('photos', []),
+        }
+
+    def _get_task_details(self, request: "Request"):
+        task = self.store.tasks.get(int(request.match.group(1)))
+        if task is None:
+            return 404, {"detail": "Задача не найдена"}
+        return 200, self._task_details(task)
+
+    def _get_task_details_batch(self, request: "Request"):
+        try:
+            task_ids = [int(task_id) for task_id in request.query.get('ids', '').split(',') if task_id]
+        except ValueError:
+            return 400, {"detail": "Некорректный список ids"}
+        return 200, {
+            str(task_id): self._task_details(self.store.tasks[task_id])
+            for task_id in task_ids if task_id in self.store.tasks
+        }
+
+    def _insert_tasks(self, request: "Request"):
+        # Повтор порции с тем же ключом не создает задачи второй раз
+        key = request.headers.get("Idempotency-Key")
+        if key and key in self.idempotent_responses:
+            return 200, self.idempotent_responses[key]
+
+        tasks = request.json or []
+        with self.store.lock:
+            inserted = [self.store.upsert_task({k: v for k, v in task.items() if k != 'task_id'})['task_id']
+                        for task in tasks]
+        response = {"inserted": len(inserted), "task_ids": inserted}
+        if key:
+            self.idempotent_responses[key] = response
+        return 200, response
+
+    def _upsert_task(self, request: "Request"):
+        task = dict(request.json or {})
+        if 'id' in task:
+            task['task_id'] = task.pop('id')
+        return 200, self.store.upsert_task(task)
+
+    def _delete_tasks(self, request: "Request"):
+        return 200, {"deleted": self.store.delete_tasks([int(task_id) for task_id in request.json or []])}
+
+    def _unassign_tasks(self, request: "Request"):
+        body = request.json or {}
+        with self.store.lock:
+            task_ids = [task_id for task_id in body.get('task_ids', []) if task_id in self.store.tasks]
+            for task_id in task_ids:
+                self.store.upsert_task({'task_id': task_id, 'employer_name': ''})
+        return 200, {"unassigned": len(task_ids)}
+
+    def _set_employee_to_task(self, request: "Request"):
+        body = request.json or {}
+        with self.store.lock:
+            task_ids = [task_id for task_id in body.get('task_ids', []) if task_id in self.store.tasks]
+            for task_id in task_ids:
+                self.store.upsert_task({'task_id': task_id, 'employee_id': body.get('emp_id'),
+                                        'employer_name': body.get('fio_name')})
+        return 200, {"updated": len(task_ids)}
+
+    def _export_completed_tasks(self, request: "Request"):
+        """Выполненные задачи с датой завершения в диапазоне start_date..end_date"""
+        start_date, end_date = request.query.get('start_date'), request.query.get('end_date')
+        tasks = [
+            task for task in self._sorted_tasks()
+            if task.get('task_status') == COMPLETED_STATUS
+            and (not start_date or str(task.get('date_end') or '') >= start_date)
+            and (not end_date or str(task.get('date_end') or '')[:10] <= end_date)
+        ]
+        return 200, {"tasks": tasks}
+
+    def _get_unassigned_tasks(self, request: "Request"):
+        return 200, [task for task in self._sorted_tasks() if not task.get('employer_name')]
+
+    def _get_all_addresses(self, request: "Request"):
+        def build():
+            with self.store.lock:
+                addresses = sorted(self.store.addresses.values(), key=lambda address: address['address_id'])
+            return self._project(addresses, request.query)
+
+        return self._list_response(request, 'addresses', build)
+
+    def _get_address_details(self, request: "Request"):
+        address_id = int(request.match.group(1))
+        address = self.store.addresses.get(address_id)
+        if address is None:
+            return 404, {"detail": "Адрес не найден"}
+        return 200, {
+            'address_info': {
+                'location': {
+                    'city': address['city'],
+                    'street': address['street_name'],
+                    'house': address['house_number'],
+                    'apartment': address['apartment'],
+                },
+                'customer': {
+                    'full_name': address['customer_full_name'],
+                    'personal_account': address.get('personal_account'),
+                    'phone': address.get('phone_number'),
+                },
+                'technical': {
+                    'area': address['area'],
+                    'standarts': address['standarts'],
+                    'registered_residing': address['registered_residing'],
+                    'address_type': address['address_type'],
+                },
+            },
+            'meters': [],
+            'tasks': [task for task in self._sorted_tasks() if task.get('address_id') == address_id],
+        }
+
+    def _employee_task_counts(self) -> Dict[str, Dict[str, int]]:
+        """Счетчики задач по исполнителю для списка сотрудников"""
+        today = date.today().isoformat()
+        counts: Dict[str, Dict[str, int]] = {}
+        for task in self._sorted_tasks():
+            name = task.get('employer_name')
+            if not name:
+                continue
+            stats = counts.setdefault(name, {'today': 0, 'executed_today': 0, 'unmade_today': 0, 'all_unmade': 0})
+            completed = task.get('task_status') == COMPLETED_STATUS
+            if not completed:
+                stats['all_unmade'] += 1
+            if str(task.get('task_date') or '')[:10] == today:
+                stats['today'] += 1
+                stats['executed_today' if completed else 'unmade_today'] += 1
+        return counts
+
+    def _get_all_employees(self, request: "Request"):
+        def build():
+            counts = self._employee_task_counts()
+            with self.store.lock:
+                employees = sorted(self.store.employees.values(), key=lambda employee: employee['emp_id'])
+            empty = {'today': 0, 'executed_today': 0, 'unmade_today': 0, 'all_unmade': 0}
+            rows = []
+            for employee in employees:
+                stats = counts.get(employee.get('full_name'), empty)
+                rows.append({
+                    'emp_id': employee['emp_id'],
+                    'full_name': employee.get('full_name', ''),
+                    'post_name': employee.get('post_name', ''),
+                    'phone_number': employee.get('phone_number', ''),
+                    'email': employee.get('email', ''),
+                    'health_status': employee.get('health_status', ''),
+                    'total_tasks_today': stats['today'],
+                    'total_tasks_executed_today': stats['executed_today'],
+                    'total_tasks_unmade_today': stats['unmade_today'],
+                    'total_tasks_all_unmade': stats['all_unmade'],
+                })
+            return self._project(rows, request.query)
+
+        # Счетчики задач в строках сотрудников меняются вместе с задачами
+        return self._list_response(request, 'employees', build, depends_on=('tasks',))
+
+    def _get_employee_details(self, request: "Request"):
+        employee = self.store.employees.get(int(request.match.group(1)))
+        if employee is None:
+            return 404, {"detail": "Сотрудник не найден"}
+        return 200, {
+            'employee': {field: employee.get(field, '') for field in (
+                'last_name', 'first_name', 'post_name', 'phone_number', 'email', 'login', 'password')},
+            'tasks': [task for task in self._sorted_tasks() if task.get('employee_id') == employee['emp_id']],
+        }
+
+    def _upsert_employee(self, request: "Request"):
+        employee = dict(request.json or {})
+        if 'id' in employee:
+            employee['emp_id'] = employee.pop('id')
+        return 200, self.store.upsert_employee(employee)
+
+    def _delete_employees(self, request: "Request"):
+        return 200, {"deleted": self.store.delete_employees([int(emp_id) for emp_id in request.json or []])}
+
+    def _get_acts(self, request: "Request"):
+        def build():
+            with self.store.lock:
+                acts = sorted(self.store.acts.values(), key=lambda act: act['act_id'])
+            return self._project(acts, request.query)
+
+        return self._list_response(request, 'acts', build)
+
+    def _get_dashboard_stats(self, request: "Request"):
+        """Статистика дашборда по задачам за период (task_date) и, при employee_id, одного сотрудника"""
+        start_date, end_date = request.query.get('start_date'), request.query.get('end_date')
+        employee_id = request.query.get('employee_id')
+        tasks = [
+            task for task in self._sorted_tasks()
+            if (not start_date or str(task.get('task_date') or '') >= start_date)
+            and (not end_date or str(task.get('task_date') or '')[:10] <= end_date)
+            and (not employee_id or str(task.get('employee_id')) == employee_id)
+        ]
+
+        by_status: Dict[str, int] = {}
+        by_month: Dict[str, int] = {}
+        by_employee: Dict[Any, List[int]] = {}
+        overdue = 0
+        today = date.today().isoformat()
+        for task in tasks:
+            status = task.get('task_status', '')
+            by_status[status] = by_status.get(status, 0) + 1
+            task_date = str(task.get('task_date') or '')
+            if len(task_date) >= 7:
+                month = f"{task_date[5:7]}-{task_date[:4]}"
+                by_month[month] = by_month.get(month, 0) + 1
+            if status == COMPLETED_STATUS and task.get('date_end') and task.get('employee_id'):
+                days = (date.fromisoformat(str(task['date_end'])[:10]) - date.fromisoformat(task_date[:10])).days
+                by_employee.setdefault(task['employee_id'], []).append(days)
+            elif status != COMPLETED_STATUS and task_date[:10] < today:
+                overdue += 1
+
+        all_days = [days for durations in by_employee.values() for days in durations]
+        return 200, {
+            'tasks_by_status': [{'status': status, 'count': count} for status, count in by_status.items()],
+            'tasks_by_month': [{'month': month, 'count': count}
+                               for month, count in sorted(by_month.items(), key=lambda item: item[0][3:] + item[0][:2])],
+            'employee_stats': [
+                {
+                    'employee_id': emp_id,
+                    'employee_name': self.store.employees.get(emp_id, {}).get('full_name', ''),
+                    'completed_tasks': len(durations),
+                    'avg_completion_time': round(sum(durations) / len(durations), 1),
+                }
+                for emp_id, durations in sorted(by_employee.items())
+            ],
+            'general_stats': {
+                'total_tasks': len(tasks),
+                'overdue_tasks': overdue,
+                'completed_tasks': by_status.get(COMPLETED_STATUS, 0),
+                'avg_completion_time': round(sum(all_days) / len(all_days), 1) if all_days else 0,
+            },
+        }
+
+    def _get_notifications(self, request: "Request"):
+        try:
+            since_id = int(request.query.get('since_id') or 0)
+        except ValueError:
+            return 400, {"detail": "Некорректный since_id"}
+        return 200, self.store.notifications_after(since_id)
+
+    def _mark_notification_as_shown(self, request: "Request"):
+        notification_id = int(request.match.group(1))
+        with self.store.lock:
+            for notification in self.store.notifications:
+                if notification['id'] == notification_id:
+                    notification['is_showed'] = True
+                    return 200, notification
+        return 404, {"detail": "Уведомление не найдено"}
+
+    def _mark_notifications_as_shown(self, request: "Request"):
+        ids = set((request.json or {}).get('ids', []))
+        with self.store.lock:
+            marked = [notification for notification in self.store.notifications if notification['id'] in ids]
+            for notification in marked:
+                notification['is_showed'] = True
+            return 200, marked
+
+    def _stream_notifications(self, request: "Request"):
+        """Поток SSE: новые уведомления по мере появления, heartbeat в паузах.
+
+        С заголовком Last-Event-ID сначала присылаются пропущенные после него уведомления.
+        """
+        store = self.store
+        last_event_id = request.headers.get("Last-Event-ID")
+        with store.lock:
+            last_id = int(last_event_id) if last_event_id else len(store.notifications)
+
+        def events():
+            nonlocal last_id
+            while not self._stopping.is_set():
+                with store.lock:
+                    fresh = store.notifications_after(last_id)
+                    if not fresh:
+                        store.notifications_changed.wait(timeout=self.heartbeat_interval)
+                        fresh = store.notifications_after(last_id)
+                if self._stopping.is_set():
+                    break
+                if not fresh:
+                    yield ": heartbeat\n\n"
+                for notification in fresh:
+                    last_id = notification['id']
+                    data = json.dumps(notification, ensure_ascii=False, default=str)
+                    yield f"id: {last_id}\nevent: notification\ndata: {data}\n\n"
+
+        return 200, events()
+
+    # Инфраструктура
+
+    def _dispatch(self, request: "Request"):
+        """(статус, тело[, заголовки]); тело None - ответ без тела, "disconnect" - оборвать соединение"""
+        delay = self.faults.delay()
+        if delay > 0:
+            time.sleep(delay)
+
+        for method, pattern, handler, auth in self._routes:
+            match = pattern.match(request.path)
+            if method == request.method and match:
+                if auth and self.faults.should_disconnect():
+                    return None, "disconnect"
+                if auth and self.faults.should_fail():
+                    return self.faults.error_status, {"detail": "Искусственная ошибка сервера"}
+                if auth and request.token not in self.tokens:
+                    return 401, {"detail": "Требуется авторизация"}
+                request.match = match
+                return handler(request)
+        return 404, {"detail": "Not Found"}
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _handle(self, method: str):
+                request = Request(self, method)
+                status, payload, *rest = server._dispatch(request)
+                headers = rest[0] if rest else {}
+                if status is None:
+                    # Имитация сбоя связи: клиент получит обрыв соединения, а не HTTP-ответ
+                    self.close_connection = True
+                elif inspect.isgenerator(payload):
+                    self._respond_stream(status, payload)
+                else:
+                    self._respond(status, payload, headers)
+
+            def _respond(self, status: int, payload: Any, headers: Dict[str, str]):
+                if payload is None:
+                    body = b""
+                elif isinstance(payload, Encoded):
+                    body = payload
+                else:
+                    body = encode_json(payload)
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                if status != 304:
+                    self.send_header("Content-Type", "application/json; charset=utf-8")
+                    self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                try:
+                    self._write(body)
+                except (BrokenPipeError, ConnectionResetError):
+                    self.close_connection = True
+
+            def _write(self, body: bytes):
+                """Отдать тело ответа, соблюдая ограничение пропускной способности"""
+                bandwidth = server.faults.bandwidth
+                if not bandwidth:
+                    self.wfile.write(body)
+                    return
+                # Кусками примерно по 50 мс передачи
+                chunk_size = max(1024, int(bandwidth / 20))
+                for offset in range(0, len(body), chunk_size):
+                    chunk = body[offset:offset + chunk_size]
+                    self.wfile.write(chunk)
+                    self.wfile.flush()
+                    time.sleep(len(chunk) / bandwidth)
+
+            def _respond_stream(self, status: int, chunks):
+                """Потоковый ответ (text/event-stream) с chunked-кодированием"""
+                self.send_response(status)
+                self.send_header("Content-Type", "text/event-stream; charset=utf-8")
+                self.send_header("Cache-Control", "no-cache")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                try:
+                    for chunk in chunks:
+                        data = chunk.encode('utf-8')
+                        self.wfile.write(f"{len(data):X}\r\n".encode('ascii') + data + b"\r\n")
+                        self.wfile.flush()
+                    self.wfile.write(b"0\r\n\r\n")
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+                finally:
+                    chunks.close()
+                    self.close_connection = True
+
+            def do_GET(self):
+                self._handle("GET")
+
+            def do_POST(self):
+                self._handle("POST")
+
+            def do_DELETE(self):
+                self._handle("DELETE")
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+class Request:
+    """Разобранный запрос к заглушке"""
+
+    def __init__(self, handler: BaseHTTPRequestHandler, method: str):
+        parsed = urlparse(handler.path)
+        self.method = method
+        self.path = parsed.path
+        self.query = {key: values[-1] for key, values in parse_qs(parsed.query).items()}
+        self.headers = handler.headers
+        self.match = None
+
+        length = int(handler.headers.get("Content-Length") or 0)
+        raw_body = handler.rfile.read(length) if length else b""
+        self.json = json.loads(raw_body) if raw_body else None
+
+        authorization = handler.headers.get("Authorization", "")
+        self.token = authorization[len("Bearer "):] if authorization.startswith("Bearer ") else None
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Локальный сервер-заглушка API")
+    parser.add_argument("port", nargs="?", type=int, default=8000)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--tasks", type=int, default=0, help="число синтетических задач (0 - пустой сервер)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--latency", type=float, default=0, help="задержка ответа, мс")
+    parser.add_argument("--jitter", type=float, default=0, help="случайная добавка к задержке, мс")
+    parser.add_argument("--bandwidth", type=float, default=None, help="пропускная способность, КБ/с")
+    parser.add_argument("--error-rate", type=float, default=0, help="доля ответов с ошибкой (0..1)")
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--disconnect-rate", type=float, default=0, help="доля оборванных соединений (0..1)")
+    args = parser.parse_args(argv)
+
+    store = LocalDataStore()
+    if args.tasks:
+        started = time.perf_counter()
+        store = LocalDataStore.synthetic(tasks=args.tasks, seed=args.seed)
+        print(f"Сгенерировано задач: {len(store.tasks)}, адресов: {len(store.addresses)}, "
+              f"сотрудников: {len(store.employees)}, актов: {len(store.acts)} "
+              f"за {time.perf_counter() - started:.1f} с")
+
+    faults = FaultInjection(
+        latency=args.latency / 1000,
+        jitter=args.jitter / 1000,
+        bandwidth=args.bandwidth * 1024 if args.bandwidth else None,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        disconnect_rate=args.disconnect_rate,
+        seed=args.seed,
+    )
+    local_server = LocalAPIServer(host=args.host, port=args.port, store=store, faults=faults)
+    print(f"Локальный сервер API запущен: {local_server.base_url}")
+    local_server.httpd.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+"""Метрики обращений к API.
+
+По каждому эндпоинту: число запросов и ошибок, гистограмма задержек, байты запроса и ответа,
+повторы и время разбора JSON. Отдельно - попадания и промахи локального кеша (select_server)
+и время этапов обработки (преобразование в кортежи, сборка DataFrame).
+
+    from src.database.api.metrics import metrics
+    metrics.endpoint("GET", "tasks/all")    # данные одного эндпоинта
+    print(metrics.report())                 # сводка, самые затратные сверху
+    metrics.dump("api_metrics.json")        # снимок в файл
+"""
+import json
+import re
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, Iterator, Optional
+
+# Верхние границы корзин гистограммы задержек (мс); последняя корзина - все, что дольше
+LATENCY_BUCKETS_MS = (10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+def endpoint_name(endpoint: str) -> str:
+    """Имя эндпоинта без идентификаторов: tasks/123/details -> tasks/{id}/details"""
+    return re.sub(r"(?<=/)\d+(?=/|$)", "{id}", endpoint.split("?", 1)[0])
+
+
+def body_size(body: Any) -> int:
+    """Размер тела запроса в байтах"""
+    if body is None:
+        return 0
+    if isinstance(body, str):
+        return len(body.encode('utf-8'))
+    try:
+        return len(body)
+    except TypeError:
+        return 0
+
+
+class Timing:
+    """Счетчик длительностей с гистограммой"""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+
+    def observe(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        milliseconds = seconds * 1000
+        for index, bound in enumerate(LATENCY_BUCKETS_MS):
+            if milliseconds <= bound:
+                self.buckets[index] += 1
+                return
+        self.buckets[-1] += 1
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Оценка перцентиля (мс) по гистограмме - верхняя граница корзины"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for index, bucket in enumerate(self.buckets):
+            seen += bucket
+            if seen >= rank:
+                return float(LATENCY_BUCKETS_MS[index]) if index < len(LATENCY_BUCKETS_MS) else self.max * 1000
+        return self.max * 1000
+
+    def as_dict(self) -> Dict[str, Any]:
+        histogram = {f"<={bound}ms": bucket for bound, bucket in zip(LATENCY_BUCKETS_MS, self.buckets)}
+        histogram[f">{LATENCY_BUCKETS_MS[-1]}ms"] = self.buckets[-1]
+        return {
+            'count': self.count,
+            'total_ms': round(self.total * 1000, 3),
+            'avg_ms': round(self.total * 1000 / self.count, 3) if self.count else None,
+            'max_ms': round(self.max * 1000, 3),
+            'p50_ms': self.percentile(0.5),
+            'p95_ms': self.percentile(0.95),
+            'histogram': histogram,
+        }
+
+
+class EndpointMetrics:
+    """Метрики одного эндпоинта (метод + путь)"""
+
+    def __init__(self):
+        self.latency = Timing()
+        self.decode = Timing()
+        self.errors = 0
+        self.retries = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.statuses: Dict[str, int] = {}
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            'requests': self.latency.count,
+            'errors': self.errors,
+            'retries': self.retries,
+            'bytes_in': self.bytes_in,
+            'bytes_out': self.bytes_out,
+            'statuses': dict(self.statuses),
+            'latency': self.latency.as_dict(),
+            'json_decode': self.decode.as_dict(),
+        }
+
+
+class APIMetrics:
+    """Накопитель метрик процесса (общий для синхронного и асинхронного клиентов)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started_at = datetime.now()
+        self._endpoints: Dict[str, EndpointMetrics] = {}
+        self._cache: Dict[str, Dict[str, int]] = {}
+        self._stages: Dict[str, Timing] = {}
+
+    def _endpoint(self, method: str, endpoint: str) -> EndpointMetrics:
+        key = f"{method} {endpoint_name(endpoint)}"
+        stats = self._endpoints.get(key)
+        if stats is None:
+            stats = self._endpoints[key] = EndpointMetrics()
+        return stats
+
+    def record_request(self, method: str, endpoint: str, status: Optional[int], seconds: float,
+                       bytes_out: int = 0, bytes_in: int = 0) -> None:
+        """Одна попытка запроса; status=None - сетевой сбой без ответа"""
+        with self._lock:
+            stats = self._endpoint(method, endpoint)
+            stats.latency.observe(seconds)
+            stats.bytes_out += bytes_out
+            stats.bytes_in += bytes_in
+            status_key = str(status) if status is not None else "network_error"
+            stats.statuses[status_key] = stats.statuses.get(status_key, 0) + 1
+            if status is None or status >= 400:
+                stats.errors += 1
+
+    def record_retry(self, method: str, endpoint: str) -> None:
+        with self._lock:
+            self._endpoint(method, endpoint).retries += 1
+
+    def record_decode(self, method: str, endpoint: str, seconds: float) -> None:
+        with self._lock:
+            self._endpoint(method, endpoint).decode.observe(seconds)
+
+    def record_cache(self, dataset: str, hit: bool) -> None:
+        with self._lock:
+            stats = self._cache.setdefault(dataset, {'hits': 0, 'misses': 0})
+            stats['hits' if hit else 'misses'] += 1
+
+    def record_stage(self, name: str, seconds: float) -> None:
+        with self._lock:
+            timing = self._stages.get(name)
+            if timing is None:
+                timing = self._stages[name] = Timing()
+            timing.observe(seconds)
+
+    @contextmanager
+    def measure(self, name: str) -> Iterator[None]:
+        """Замерить этап обработки: with metrics.measure("dataframe tasks"): ..."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record_stage(name, time.perf_counter() - started)
+
+    def endpoint(self, method: str, endpoint: str) -> Optional[Dict[str, Any]]:
+        """Метрики одного эндпоинта или None, если к нему не обращались"""
+        key = f"{method} {endpoint_name(endpoint)}"
+        with self._lock:
+            stats = self._endpoints.get(key)
+            return stats.as_dict() if stats is not None else None
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Все метрики в виде словаря"""
+        with self._lock:
+            return {
+                'started_at': self.started_at.isoformat(),
+                'collected_at': datetime.now().isoformat(),
+                'endpoints': {key: stats.as_dict() for key, stats in self._endpoints.items()},
+                'cache': {
+                    dataset: {**stats, 'hit_ratio': round(stats['hits'] / (stats['hits'] + stats['misses']), 3)}
+                    for dataset, stats in self._cache.items()
+                },
+                'stages': {name: timing.as_dict() for name, timing in self._stages.items()},
+            }
+
+    def report(self) -> str:
+        """Текстовая сводка: эндпоинты и этапы по убыванию суммарного времени"""
+        snapshot = self.snapshot()
+        lines = [f"{'Эндпоинт':<40} {'запр.':>6} {'ошиб.':>6} {'повт.':>6} {'p50 мс':>8} {'p95 мс':>8} "
+                 f"{'всего мс':>10} {'JSON мс':>9} {'получено':>12}"]
+        endpoints = sorted(snapshot['endpoints'].items(), key=lambda item: item[1]['latency']['total_ms'],
+                           reverse=True)
+        for key, stats in endpoints:
+            latency = stats['latency']
+            lines.append(f"{key:<40} {stats['requests']:>6} {stats['errors']:>6} {stats['retries']:>6} "
+                         f"{latency['p50_ms'] or 0:>8.0f} {latency['p95_ms'] or 0:>8.0f} {latency['total_ms']:>10.0f} "
+                         f"{stats['json_decode']['total_ms']:>9.0f} {stats['bytes_in']:>12}")
+
+        if snapshot['stages']:
+            lines.append("")
+            lines.append(f"{'Этап':<40} {'раз':>6} {'всего мс':>10} {'макс. мс':>10}")
+            stages = sorted(snapshot['stages'].items(), key=lambda item: item[1]['total_ms'], reverse=True)
+            for name, timing in stages:
+                lines.append(f"{name:<40} {timing['count']:>6} {timing['total_ms']:>10.0f} {timing['max_ms']:>10.0f}")
+
+        if snapshot['cache']:
+            lines.append("")
+            lines.append(f"{'Кеш':<40} {'попад.':>8} {'промах.':>8} {'доля':>6}")
+            for dataset, stats in sorted(snapshot['cache'].items()):
+                lines.append(f"{dataset:<40} {stats['hits']:>8} {stats['misses']:>8} {stats['hit_ratio']:>6.2f}")
+        return "\n".join(lines)
+
+    def dump(self, path: str) -> str:
+        """Записать снимок метрик в JSON-файл"""
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump(self.snapshot(), file, ensure_ascii=False, indent=2)
+        return path
+
+    def reset(self) -> None:
+        with self._lock:
+            self.started_at = datetime.now()
+            self._endpoints.clear()
+            self._cache.clear()
+            self._stages.clear()
+
+
+metrics = APIMetrics()
@@ -0,0 +1,134 @@
+"""Канал push-уведомлений от сервера (Server-Sent Events).
+
+Вместо периодического опроса списка уведомлений держим одно долгое соединение
+notifications/stream: сервер присылает событие сразу, как только оно появилось.
+Пока канал недоступен, вызывающий код может вернуться к опросу (см. PushChannel.connected).
+"""
+import json
+import threading
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional
+
+import requests
+
+from src.database.api.resilience import retry_delay
+
+
+def parse_sse(lines: Iterable[str]) -> Iterator[Dict[str, Any]]:
+    """Разобрать поток SSE на события {'id', 'event', 'data'}.
+
+    Строки-комментарии (": heartbeat") пропускаются; data в формате JSON разбирается.
+    """
+    event_id, event_type, data = None, 'message', []
+    for line in lines:
+        if not line:
+            if data:
+                payload = "\n".join(data)
+                try:
+                    payload = json.loads(payload)
+                except ValueError:
+                    pass
+                yield {'id': event_id, 'event': event_type, 'data': payload}
+            event_type, data = 'message', []
+            continue
+        if line.startswith(':'):
+            continue
+
+        field, _, value = line.partition(':')
+        if value.startswith(' '):
+            value = value[1:]
+        if field == 'data':
+            data.append(value)
+        elif field == 'event':
+            event_type = value
+        elif field == 'id':
+            event_id = value
+
+
+class PushChannel:
+    """Фоновое подключение к потоку уведомлений с переподключением.
+
+    client_factory возвращает API-клиент текущего пользователя (или None, если вход не выполнен).
+    on_event вызывается из фонового потока для каждого события, on_connect - после каждого
+    (пере)подключения, чтобы догрузить то, что могло прийти, пока канала не было.
+    """
+
+    def __init__(self, client_factory: Callable[[], Any],
+                 on_event: Callable[[Dict[str, Any]], None],
+                 on_connect: Optional[Callable[[], None]] = None,
+                 max_reconnect_delay: float = 60):
+        self.client_factory = client_factory
+        self.on_event = on_event
+        self.on_connect = on_connect
+        self.max_reconnect_delay = max_reconnect_delay
+        self.last_event_id: Optional[str] = None
+        self._connected = threading.Event()
+        self._stopped = threading.Event()
+        self._response: Optional[requests.Response] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def connected(self) -> bool:
+        """Канал открыт и события приходят без опроса"""
+        return self._connected.is_set()
+
+    @property
+    def stopped(self) -> bool:
+        """Канал остановлен (stop) - например, после выхода пользователя"""
+        return self._stopped.is_set()
+
+    def start(self) -> "PushChannel":
+        if self._thread is None or not self._thread.is_alive():
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stopped.set()
+        response = self._response
+        if response is not None:
+            response.close()
+
+    def _run(self) -> None:
+        attempt = 0
+        while not self._stopped.is_set():
+            try:
+                client = self.client_factory()
+                if client is not None:
+                    self._listen(client)
+                    attempt = 0
+            except Exception as e:
+                # stop() закрывает соединение из другого потока, чтение при этом падает с любой ошибкой
+                if not self._stopped.is_set():
+                    print(f"Канал уведомлений недоступен ({e}), используем опрос")
+            finally:
+                self._connected.clear()
+                self._response = None
+
+            self._stopped.wait(retry_delay(attempt, base=1, cap=self.max_reconnect_delay))
+            attempt += 1
+
+    def _listen(self, client) -> None:
+        response = client.open_notifications_stream(self.last_event_id)
+        self._response = response
+        with response:
+            response.encoding = response.encoding or 'utf-8'
+            self._connected.set()
+            print("Канал уведомлений подключен")
+            if self.on_connect is not None:
+                self._safe_call(self.on_connect)
+
+            # chunk_size=None: строки отдаются по мере прихода, а не после заполнения буфера
+            for event in parse_sse(response.iter_lines(chunk_size=None, decode_unicode=True)):
+                if self._stopped.is_set():
+                    break
+                if event['id']:
+                    self.last_event_id = event['id']
+                self._safe_call(self.on_event, event)
+
+    @staticmethod
+    def _safe_call(callback, *args) -> None:
+        try:
+            callback(*args)
+        except Exception as e:
+            print(f"Ошибка обработки события канала уведомлений: {e}")
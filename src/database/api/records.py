@@ -0,0 +1,281 @@
+"""Типизированные строки больших списков (задачи, адреса, акты, сотрудники) и быстрый разбор JSON.
+
+Строки - NamedTuple: это обычные кортежи (row[0], len(row), isinstance(row, tuple) работают как раньше),
+но без словаря атрибутов у каждого экземпляра и с именованными полями (row.task_id).
+
+Разбор JSON ускоряется, если установлены необязательные библиотеки:
+  - msgspec: список разбирается из байтов ответа сразу в структуры, без промежуточных словарей;
+  - orjson: быстрый разбор в словари, дальше строки собираются через operator.itemgetter.
+Без них используется стандартный json.
+"""
+import gc
+import hashlib
+import json
+import threading
+from contextlib import contextmanager
+from operator import itemgetter
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Sequence
+
+from src.config.config import APP_CONFIG
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    import msgspec
+    MSGSPEC_AVAILABLE = True
+except ImportError:
+    MSGSPEC_AVAILABLE = False
+
+
+# Сколько разборов сейчас держат сборщик выключенным и был ли он включен до первого из них
+_gc_lock = threading.Lock()
+_gc_pauses = 0
+_gc_was_enabled = False
+
+
+@contextmanager
+def gc_paused():
+    """Отключить циклический сборщик мусора на время массового создания объектов.
+
+    При разборе большого списка создаются миллионы словарей и кортежей, и сборщик запускается
+    сотни раз, обходя их все; циклов в этих данных нет, поэтому на время разбора он не нужен.
+    Сборщик общий для всего процесса, поэтому пауза включается настройкой gc_pause_bulk_decode
+    (по умолчанию выключена), а одновременные разборы из разных потоков ведут общий счетчик:
+    сборщик включается обратно, только когда закончился последний из них.
+    """
+    global _gc_pauses, _gc_was_enabled
+    if not APP_CONFIG.get('gc_pause_bulk_decode'):
+        yield
+        return
+
+    with _gc_lock:
+        if _gc_pauses == 0:
+            _gc_was_enabled = gc.isenabled()
+            gc.disable()
+        _gc_pauses += 1
+    try:
+        yield
+    finally:
+        with _gc_lock:
+            _gc_pauses -= 1
+            if _gc_pauses == 0 and _gc_was_enabled:
+                gc.enable()
+
+
+def loads(content: bytes) -> Any:
+    """Разобрать JSON (orjson, если установлен)"""
+    with gc_paused():
+        if ORJSON_AVAILABLE:
+            return orjson.loads(content)
+        return json.loads(content)
+
+
+class TaskRecord(NamedTuple):
+    """Задача из tasks/all (порядок полей - TASK_FIELDS в select_server)"""
+    task_id: int = 0  # ID задачи
+    customer_name: str = ''  # ФИО клиента
+    address_id: Any = ''  # Адрес клиента
+    city: str = ''  # Город
+    district: str = ''  # Район
+    street: str = ''  # Улица
+    hamlet: str = ''
+    dom: str = ''  # Дом
+    apartment: str = ''  # Квартира
+    entrance: str = ''  # Подъезд
+    registered_residing: Any = ''  # Зарегистрированные жильцы
+    address_status: str = ''  # Статус адреса
+    standarts: Any = ''  # Стандарты
+    area: Any = ''  # Площадь
+    phone_number: str = ''  # Телефон (null от сервера тоже заменяется на '')
+    personal_account: Any = 0  # Лицевой счет
+    task_date: str = ''  # Дата задачи
+    remark: str = ''  # Примечание
+    task_status: str = ''  # Статус задачи
+    purpose: str = ''  # Цель
+    saldo: Any = ''  # Сальдо
+    employer_name: str = ''
+    date_end: str = ''
+    master: str = ''
+    meters: Any = {}
+    acts: Any = {}
+    photos: Any = {}
+
+
+class AddressRecord(NamedTuple):
+    """Адрес из addresses/full"""
+    address_id: int = 0
+    customer_id: int = 0
+    customer_full_name: str = ''
+    hamlet_id: int = 0
+    hamlet_name: str = ''
+    street_id: int = 0
+    street_name: str = ''
+    city: str = ''
+    district: str = ''
+    address_type: str = ''
+    house_number: str = ''
+    apartment: str = ''
+    entrance: str = ''
+    area: Any = 0
+    standarts: Any = 0
+    registered_residing: Any = ''
+
+
+class EmployeeRecord(NamedTuple):
+    """Сотрудник из employees"""
+    emp_id: int = 0  # ID сотрудника
+    full_name: str = ''  # ФИО
+    post_name: str = ''  # Должность
+    phone_number: str = ''  # Номер телефона
+    email: str = ''  # Электронная почта
+    health_status: str = ''  # Статус здоровья
+    total_tasks_today: Any = ''  # Количество задач сегодня
+    total_tasks_executed_today: Any = ''  # Количество выполненных задач сегодня
+    total_tasks_unmade_today: Any = ''  # Количество невыполненных задач сегодня
+    total_tasks_all_unmade: Any = ''
+
+
+class ActRecord(NamedTuple):
+    """Акт из acts"""
+    act_id: int = 0
+    act_date: str = ''
+    act_reason: str = ''
+    task_id: int = 0
+    task_date: str = ''
+    task_date_end: str = ''
+    task_status: str = ''
+    task_fio_requestor: str = ''
+    task_fio_employer: str = ''
+    task_remark: str = ''
+    address_city: str = ''
+    address_district: str = ''
+    address_type: str = ''
+    address_dom: str = ''
+    address_apartment: str = ''
+    address_entrance: str = ''
+    street_name: str = ''
+    hamlet_name: str = ''
+
+
+_MISSING = object()
+
+
+def _fresh(default: Any) -> Any:
+    """Изменяемое значение по умолчанию копируется, чтобы строки не делили один словарь"""
+    return default.copy() if isinstance(default, (dict, list)) else default
+
+
+class RecordCodec:
+    """Сборка строк record из словарей ответа или напрямую из байтов JSON.
+
+    null_defaults - поля, в которых null от сервера заменяется значением по умолчанию.
+    """
+
+    def __init__(self, record, null_defaults: Sequence[str] = ()):
+        self.record = record
+        self.fields = record._fields
+        self.defaults = record._field_defaults
+        self._null_positions = [(self.fields.index(name), self.defaults[name]) for name in null_defaults]
+        self._getters: Dict[int, Any] = {}
+        self._struct_decoder = None
+
+    def from_dict(self, item: Dict[str, Any]):
+        """Одна строка; отсутствующие поля - значения по умолчанию"""
+        values = []
+        for name in self.fields:
+            value = item.get(name, _MISSING)
+            values.append(_fresh(self.defaults[name]) if value is _MISSING else value)
+        return self._make(values)
+
+    def _make(self, values):
+        for position, default in self._null_positions:
+            if values[position] is None:
+                values = list(values)
+                values[position] = default
+        return tuple.__new__(self.record, values)
+
+    def _prefix_length(self, fields: Optional[Sequence[str]]) -> int:
+        """Сколько первых полей записи есть в ответе: вся запись или проекция-префикс (TASK_FIELDS_TABLE)"""
+        if fields and tuple(fields) == self.fields[:len(fields)]:
+            return len(fields)
+        return len(self.fields) if not fields else 0
+
+    def _getter(self, count: int):
+        getter = self._getters.get(count)
+        if getter is None:
+            names = self.fields[:count]
+            getter = itemgetter(*names) if count > 1 else (lambda item: (item[names[0]],))
+            self._getters[count] = getter
+        return getter
+
+    def convert(self, items: Iterable[Dict[str, Any]], fields: Optional[Sequence[str]] = None) -> List[Any]:
+        """Список словарей -> список строк.
+
+        Если в словаре есть все ожидаемые поля, значения забираются одним вызовом itemgetter;
+        иначе строка собирается по полям с значениями по умолчанию, как from_dict.
+        """
+        with gc_paused():
+            return self._convert(items, fields)
+
+    def _convert(self, items: Iterable[Dict[str, Any]], fields: Optional[Sequence[str]]) -> List[Any]:
+        count = self._prefix_length(fields)
+        if not count:
+            return [self.from_dict(item) for item in items]
+
+        getter = self._getter(count)
+        tail = [self.defaults[name] for name in self.fields[count:]]
+        tail_is_mutable = any(isinstance(default, (dict, list)) for default in tail)
+        tail = tuple(tail)
+        rows = []
+        for item in items:
+            try:
+                values = getter(item)
+            except KeyError:
+                rows.append(self.from_dict(item))
+                continue
+            if tail:
+                values += tuple(_fresh(default) for default in tail) if tail_is_mutable else tail
+            rows.append(self._make(values))
+        return rows
+
+    def _decoder(self):
+        """Декодер msgspec: JSON-список -> структуры с теми же полями и значениями по умолчанию"""
+        if self._struct_decoder is None:
+            struct = msgspec.defstruct(
+                f"{self.record.__name__}Struct",
+                [(name, Any, self.defaults[name]) for name in self.fields],
+            )
+            self._struct_decoder = msgspec.json.Decoder(List[struct])
+        return self._struct_decoder
+
+    def decode(self, content: bytes, fields: Optional[Sequence[str]] = None) -> List[Any]:
+        """Байты ответа (JSON-список объектов) -> список строк"""
+        with gc_paused():
+            if MSGSPEC_AVAILABLE:
+                astuple = msgspec.structs.astuple
+                return [self._make(astuple(item)) for item in self._decoder().decode(content)]
+            data = orjson.loads(content) if ORJSON_AVAILABLE else json.loads(content)
+            return self._convert(data, fields)
+
+
+TASKS = RecordCodec(TaskRecord, null_defaults=('phone_number',))
+ADDRESSES = RecordCodec(AddressRecord)
+EMPLOYEES = RecordCodec(EmployeeRecord)
+ACTS = RecordCodec(ActRecord)
+
+
+def schema_version(*records) -> str:
+    """Короткий хеш описаний строк: меняется при любом изменении состава, порядка или умолчаний полей"""
+    description = ";".join(
+        f"{record.__name__}:" + ",".join(f"{name}={record._field_defaults.get(name)!r}" for name in record._fields)
+        for record in records
+    )
+    return hashlib.sha1(description.encode('utf-8')).hexdigest()[:8]
+
+
+# Версия строк в локальном кеше: снимки, сохраненные с другими описаниями строк, не читаются
+SCHEMA_VERSION = schema_version(TaskRecord, AddressRecord, EmployeeRecord, ActRecord)
@@ -0,0 +1,100 @@
+import random
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+import requests
+
+# Таймаут по умолчанию: (подключение, чтение) в секундах
+DEFAULT_TIMEOUT: Tuple[float, float] = (5, 30)
+
+# Ответы, после которых запрос имеет смысл повторить
+RETRYABLE_STATUSES = {429, 502, 503, 504}
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """Сервер недоступен: автомат разомкнут, запрос не отправлялся"""
+
+
+class CircuitBreaker:
+    """Автомат отключения: после серии сбоев подряд запросы не отправляются reset_timeout секунд.
+
+    По истечении паузы пропускается один пробный запрос: при успехе автомат замыкается,
+    при сбое снова размыкается на reset_timeout.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state_locked()
+
+    @property
+    def is_open(self) -> bool:
+        return self.state != self.CLOSED
+
+    def _state_locked(self) -> str:
+        if self._opened_at is None:
+            return self.CLOSED
+        if time.monotonic() - self._opened_at >= self.reset_timeout:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    def allow_request(self) -> bool:
+        """Можно ли отправить запрос сейчас"""
+        with self._lock:
+            state = self._state_locked()
+            if state == self.HALF_OPEN:
+                # Пропускаем один пробный запрос, остальные ждут его результата еще reset_timeout
+                self._opened_at = time.monotonic()
+                return True
+            return state == self.CLOSED
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._failures >= self.failure_threshold:
+                if self._opened_at is None:
+                    print(f"Сервер недоступен ({self._failures} сбоев подряд), переходим на кешированные данные")
+                self._opened_at = time.monotonic()
+
+
+# Один автомат на сервер: его состояние общее для синхронных и асинхронных клиентов
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_circuit_breaker(base_url: str, failure_threshold: int = 5, reset_timeout: float = 30) -> CircuitBreaker:
+    """Получить автомат отключения для сервера base_url"""
+    with _breakers_lock:
+        breaker = _breakers.get(base_url)
+        if breaker is None:
+            breaker = CircuitBreaker(failure_threshold, reset_timeout)
+            _breakers[base_url] = breaker
+        return breaker
+
+
+def endpoint_timeout(endpoint: str, timeouts: Optional[Dict[str, Tuple[float, float]]] = None) -> Tuple[float, float]:
+    """Таймаут для эндпоинта (для больших списков чтение дольше, чем для деталей)"""
+    timeouts = timeouts or {}
+    return timeouts.get(endpoint, timeouts.get('default', DEFAULT_TIMEOUT))
+
+
+def retry_delay(attempt: int, base: float = 0.5, cap: float = 8.0) -> float:
+    """Пауза перед повтором: экспоненциальный рост со случайным разбросом (full jitter)"""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
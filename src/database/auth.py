@@ -1,5 +1,6 @@
 from src.core.session_manager import session_manager
 from src.database.api.api_master import create_master_api_client
+from src.database.local_cache import cache
 from src.ui.components.navigations import role_definition
 from src.utils.show_snack_bar import show_snack_bar
 
@@ -8,17 +9,19 @@ def check_user_credentials(login, password, page):
     """Проверка учетных данных пользователя через API"""
     try:
         # Создаем API-клиента с переданными учетными данными
-        api_client = create_master_api_client(login, password)
+        api_client = create_master_api_client(login, password=password)
         
-        # Вызываем метод авторизации
+        # Вызываем метод авторизации (клиент сохраняет выданный токен)
         auth_response = api_client.login()
         
         # Проверяем успешность авторизации
-        if auth_response and 'employee_id' in auth_response:
-            # Подготавливаем данные сессии
+        if auth_response and 'employee_id' in auth_response and auth_response.get('access_token'):
+            # Подготавливаем данные сессии: запросы к API идут с токеном,
+            # пароль хранится только для повторного входа при истечении токена
             session_data = {
                 'login': auth_response['login'],
                 'password': password,
+                'token': auth_response['access_token'],
                 'privileges': auth_response['privileges'],
                 'first_name': auth_response['first_name'],
                 'last_name': auth_response['last_name']
@@ -30,6 +33,8 @@ def check_user_credentials(login, password, page):
                     auth_response['employee_id'], 
                     session_data
                 )
+                # Локальный кеш - только данные этого мастера
+                cache.use_namespace(auth_response['employee_id'])
                 role_definition(page)
                 return True
             else:
@@ -1,8 +1,7 @@
 from src.core.session_manager import SessionManager
 
 
-def get_session_credentials():
-    """Получить логин и пароль из текущей сессии"""
+def _get_current_session():
     session_manager = SessionManager()
     current_user_id = session_manager.get_current_user_id()
 
@@ -14,9 +13,39 @@ def get_session_credentials():
 
     if session_data is None:
         print("DEBUG: Сессия не найдена")
+        return current_user_id, None
+
+    return current_user_id, session_data
+
+
+def get_session_credentials():
+    """Получить логин и токен доступа из текущей сессии"""
+    _, session_data = _get_current_session()
+
+    if session_data is None:
         return None, None
 
     login = session_data.get('login')
-    password = session_data.get('password')
+    token = session_data.get('token')
+
+    return login, token
+
+
+def get_session_password():
+    """Получить пароль текущей сессии (нужен только для повторного входа при истечении токена)"""
+    _, session_data = _get_current_session()
+
+    if session_data is None:
+        return None
+
+    return session_data.get('password')
+
+
+def store_session_token(token: str) -> None:
+    """Сохранить обновленный токен доступа в текущей сессии"""
+    current_user_id, session_data = _get_current_session()
+
+    if session_data is None:
+        return
 
-    return login, password
+    SessionManager().update_session(current_user_id, {'token': token})
@@ -0,0 +1,419 @@
+"""Локальный кеш приложения: diskcache на диске и LRU-уровень в памяти процесса над ним.
+
+Один экземпляр (cache) используют select_server, modification_server, delete_server и outbox,
+поэтому любая запись, удаление или сброс по тегу сразу видны и в памяти, и на диске.
+
+Чтение сначала ищет готовый (уже распакованный) снимок в памяти - повторное открытие вкладки
+со списком задач не распаковывает его с диска заново. Объем уровня в памяти ограничен
+в байтах (APP_CONFIG['cache_memory_limit']), давно не использованные записи вытесняются.
+Каждая запись получает номер версии, растущий при каждом изменении ключа (cache.version).
+
+У записи, кроме единственного тега diskcache, может быть несколько тегов зависимостей
+(tags=["task:123", "address:45", "dataset:tasks"]). Индекс тег -> ключи хранится на диске рядом
+с данными, cache.invalidate("task:123") удаляет все записи, собранные из этой задачи.
+
+Ключи хранятся в пространстве имен пользователя и версии схемы ("7@1.e2022a5b"): вызывающий код
+пишет "all_tasks", на диске это ("7@1.e2022a5b", "all_tasks"). Другой мастер на том же компьютере
+не видит чужих снимков, а после изменения описания строк (records) старые снимки не читаются.
+Записи чужих и устаревших пространств имен удаляются в фоновом потоке после входа пользователя.
+Фоновые загрузки привязываются к пространству, в котором начались (cache.bind, cache.bound):
+если за время загрузки пользователь сменился, их записи отбрасываются, а чтения ничего не находят.
+
+Снимки из памяти отдаются без копирования: изменять их на месте нельзя, только записывать
+новый объект через set.
+"""
+import functools
+import sys
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Set
+
+from diskcache import Cache
+
+from src.config.config import APP_CONFIG
+from src.core.session_manager import session_manager
+from src.database.api.records import SCHEMA_VERSION
+
+# Сколько элементов коллекции просматривать при оценке ее размера
+_SIZE_SAMPLE = 64
+
+# Ключи индекса тегов - кортежи (TAG_INDEX, тег), строковые ключи данных с ними не пересекаются
+TAG_INDEX = "__tag_index__"
+
+# Формат снимков, не описанных в records (детали, уведомления, служебные ключи): увеличивается
+# при изменении их структуры, как и SCHEMA_VERSION, делает прежние записи недоступными
+CACHE_FORMAT = 1
+
+# Пространство имен, к которому привязан текущий поток или задача asyncio (None - текущее пространство кеша)
+_bound_namespace: ContextVar[Optional[str]] = ContextVar('cache_bound_namespace', default=None)
+
+
+def _shallow_size(value: Any) -> int:
+    size = sys.getsizeof(value)
+    if isinstance(value, (tuple, list)):
+        size += sum(sys.getsizeof(item) for item in value)
+    elif isinstance(value, dict):
+        size += sum(sys.getsizeof(key) + sys.getsizeof(item) for key, item in value.items())
+    return size
+
+
+def estimate_size(value: Any) -> int:
+    """Примерный размер снимка в байтах: контейнер плюс выборка элементов, умноженная на их число"""
+    if isinstance(value, dict):
+        items = list(value.values())
+        size = sys.getsizeof(value) + sum(sys.getsizeof(key) for key in list(value)[:_SIZE_SAMPLE])
+    elif isinstance(value, (list, tuple)):
+        items = value
+        size = sys.getsizeof(value)
+    else:
+        return _shallow_size(value)
+
+    if not items:
+        return size
+    step = max(1, len(items) // _SIZE_SAMPLE)
+    sample = [items[index] for index in range(0, len(items), step)][:_SIZE_SAMPLE]
+    return size + sum(_shallow_size(item) for item in sample) * len(items) // len(sample)
+
+
+class _Entry:
+    __slots__ = ('value', 'size', 'version', 'expire_time', 'tag')
+
+    def __init__(self, value, size, version, expire_time, tag):
+        self.value = value
+        self.size = size
+        self.version = version
+        self.expire_time = expire_time
+        self.tag = tag
+
+
+class TieredCache:
+    """diskcache.Cache с ограниченным по объему LRU-уровнем в памяти (L1).
+
+    Поддерживает те операции Cache, которыми пользуется приложение; запись идет на диск
+    и сразу в память (write-through), удаление и сброс по тегу убирают запись из обоих уровней.
+    Все операции работают в пространстве имен текущего пользователя (use_namespace).
+    """
+
+    def __init__(self, directory: str, max_bytes: int, schema: str = SCHEMA_VERSION):
+        self.disk = Cache(directory)
+        self.max_bytes = max_bytes
+        self.schema = f"{CACHE_FORMAT}.{schema}"
+        self._namespace: Optional[str] = None
+        self._lock = threading.RLock()
+        self._entries: "OrderedDict[Any, _Entry]" = OrderedDict()
+        self._bytes = 0
+        self._version = 0
+        self._versions: Dict[Any, int] = {}
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def directory(self) -> str:
+        return self.disk.directory
+
+    # Пространство имен пользователя и версии схемы
+
+    @property
+    def namespace(self) -> str:
+        """Текущее пространство имен; до входа определяется по активной сессии"""
+        if self._namespace is None:
+            self.use_namespace(session_manager.get_current_user_id())
+        return self._namespace
+
+    def use_namespace(self, user_id: Any) -> str:
+        """Работать с записями пользователя user_id; записи других пользователей и прежних
+        версий схемы удаляются в фоне. Возвращает имя пространства."""
+        namespace = f"{user_id if user_id is not None else 'anonymous'}@{self.schema}"
+        with self._lock:
+            if namespace == self._namespace:
+                return namespace
+            self._namespace = namespace
+            # Снимки прежнего пользователя не должны оставаться в памяти
+            self._entries.clear()
+            self._bytes = 0
+
+        # До входа пользователя (user_id=None) чужие записи не трогаем - он может оказаться их владельцем
+        if user_id is not None:
+            threading.Thread(target=self.evict_foreign, args=(namespace,), daemon=True,
+                             name="cache-evict").start()
+        return namespace
+
+    def evict_foreign(self, namespace: Optional[str] = None) -> int:
+        """Удалить с диска записи всех пространств имен, кроме namespace (по умолчанию текущего),
+        включая ключи без пространства имен от прежних версий приложения; возвращает число удаленных"""
+        namespace = namespace or self.namespace
+        removed = 0
+        for key in list(self.disk.iterkeys()):
+            if namespace != self._namespace:
+                # Пользователь сменился - очисткой займется поток нового пространства
+                break
+            if not (isinstance(key, tuple) and len(key) == 2 and key[0] == namespace):
+                removed += bool(self.disk.delete(key))
+        if removed:
+            print(f"Локальный кеш: удалено записей других пользователей и прежних версий: {removed}")
+        return removed
+
+    @contextmanager
+    def bound(self, namespace: Optional[str] = None) -> Iterator[None]:
+        """Выполнять операции с кешем от имени пространства namespace (по умолчанию уже привязанного или текущего)"""
+        token = _bound_namespace.set(namespace or _bound_namespace.get() or self.namespace)
+        try:
+            yield
+        finally:
+            _bound_namespace.reset(token)
+
+    def bind(self, function: Callable) -> Callable:
+        """Обернуть function для фонового запуска: она работает с пространством, текущим на момент bind"""
+        namespace = _bound_namespace.get() or self.namespace
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with self.bound(namespace):
+                return function(*args, **kwargs)
+
+        return wrapper
+
+    def detached(self) -> bool:
+        """Операция выполняется от имени прежнего пользователя - ее записи и чтения не должны затронуть нового"""
+        bound = _bound_namespace.get()
+        return bound is not None and bound != self.namespace
+
+    def _key(self, key) -> tuple:
+        return self.namespace, key
+
+    def _disk_tag(self, tag: Optional[str]) -> Optional[str]:
+        return f"{self.namespace}|{tag}" if tag is not None else None
+
+    @staticmethod
+    def _user_tag(disk_tag: Optional[str]) -> Optional[str]:
+        return disk_tag.partition("|")[2] if disk_tag is not None else None
+
+    # Уровень в памяти (ключи - с пространством имен)
+
+    def _bump(self, key) -> int:
+        self._version += 1
+        self._versions[key] = self._version
+        return self._version
+
+    def _drop(self, key) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry.size
+
+    def _remember(self, key, value, expire_time, tag, version: Optional[int] = None) -> None:
+        size = estimate_size(value)
+        self._drop(key)
+        # Слишком большой снимок вытеснил бы все остальные - он читается с диска
+        if size > self.max_bytes // 2:
+            return
+        version = version if version is not None else self._versions.get(key) or self._bump(key)
+        self._entries[key] = _Entry(value, size, version, expire_time, tag)
+        self._bytes += size
+        while self._bytes > self.max_bytes and self._entries:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= evicted.size
+
+    def _lookup(self, key) -> Optional[_Entry]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.expire_time is not None and entry.expire_time <= time.time():
+            self._drop(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    # Операции Cache
+
+    def get(self, key, default=None, expire_time: bool = False, tag: bool = False):
+        with self._lock:
+            key = self._key(key)
+            entry = self._lookup(key)
+            if self.detached():
+                value = entry_expire = entry_tag = None
+            elif entry is not None:
+                self.hits += 1
+                value, entry_expire, entry_tag = entry.value, entry.expire_time, entry.tag
+            else:
+                self.misses += 1
+                value, entry_expire, entry_tag = self.disk.get(key, expire_time=True, tag=True)
+                entry_tag = self._user_tag(entry_tag)
+                if value is not None:
+                    self._remember(key, value, entry_expire, entry_tag)
+
+        if value is None:
+            value, entry_expire, entry_tag = default, None, None
+        if expire_time and tag:
+            return value, entry_expire, entry_tag
+        if expire_time:
+            return value, entry_expire
+        if tag:
+            return value, entry_tag
+        return value
+
+    def __getitem__(self, key):
+        value = self.get(key)
+        if value is None and key not in self:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key) -> bool:
+        with self._lock:
+            if self.detached():
+                return False
+            key = self._key(key)
+            if self._lookup(key) is not None:
+                return True
+        return key in self.disk
+
+    def set(self, key, value, expire: Optional[float] = None, tag: Optional[str] = None,
+            tags: Iterable[str] = (), **kwargs) -> bool:
+        with self._lock:
+            if self.detached():
+                return False
+            disk_key = self._key(key)
+            result = self.disk.set(disk_key, value, expire=expire, tag=self._disk_tag(tag), **kwargs)
+            if tags:
+                self._index(key, tags, expire)
+            version = self._bump(disk_key)
+            self._remember(disk_key, value, time.time() + expire if expire else None, tag, version)
+            return result
+
+    def delete(self, key, **kwargs) -> bool:
+        with self._lock:
+            if self.detached():
+                return False
+            key = self._key(key)
+            self._drop(key)
+            self._bump(key)
+            return self.disk.delete(key, **kwargs)
+
+    def touch(self, key, expire: Optional[float] = None, **kwargs) -> bool:
+        with self._lock:
+            if self.detached():
+                return False
+            key = self._key(key)
+            result = self.disk.touch(key, expire=expire, **kwargs)
+            entry = self._entries.get(key)
+            if entry is not None:
+                if result:
+                    entry.expire_time = time.time() + expire if expire else None
+                else:
+                    self._drop(key)
+            return result
+
+    def incr(self, key, delta: int = 1, default: int = 0, **kwargs) -> int:
+        with self._lock:
+            if self.detached():
+                return default
+            key = self._key(key)
+            self._drop(key)
+            self._bump(key)
+            return self.disk.incr(key, delta, default, **kwargs)
+
+    def evict(self, tag: str, **kwargs) -> int:
+        with self._lock:
+            if self.detached():
+                return 0
+            namespace = self.namespace
+            for key in [key for key, entry in self._entries.items() if key[0] == namespace and entry.tag == tag]:
+                self._drop(key)
+                self._bump(key)
+            return self.disk.evict(self._disk_tag(tag), **kwargs)
+
+    def clear(self, **kwargs) -> int:
+        """Очистить кеш целиком - записи всех пользователей"""
+        with self._lock:
+            for key in list(self._entries):
+                self._bump(key)
+            self._entries.clear()
+            self._bytes = 0
+            return self.disk.clear(**kwargs)
+
+    # Теги зависимостей
+
+    def _index(self, key, tags: Iterable[str], expire: Optional[float]) -> None:
+        """Добавить ключ в индекс тегов; запись индекса живет не меньше самой долгой записи с этим тегом"""
+        now = time.time()
+        with self.disk.transact():
+            for name in tags:
+                index_key = self._key((TAG_INDEX, name))
+                keys, expire_time = self.disk.get(index_key, default=None, expire_time=True)
+                if keys is not None and key in keys and \
+                        (expire_time is None or expire is not None and expire_time >= now + expire):
+                    continue
+                if keys is None:
+                    keys, remaining = set(), expire
+                elif expire is None or expire_time is None:
+                    remaining = None
+                else:
+                    remaining = max(expire, expire_time - now)
+                keys.add(key)
+                self.disk.set(index_key, keys, expire=remaining)
+
+    def tagged(self, *tags: str) -> Set[Any]:
+        """Ключи, записанные хотя бы с одним из тегов (записи могли уже истечь)"""
+        keys = set()
+        if self.detached():
+            return keys
+        for name in tags:
+            keys.update(self.disk.get(self._key((TAG_INDEX, name)), default=()))
+        return keys
+
+    def invalidate(self, *tags: str) -> int:
+        """Удалить все записи с любым из тегов из обоих уровней; возвращает число удаленных"""
+        removed = 0
+        with self._lock:
+            if self.detached():
+                return removed
+            for key in self.tagged(*tags):
+                removed += bool(self.delete(key))
+            for name in tags:
+                self.disk.delete(self._key((TAG_INDEX, name)))
+        return removed
+
+    @contextmanager
+    def transact(self, retry: bool = False) -> Iterator[None]:
+        """Транзакция diskcache. Блокировка уровня в памяти берется раньше блокировки записи SQLite,
+        в том же порядке, что и в set/delete: иначе поток внутри set ждал бы транзакцию,
+        удерживая блокировку, нужную самой транзакции"""
+        with self._lock:
+            with self.disk.transact(retry):
+                yield
+
+    def iterkeys(self, reverse: bool = False) -> Iterator[Any]:
+        """Ключи текущего пространства имен, без самого пространства"""
+        if self.detached():
+            return
+        namespace = self.namespace
+        for key in self.disk.iterkeys(reverse):
+            if isinstance(key, tuple) and len(key) == 2 and key[0] == namespace:
+                yield key[1]
+
+    def close(self) -> None:
+        self.disk.close()
+
+    def version(self, key) -> int:
+        """Номер версии ключа: меняется при каждой записи, удалении или сбросе; 0 - ключ не менялся"""
+        with self._lock:
+            return 0 if self.detached() else self._versions.get(self._key(key), 0)
+
+    def memory_stats(self) -> Dict[str, Any]:
+        """Состояние уровня в памяти: записи, занятый объем, попадания и промахи"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'namespace': self._namespace,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / total, 3) if total else None,
+            }
+
+
+cache = TieredCache('./local_cache', max_bytes=APP_CONFIG['cache_memory_limit'])
@@ -86,6 +86,15 @@ class AddNewTaskDialog(ft.Row):
 
         self.status_message = ft.Text("", color=self.PRIMARY_BLUE)
 
+        # Прогресс отправки: задачи уходят на сервер порциями
+        self.progress_bar = ft.ProgressBar(
+            value=0,
+            width=500,
+            color=self.PRIMARY_BLUE,
+            bgcolor=self.LIGHT_BLUE,
+            visible=False
+        )
+
         self.dialog = self.build()
 
     def build(self):
@@ -100,12 +109,13 @@ class AddNewTaskDialog(ft.Row):
                                  alignment=ft.alignment.center, width=600),
                     ft.Row([self.transform_btn, self.upload_btn],
                            alignment=ft.MainAxisAlignment.CENTER),
+                    self.progress_bar,
                     self.status_message
                 ], horizontal_alignment=ft.CrossAxisAlignment.CENTER, spacing=20),
                 padding=20,
                 bgcolor=self.LIGHT_BLUE,
                 border_radius=15,
-                height=350,
+                height=380,
                 width=600
             ),
             actions=[
@@ -305,11 +315,19 @@ class AddNewTaskDialog(ft.Row):
             self.show_message("Нет данных для отправки", error=True)
             return
 
+        self.upload_btn.disabled = True
+        self.progress_bar.value = 0
+        self.progress_bar.visible = True
+        self.show_message("Отправка задач...")
+
         try:
-            result = send_tasks_bulk(self.transformed_data)
+            result = send_tasks_bulk(self.transformed_data, on_progress=self.update_progress)
 
             if result is None:
-                raise Exception("Ошибка при отправке задач. Сервер не ответил.")
+                # Отправленные порции записаны в журнал, повторное нажатие отправит только оставшиеся
+                self.upload_btn.disabled = False
+                self.show_message("Загрузка прервана. Нажмите «Загрузить в базу», чтобы продолжить", error=True)
+                return
 
             if isinstance(result, dict) and result.get("error"):
                 error_msg = result.get("error", "Неизвестная ошибка")
@@ -323,6 +341,12 @@ class AddNewTaskDialog(ft.Row):
             self.handle_error(f"Ошибка: {str(e)}")
             self.reset_state()
 
+    def update_progress(self, done: int, total: int):
+        self.progress_bar.value = done / total if total else 1
+        self.status_message.value = f"Отправлено частей: {done} из {total}"
+        self.status_message.color = self.PRIMARY_BLUE
+        self.page.update()
+
     def handle_error(self, message: str):
         self.status_message.value = message
         self.status_message.color = ft.colors.RED
@@ -350,4 +374,5 @@ class AddNewTaskDialog(ft.Row):
         self.transform_btn.disabled = True
         self.file_path_display.value = "Файл не выбран"
         self.task_count_display.content.controls[1].value = "0"
+        self.progress_bar.visible = False
         self.page.update()
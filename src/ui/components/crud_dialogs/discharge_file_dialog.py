@@ -4,8 +4,7 @@ from datetime import datetime, date
 from typing import Optional
 import dbf
 import traceback
-import asyncio
-from src.database.admin.select_server import get_completed_tasks_export
+from src.database.admin.select_server import get_completed_tasks_export_async
 
 
 class ExportTasksDialog(ft.Row):
@@ -213,9 +212,8 @@ class ExportTasksDialog(ft.Row):
                 self.page.update()
                 return
 
-            # Используем asyncio.to_thread для запуска синхронной функции в отдельном потоке
-            tasks = await asyncio.to_thread(
-                get_completed_tasks_export,
+            # Запрос выполняется асинхронным клиентом, без занятия отдельного потока
+            tasks = await get_completed_tasks_export_async(
                 start_date.date() if start_date else None,
                 end_date.date() if end_date else None
             )
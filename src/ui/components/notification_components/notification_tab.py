@@ -1,84 +1,116 @@
 import flet as ft
 from datetime import datetime
-from typing import List
+from typing import Dict, List
 import uuid
 import src.database.admin.select_server as select_server
 from src.ui.utils.navigation import nav_manager
 from src.ui.utils.ui_blocker import block_ui
-from src.database.admin.modification_server import mark_notification_as_shown
-from src.database.admin.select_server import select_notifications
+from src.database.admin.modification_server import mark_notifications_as_shown
+from src.database.admin.select_server import (
+    append_notifications, fetch_new_notifications, select_notifications
+)
 
 
 class NotificationManager:
     def __init__(self, page: ft.Page):
         self.page = page
-        self.notifications: List[dict] = []
-        self._cached_notifications = []
+        self.notifications: List[dict] = []  # новые сверху
+        self._by_id: Dict[str, dict] = {}
+        self._loaded = False
         self.on_change = None
 
     @block_ui()
     def load_notifications(self, refresh=False):
         try:
-            if refresh or not self._cached_notifications:
-                # Загружаем данные только при первом запросе или явном обновлении
-                self._cached_notifications = select_notifications(refresh=refresh)
-
-            old_notifications = {n["id"]: n["read"] for n in self.notifications}
-
-            self.notifications = []
-            for n in self._cached_notifications:
-                notification_id, task_id, notification_type, created_at, is_showed = n
-
-                action_text = self._map_notification_type(notification_type)
-                if not action_text:
-                    continue
-
-                self.notifications.append({
-                    "id": str(notification_id),
-                    "title": f"Задание {task_id}",
-                    "message": f"Задание было {action_text}",
-                    "read": is_showed,
-                    "date": created_at,
-                    "action": f"/task/{task_id}",
-                    "raw_type": notification_type
-                })
-            # Сортировка по дате (новые сверху)
-            self.notifications.sort(
-                key=lambda x: datetime.fromisoformat(x['date']),
-                reverse=True
-            )
-            if self.on_change:
-                self.on_change()
+            if not self._loaded:
+                # Первая загрузка: весь журнал из кеша или с сервера
+                self._by_id = {}
+                self.notifications = [self._to_item(n) for n in select_notifications(refresh=refresh)]
+                for item in self.notifications:
+                    self._by_id[item["id"]] = item
+                # Сортировка по дате (новые сверху)
+                self.notifications.sort(key=lambda x: x["timestamp"], reverse=True)
+                self._loaded = True
+            elif refresh:
+                # Дальше догружаем только новые уведомления
+                self._merge(fetch_new_notifications())
         except Exception as e:
             print(f"Ошибка загрузки уведомлений: {e}")
-            self.notifications = []
 
         if self.on_change:
             self.on_change()
         return self.notifications
 
+    def add_pushed(self, notification: dict):
+        """Уведомление из push-канала: добавляется без запроса к серверу"""
+        try:
+            self._merge(append_notifications([notification]))
+        except Exception as e:
+            print(f"Ошибка добавления уведомления: {e}")
+
+        if self.on_change:
+            self.on_change()
+
+    def _merge(self, rows):
+        """Вставить новые уведомления в отсортированный список, не пересобирая его"""
+        for row in rows:
+            item = self._to_item(row)
+            existing = self._by_id.get(item["id"])
+            if existing is not None:
+                existing.update(item)
+                continue
+
+            # Новые уведомления почти всегда свежее остальных, поэтому позиция находится сразу
+            index = 0
+            while index < len(self.notifications) and self.notifications[index]["timestamp"] > item["timestamp"]:
+                index += 1
+            self.notifications.insert(index, item)
+            self._by_id[item["id"]] = item
+
+    def _to_item(self, row) -> dict:
+        notification_id, task_id, notification_type, created_at, is_showed = row
+        action_text = self._map_notification_type(notification_type)
+        return {
+            "id": str(notification_id),
+            "title": f"Задание {task_id}",
+            "message": f"Задание было {action_text}",
+            "read": is_showed,
+            "date": created_at,
+            "timestamp": datetime.fromisoformat(created_at),
+            "action": f"/task/{task_id}",
+            "raw_type": notification_type
+        }
+
     @block_ui()
-    def mark_as_read(self, notification_id):
+    def mark_as_read(self, *notification_ids):
+        """Пометить уведомления прочитанными (несколько - одним запросом);
+        если сервер не подтвердил пометку, уведомление снова становится непрочитанным"""
+        previous = {}
+        for notification_id in notification_ids:
+            item = self._by_id.get(notification_id)
+            if item is not None:
+                previous[notification_id] = item["read"]
+                item["read"] = True
+        if self.on_change:
+            self.on_change()
+
+        confirmed = {}
         try:
-            for n in self.notifications:
-                if n["id"] == notification_id:
-                    n["read"] = True
-                    break
-
-            result = mark_notification_as_shown(int(notification_id), refresh=True)
-            if result:
-                # Обновляем локальное состояние
-                for n in self.notifications:
-                    if n["id"] == notification_id:
-                        n["read"] = True
-                        break
-                if self.on_change:
-                    self.on_change()
-
-            self.load_notifications(refresh=True)
+            rows = mark_notifications_as_shown([int(notification_id) for notification_id in notification_ids])
+            confirmed = {str(row[0]): row[4] for row in rows}
         except Exception as e:
             print(f"Ошибка при обновлении уведомления: {e}")
 
+        rolled_back = False
+        for notification_id, was_read in previous.items():
+            if not confirmed.get(notification_id):
+                self._by_id[notification_id]["read"] = was_read
+                rolled_back = True
+        if rolled_back:
+            print("Не удалось пометить уведомления прочитанными")
+            if self.on_change:
+                self.on_change()
+
     def _map_notification_type(self, n_type):
         type_map = {
             "просрочено": "просрочено",
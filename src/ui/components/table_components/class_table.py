@@ -9,13 +9,17 @@ from flet import (
     FontWeight, MainAxisAlignment, ScrollMode, ButtonStyle, GestureDetector
 )
 import asyncio
+import threading
+from src.config.config import APP_CONFIG
+from src.database.local_cache import cache
 from src.ui.components.table_components.table_settings_manager import TableStateManager
 from src.ui.components.table_components.page_setting import PagePanel
 
 
 class FilterableDataTable:
     def __init__(self, df, columns_config, page=None, page_panel=None, page_size=15, hidden_columns=None,
-                 on_selection_change=None, page_type=None, page_id=None, search_field=None):
+                 on_selection_change=None, page_type=None, page_id=None, search_field=None,
+                 prefetch=None, prefetch_column='ID'):
         if not isinstance(df, pd.DataFrame):
             df = pd.DataFrame(df)
 
@@ -35,6 +39,13 @@ class FilterableDataTable:
 
         self.on_selection_change = on_selection_change
 
+        # Фоновая подгрузка деталей видимой страницы: prefetch(ids, cancelled) вызывается
+        # с паузой в отдельном потоке и отменяется при смене страницы
+        self.prefetch = prefetch
+        self.prefetch_column = prefetch_column
+        self._prefetch_timer = None
+        self._prefetch_cancelled = threading.Event()
+
         self.current_page = 0  # Текущая страница
         self.total_pages = max(1, len(df) // page_size + (len(df) % page_size > 0))  # Общее количество страниц
 
@@ -422,6 +433,8 @@ class FilterableDataTable:
                 )
                 self.data_table.rows.append(row_obj)
 
+        self._schedule_prefetch(page_data)
+
         # Trigger data table update
         try:
             if self.page and self.data_table in self.page.controls:
@@ -432,6 +445,38 @@ class FilterableDataTable:
         # Update selection count
         self._update_selection_count_indicator()
 
+    def _schedule_prefetch(self, page_data):
+        """Запланировать фоновую подгрузку деталей для строк текущей страницы"""
+        self.cancel_prefetch()
+        if self.prefetch is None or page_data.empty or self.prefetch_column not in page_data.columns:
+            return
+
+        ids = [int(value) if isinstance(value, float) and value.is_integer() else value
+               for value in page_data[self.prefetch_column].dropna().tolist()]
+        cancelled = threading.Event()
+        self._prefetch_cancelled = cancelled
+
+        def run():
+            if cancelled.is_set():
+                return
+            try:
+                self.prefetch(ids, cancelled)
+            except Exception as e:
+                print(f"Ошибка фоновой подгрузки деталей: {e}")
+
+        # Пауза отсекает быстрое пролистывание: грузим только страницу, на которой остановились.
+        # Подгрузка пишет в кеш пользователя, для которого запланирована (cache.bind)
+        self._prefetch_timer = threading.Timer(APP_CONFIG['prefetch_delay'], cache.bind(run))
+        self._prefetch_timer.daemon = True
+        self._prefetch_timer.start()
+
+    def cancel_prefetch(self):
+        """Отменить фоновую подгрузку деталей (при смене страницы)"""
+        self._prefetch_cancelled.set()
+        if self._prefetch_timer is not None:
+            self._prefetch_timer.cancel()
+            self._prefetch_timer = None
+
     def get_button_style(self, disabled):
         return ButtonStyle(
             color=colors.BLUE_600 if not disabled else colors.GREY_400,
@@ -582,6 +627,94 @@ class FilterableDataTable:
             self.current_page += 1
             self.force_update()
 
+    def append_rows(self, df):
+        """Дописать строки, пришедшие при потоковой загрузке, не сбрасывая текущую страницу"""
+        if not isinstance(df, pd.DataFrame):
+            df = pd.DataFrame(df)
+        if df.empty:
+            return
+
+        self.original_df = pd.concat([self.original_df, df], ignore_index=True)
+        self.search_df = self.original_df.copy()
+
+        if self.filter_settings or self.search_term:
+            # Активны фильтры - пересчитываем выборку целиком
+            self._apply_filters()
+            return
+
+        self.filtered_df = pd.concat([self.filtered_df, df.set_axis(
+            range(len(self.original_df) - len(df), len(self.original_df))
+        )])
+        self._safe_update_table()
+
+    def _selected_keys(self, key='ID'):
+        """Значения ключа (ID) выделенных строк: индексы filtered_df меняются при замене данных"""
+        if not self.selected_rows or key not in self.filtered_df.columns:
+            return set()
+        labels = [row_idx for row_idx in self.selected_rows if row_idx in self.filtered_df.index]
+        return set(self.filtered_df.loc[labels, key])
+
+    def _restore_selection(self, selected_keys, key='ID'):
+        """Выделить после замены данных строки с теми же ключами; исчезнувшие строки снимаются с выделения"""
+        previous = set(self.selected_rows)
+        self.selected_rows.clear()
+        if selected_keys and key in self.filtered_df.columns:
+            mask = self.filtered_df[key].isin(selected_keys)
+            self.selected_rows.update(self.filtered_df.index[mask])
+
+        if self.selected_rows != previous and self.on_selection_change:
+            self.on_selection_change(self.selected_rows)
+
+    def replace_data(self, df, key='ID'):
+        """Подменить данные таблицы (пришел обновленный снимок), сохранив фильтры, поиск, текущую страницу
+        и выделение (по ключу key: индексы строк в новом снимке другие)"""
+        if not isinstance(df, pd.DataFrame):
+            df = pd.DataFrame(df)
+
+        current_page = self.current_page
+        selected_keys = self._selected_keys(key)
+        self.original_df = df.copy()
+        self.search_df = df.copy()
+        if self.filter_settings or self.search_term:
+            self._apply_filters()
+        else:
+            self.filtered_df = df.copy()
+        self._restore_selection(selected_keys, key)
+
+        self.total_pages = max(1, (len(self.filtered_df) + self.page_size - 1) // self.page_size)
+        self.current_page = min(current_page, self.total_pages - 1)
+        self._safe_update_table()
+
+    def update_rows(self, df, removed_ids=(), key='ID'):
+        """Поправить отдельные строки по ключу (ID): измененные заменяются на месте, новые дописываются,
+        removed_ids удаляются. Остальные строки, фильтры, поиск и текущая страница не меняются."""
+        if not isinstance(df, pd.DataFrame):
+            df = pd.DataFrame(df)
+
+        if df.empty:
+            changed = added = df
+        else:
+            known = df[key].isin(self.original_df[key])
+            changed = df[known].drop_duplicates(key, keep='last').set_index(key)
+            added = df[~known]
+
+        if not changed.empty:
+            for frame in (self.original_df, self.search_df, self.filtered_df):
+                mask = frame[key].isin(changed.index)
+                if mask.any():
+                    columns = [column for column in changed.columns if column in frame.columns]
+                    frame.loc[mask, columns] = changed.loc[frame.loc[mask, key], columns].to_numpy()
+
+        if len(removed_ids) or not added.empty:
+            # Состав строк изменился - индексы пересчитываются как при замене данных
+            remaining = self.original_df[~self.original_df[key].isin(list(removed_ids))]
+            self.replace_data(pd.concat([remaining, added], ignore_index=True), key=key)
+        elif self.filter_settings or self.search_term:
+            # Измененная строка могла перестать подходить под фильтр
+            self._apply_filters()
+        else:
+            self._safe_update_table()
+
     def force_update(self):
         if hasattr(self, 'page') and self.page:
             # Update pagination controls
@@ -1,7 +1,10 @@
 import json
+import time
 
 import pandas as pd
 
+from src.database.api.metrics import metrics
+
 
 def load_data_from_tuples(
         data_tuples,
@@ -38,6 +41,8 @@ def load_data_from_tuples(
     if not data_tuples:
         return pd.DataFrame(columns=columns)
 
+    started = time.perf_counter()
+
     # Инициализация параметров по умолчанию
     exclude_columns = exclude_columns or []
     date_columns = date_columns or []
@@ -109,4 +114,6 @@ def load_data_from_tuples(
             if col in df.columns:
                 converter(col)
 
+    # Сборка DataFrame - отдельный этап в метриках, чтобы сравнить его с загрузкой данных
+    metrics.record_stage("dataframe", time.perf_counter() - started)
     return df
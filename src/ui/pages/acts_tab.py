@@ -1,3 +1,4 @@
+import threading
 import uuid
 
 import flet as ft
@@ -9,6 +10,7 @@ from flet import (
 import src.database.admin.modification_server as modification_server
 import src.database.admin.delete_server as delete_server
 import src.database.admin.select_server as select_server
+from src.database.local_cache import cache
 from src.ui.components.crud_dialogs.create_task_dialog import CreateTaskDialog
 from src.ui.components.crud_dialogs.create_task_load_dialog import AddNewTaskDialog
 from src.ui.components.table_components.class_table import FilterableDataTable
@@ -250,6 +252,11 @@ def acts_tab(page):
 
         data_server = load_data()
 
+        # Детали остальных выбранных задач подгружаются в кеш одним пакетным запросом
+        if len(selected_ids) > 1:
+            threading.Thread(target=cache.bind(select_server.get_task_details_batch), args=(selected_ids[1:],),
+                             daemon=True).start()
+
         new_buttons = [
             {
                 "icon": ft.icons.INFO,
@@ -504,7 +511,9 @@ def acts_tab(page):
         hidden_columns=["ID", "Город", "Район", "Подъезд", "ID Задания"],
         on_selection_change=update_action_buttons,
         page_type="act",
-        search_field=search_field
+        search_field=search_field,
+        prefetch=select_server.prefetch_task_details,
+        prefetch_column="ID Задания"
     )
     # filter_panel = PagePanel(page, page_type="search", search_field=search_field)
 
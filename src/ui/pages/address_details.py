@@ -97,7 +97,7 @@ class AddressTab:
 
     def initialize_data(self):
         try:
-            address_details = select_server.get_address_details(self.address_id, refresh=True)
+            address_details = select_server.get_address_details(self.address_id)
             self.address_info = address_details.get('address_info', {})
             self.meters_data = address_details.get('meters', [])
             self.tasks_data = address_details.get('tasks', [])
@@ -23,25 +23,29 @@ from src.ui.utils.action_menu import PopupMenuUp
 def address_tab(page):
     @block_ui(page)
     def load_data():
-        return select_server.select_address_data_all(refresh=True)
+        # Сохраненный снимок показывается сразу; если он устарел, обновится в фоне (on_addresses_updated)
+        return select_server.select_address_data_all()
+
+    def build_data(data_server):
+        return load_data_from_tuples(
+            data_tuples=data_server,
+            exclude_columns=['hamlet_id', 'street_id'],
+            columns=[
+                'ID', 'Лицевой_счет', 'ФИО', 'hamlet_id', 'Поселок', 'street_id', 'Улица', 'Город',
+                'Район', 'Тип', 'Дом', 'Квартира',
+                'Подъезд', 'Площадь', 'Нормативы', 'Прописано'
+            ],
+            numeric_columns=['ID', 'Лицевой_счет', 'hamlet_id', 'street_id', 'Площадь', 'Нормативы'],
+            string_columns=[
+                'ФИО', 'Поселок', 'Улица', 'Город',
+                'Район', 'Тип', 'Дом', 'Квартира',
+                'Подъезд', 'Прописано'
+            ]
+        )
 
     data_server = load_data()
 
-    data = load_data_from_tuples(
-        data_tuples=data_server,
-        exclude_columns=['hamlet_id', 'street_id'],
-        columns=[
-            'ID', 'Лицевой_счет', 'ФИО', 'hamlet_id', 'Поселок', 'street_id', 'Улица', 'Город',
-            'Район', 'Тип', 'Дом', 'Квартира',
-            'Подъезд', 'Площадь', 'Нормативы', 'Прописано'
-        ],
-        numeric_columns=['ID', 'Лицевой_счет', 'hamlet_id', 'street_id', 'Площадь', 'Нормативы'],
-        string_columns=[
-            'ФИО', 'Поселок', 'Улица', 'Город',
-            'Район', 'Тип', 'Дом', 'Квартира',
-            'Подъезд', 'Прописано'
-        ]
-    )
+    data = build_data(data_server)
 
     def perform_search(e):
         search_term = search_field.value.lower() if search_field.value else ""
@@ -73,21 +77,7 @@ def address_tab(page):
 
         data_server = load_data()
 
-        data = load_data_from_tuples(
-            data_tuples=data_server,
-            exclude_columns=['hamlet_id', 'street_id'],
-            columns=[
-                'ID', 'Лицевой_счет', 'ФИО', 'hamlet_id', 'Поселок', 'street_id', 'Улица', 'Город',
-                'Район', 'Тип', 'Дом', 'Квартира',
-                'Подъезд', 'Площадь', 'Нормативы', 'Прописано'
-            ],
-            numeric_columns=['ID', 'Лицевой_счет', 'hamlet_id', 'street_id', 'Площадь', 'Нормативы'],
-            string_columns=[
-                'ФИО', 'Поселок', 'Улица', 'Город',
-                'Район', 'Тип', 'Дом', 'Квартира',
-                'Подъезд', 'Прописано'
-            ]
-        )
+        data = build_data(data_server)
 
         table.original_df = data
         table.filtered_df = data.copy()
@@ -483,7 +473,8 @@ def address_tab(page):
         hidden_columns=["Город", "Район", "Подъезд", "Площадь", 'hamlet_id', 'street_id'],
         on_selection_change=update_action_buttons,
         page_type="addresses",
-        search_field=search_field
+        search_field=search_field,
+        prefetch=select_server.prefetch_address_details
     )
     # filter_panel = PagePanel(page, page_type="search", search_field=search_field)
 
@@ -491,6 +482,16 @@ def address_tab(page):
     # filter_panel.set_table(table)
     # table.page_panel = filter_panel
 
+    def on_addresses_updated(cache_key, data_tuples):
+        # Снимок адресов обновился в фоне: подменяем данные, сохраняя фильтры и страницу
+        nonlocal data
+        if table.page is None:
+            return
+        data = build_data(data_tuples)
+        table.replace_data(data)
+
+    select_server.subscribe('addresses', on_addresses_updated, owner='address_tab')
+
     # В функции search_tab заменить создание table_container
     table_container = Container(
         content=Column([
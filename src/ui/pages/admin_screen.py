@@ -20,6 +20,9 @@ from src.ui.pages.acts_tab import acts_tab
 from src.ui.pages.graphs_tab import graphs_tab
 from src.ui.pages.address_tab import address_tab
 from src.ui.pages.address_details import address_details
+from src.database.admin.outbox import start_flusher
+from src.database.api.api_master import create_notifications_channel
+from src.config.config import APP_CONFIG
 
 
 def admin_main(page: ft.Page):
@@ -53,8 +56,30 @@ def admin_main(page: ft.Page):
     page.on_keyboard_event = handle_activity
     page.on_pointer_event = handle_activity
 
+    def refresh_notifications():
+        try:
+            manager.load_notifications(refresh=True)
+            update_badge()
+        except Exception as e:
+            print(f"Ошибка автообновления: {e}")
+
+    def on_push_event(event):
+        if event['event'] == 'notification' and isinstance(event['data'], dict):
+            # Уведомление пришло целиком - запрос к серверу не нужен
+            manager.add_pushed(event['data'])
+
+    # Новые уведомления приходят по push-каналу; после (пере)подключения догружаем пропущенное
+    notifications_channel = create_notifications_channel(on_push_event, on_connect=refresh_notifications)
+    notifications_channel.start()
+
     def check_notifications_loop():
-        while True:
+        # Канал останавливается при выходе - вместе с ним завершается и опрос этой страницы
+        while not notifications_channel.stopped:
+            if notifications_channel.connected:
+                # Канал открыт - опрос не нужен, только следим, не оборвался ли он
+                time.sleep(APP_CONFIG['push_fallback_check'])
+                continue
+
             is_active = (time.time() - last_activity_time) < 60
             if is_active:
                 try:
@@ -74,6 +99,8 @@ def admin_main(page: ft.Page):
                 time.sleep(600)
 
     threading.Thread(target=check_notifications_loop, daemon=True).start()
+    # Отправка изменений, накопленных без связи (в том числе в прошлом сеансе)
+    start_flusher()
 
     manager.on_change = update_badge
 
@@ -151,6 +178,11 @@ def admin_main(page: ft.Page):
                 }
 
                 if selected_page in content_map:
+                    # Прежняя страница останавливает свою фоновую работу (догрузку данных и т.п.)
+                    dispose = getattr(content_area.content, 'dispose', None)
+                    if callable(dispose):
+                        dispose()
+
                     new_content = content_map[selected_page](page)
 
                     content_area.content = new_content
@@ -436,6 +436,17 @@ def assignment_tab(page, table_name='tasks_assign'):
 
     update_table(data)
 
+    def on_unmade_patched(cache_key, rows, removed_ids):
+        # Задачи назначены, сняты с исполнителя или изменены: правим только их строки в данных страницы
+        nonlocal data
+        changed = {row[0]: row for row in rows}
+        removed = set(removed_ids)
+        data = [changed.pop(row[0], row) for row in data if row[0] not in removed] + list(changed.values())
+        if data_table.page is not None and not search_field.value:
+            update_table(data)
+
+    select_server.subscribe_rows('unmade_tasks', on_unmade_patched, owner='assignment_tab')
+
     search_field = TextField(
         label="Поиск",
         expand=True,
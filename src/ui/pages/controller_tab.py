@@ -27,14 +27,17 @@ def controller_tab(page):
 
     emp_data = load_employees()
 
-    employee_data = load_data_from_tuples(
-        data_tuples=emp_data,
-        columns=['ID', 'ФИО', 'Права', 'Телефон', 'Почта', 'Статус здоровья',
-                 'Задач сегодня', 'Выполненных сегодня', 'Не выполнено сегодня', 'Всего не выполнено'],
-        numeric_columns=['ID', 'Задач сегодня', 'Выполненных сегодня', 'Не выполнено сегодня',
-                         'Всего не выполнено'],
-        string_columns=['ФИО', 'Права', 'Телефон', 'Почта', 'Статус здоровья']
-    )
+    def build_data(data_tuples):
+        return load_data_from_tuples(
+            data_tuples=data_tuples,
+            columns=['ID', 'ФИО', 'Права', 'Телефон', 'Почта', 'Статус здоровья',
+                     'Задач сегодня', 'Выполненных сегодня', 'Не выполнено сегодня', 'Всего не выполнено'],
+            numeric_columns=['ID', 'Задач сегодня', 'Выполненных сегодня', 'Не выполнено сегодня',
+                             'Всего не выполнено'],
+            string_columns=['ФИО', 'Права', 'Телефон', 'Почта', 'Статус здоровья']
+        )
+
+    employee_data = build_data(emp_data)
 
     def perform_search(e):
         search_term = search_field.value.lower() if search_field.value else ""
@@ -288,11 +291,20 @@ def controller_tab(page):
         },
         on_selection_change=update_action_buttons,
         page_type="employeer",
-        search_field=search_field
+        search_field=search_field,
+        prefetch=select_server.prefetch_employee_details
 
     )
     employee_table.set_page(page)
 
+    def on_employees_patched(cache_key, rows, removed_ids):
+        # Сотрудник изменен: перерисовываем только его строку
+        if employee_table.page is None:
+            return
+        employee_table.update_rows(build_data(rows), removed_ids)
+
+    select_server.subscribe_rows('employees', on_employees_patched, owner='controller_tab')
+
     top_bar = create_animated_container(
         Column([
             Row(
@@ -94,7 +94,7 @@ class EmployerTab:
         """Загрузка и подготовка данных"""
         try:
             # Получаем детальную информацию о сотруднике
-            employee_details = select_server.get_employee_details(self.employee_id, refresh=True)
+            employee_details = select_server.get_employee_details(self.employee_id)
 
             if not employee_details:
                 self.page.snack_bar = ft.SnackBar(
@@ -77,7 +77,8 @@ def home_tab(page: ft.Page):
         page.update()
 
     def create_pie_chart():
-        stats_data = select_server.get_dashboard_stats_data(refresh=True)
+        # Главная открывается сразу по сохраненной статистике; устаревшая обновляется в фоне
+        stats_data = select_server.get_dashboard_stats_data()
         tasks_by_status = stats_data.get('tasks_by_status', [])
 
         if not tasks_by_status:
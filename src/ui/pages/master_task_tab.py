@@ -37,9 +37,12 @@ def master_task_tab(page):
 
     print(current_user_login)
 
+    # Сервер отдает только задачи текущего мастера, а не весь список по городу
     @block_ui(page)
     def load_data():
-        return select_server.select_task_data_all()
+        return select_server.select_task_data_filtered(
+            master=current_user_login, fields=select_server.TASK_FIELDS_TABLE
+        )
 
     data_server = load_data()
 
@@ -62,6 +65,7 @@ def master_task_tab(page):
         else:
             modified_data.append(task)
 
+    # Повторная проверка на клиенте на случай сервера, не поддерживающего фильтр
     filtered_data = []
     for task in modified_data:
         if isinstance(task, tuple) and len(task) > 23:  # Проверяем индекс Мастера
@@ -116,7 +120,9 @@ def master_task_tab(page):
 
         @block_ui(page)
         def load_data():
-            return select_server.select_task_data_all(refresh=True)
+            return select_server.select_task_data_filtered(
+                master=current_user_login, fields=select_server.TASK_FIELDS_TABLE, refresh=True
+            )
 
         # Очищаем поле поиска
         search_field.value = ""
@@ -124,6 +130,8 @@ def master_task_tab(page):
             table._reset_filters_full()
 
         data_server = load_data()
+        if select_server.is_api_offline():
+            show_snack_bar(page, "Нет связи с сервером, показаны сохраненные данные")
 
         modified_data = []
         for task in data_server:
@@ -316,9 +324,10 @@ def master_task_tab(page):
         selected_ids = table.filtered_df.loc[list(table.selected_rows), 'ID'].tolist()
         result = selected_ids[0]
 
+        # Детали обычно уже подгружены в фоне для видимой страницы
         @block_ui(page)
         def load_data():
-            return select_server.get_task_details(result, refresh=True)
+            return select_server.get_task_details(result)
 
         data_server = load_data()
 
@@ -582,7 +591,8 @@ def master_task_tab(page):
         hidden_columns=["Сальдо", "Город", "Район", "Подъезд", "Площадь", "Прописано", 'Мастер'],
         on_selection_change=update_action_buttons,
         page_type="master_task",
-        search_field=search_field
+        search_field=search_field,
+        prefetch=select_server.prefetch_task_details
     )
     # filter_panel = PagePanel(page, page_type="search", search_field=search_field)
 
@@ -21,7 +21,7 @@ from src.ui.utils.action_menu import PopupMenuUp
 def meters_tab(page):
     @block_ui(page)
     def load_data():
-        return select_server.select_task_data_all()
+        return select_server.select_task_data_all(fields=select_server.TASK_FIELDS_METERS)
 
     data_server = load_data()
 
@@ -121,7 +121,9 @@ def meters_tab(page):
 
         @block_ui(page)
         def load_data():
-            return select_server.select_task_data_all(refresh=True)
+            return select_server.select_task_data_all(
+                refresh=True, sync=True, fields=select_server.TASK_FIELDS_METERS
+            )
 
         data_server = load_data()
 
@@ -1,3 +1,4 @@
+import threading
 import uuid
 
 import flet as ft
@@ -9,6 +10,7 @@ from flet import (
 import src.database.admin.modification_server as modification_server
 import src.database.admin.delete_server as delete_server
 import src.database.admin.select_server as select_server
+from src.database.local_cache import cache
 from src.ui.components.crud_dialogs.create_task_dialog import CreateTaskDialog
 from src.ui.components.crud_dialogs.create_task_load_dialog import AddNewTaskDialog
 from src.ui.components.table_components.class_table import FilterableDataTable
@@ -21,52 +23,58 @@ from src.ui.utils.action_menu import PopupMenuUp
 
 
 def search_tab(page):
+    # Задачи приходят порциями: первая показывается сразу, остальные догружаются в фоне
+    task_chunks = select_server.iter_task_data_all(fields=select_server.TASK_FIELDS_TABLE)
+    # Догрузка прекращается при перезагрузке данных и при уходе со страницы (container.dispose)
+    chunks_cancelled = threading.Event()
+
     @block_ui(page)
     def load_data():
-        return select_server.select_task_data_all()
-
-    data_server = load_data()
-
-    modified_data = []
-    for task in data_server:
-        if isinstance(task, tuple):
-            # Извлекаем данные счетчиков (предполагаем, что они на позиции -3)
-            meters_data = task[-3] if len(task) >= 3 else []
-            locations = []
-            if isinstance(meters_data, list):
-                for meter in meters_data:
-                    if isinstance(meter, dict):
-                        loc = meter.get('location')
-                        if loc:
-                            locations.append(str(loc))
-            location_str = ', '.join(locations)
-            # Создаем новый кортеж с добавленным location
-            modified_task = task + (location_str,)
-            modified_data.append(modified_task)
-        else:
-            modified_data.append(task)
-
-    data = load_data_from_tuples(
-        data_tuples=modified_data,
-        exclude_columns=['id_квартиры', 'Счетчики', 'Акты', 'Фото'],
-        columns=[
-            'ID', 'ФИО', 'id_квартиры', 'Город', 'Район', 'Улица',
-            'Поселок', 'Дом', 'Квартира', 'Подъезд', 'Прописано',
-            'Тип', 'Нормативы', 'Площадь', 'Телефон', 'Лицевой_счет',
-            'Дата', 'Комментарий', 'Статус', 'Причина',
-            'Сальдо', 'Исполнитель', 'Дата_выполнения', 'Мастер', 'Счетчики', 'Акты', 'Фото', 'Расположение'
-        ],
-        date_columns=['Дата', 'Дата_выполнения'],
-        numeric_columns=['ID', 'id_квартиры', 'Нормативы', 'Квартира', 'Лицевой_счет'],
-        string_columns=[
-            'ФИО', 'Город', 'Район', 'Улица',
-            'Поселок', 'Дом', 'Подъезд', 'Прописано',
-            'Тип', 'Площадь', 'Телефон',
-            'Комментарий', 'Статус', 'Причина',
-            'Сальдо', 'Исполнитель', 'Расположение', 'Мастер'
-        ],
-        json_columns=['Счетчики', 'Акты', 'Фото']
-    )
+        return next(task_chunks, [])
+
+    def build_data(data_server):
+        modified_data = []
+        for task in data_server:
+            if isinstance(task, tuple):
+                # Извлекаем данные счетчиков (предполагаем, что они на позиции -3)
+                meters_data = task[-3] if len(task) >= 3 else []
+                locations = []
+                if isinstance(meters_data, list):
+                    for meter in meters_data:
+                        if isinstance(meter, dict):
+                            loc = meter.get('location')
+                            if loc:
+                                locations.append(str(loc))
+                location_str = ', '.join(locations)
+                # Создаем новый кортеж с добавленным location
+                modified_task = task + (location_str,)
+                modified_data.append(modified_task)
+            else:
+                modified_data.append(task)
+
+        return load_data_from_tuples(
+            data_tuples=modified_data,
+            exclude_columns=['id_квартиры', 'Счетчики', 'Акты', 'Фото'],
+            columns=[
+                'ID', 'ФИО', 'id_квартиры', 'Город', 'Район', 'Улица',
+                'Поселок', 'Дом', 'Квартира', 'Подъезд', 'Прописано',
+                'Тип', 'Нормативы', 'Площадь', 'Телефон', 'Лицевой_счет',
+                'Дата', 'Комментарий', 'Статус', 'Причина',
+                'Сальдо', 'Исполнитель', 'Дата_выполнения', 'Мастер', 'Счетчики', 'Акты', 'Фото', 'Расположение'
+            ],
+            date_columns=['Дата', 'Дата_выполнения'],
+            numeric_columns=['ID', 'id_квартиры', 'Нормативы', 'Квартира', 'Лицевой_счет'],
+            string_columns=[
+                'ФИО', 'Город', 'Район', 'Улица',
+                'Поселок', 'Дом', 'Подъезд', 'Прописано',
+                'Тип', 'Площадь', 'Телефон',
+                'Комментарий', 'Статус', 'Причина',
+                'Сальдо', 'Исполнитель', 'Расположение', 'Мастер'
+            ],
+            json_columns=['Счетчики', 'Акты', 'Фото']
+        )
+
+    data = build_data(load_data())
 
     def perform_search(e):
         search_term = search_field.value.lower() if search_field.value else ""
@@ -92,9 +100,14 @@ def search_tab(page):
     def reload_page(e):
         nonlocal data, table, search_field
 
+        # Порции прежней загрузки дописались бы к новым данным
+        chunks_cancelled.set()
+
         @block_ui(page)
         def load_data():
-            return select_server.select_task_data_all(refresh=True)
+            return select_server.select_task_data_all(
+                refresh=True, sync=True, fields=select_server.TASK_FIELDS_TABLE
+            )
 
         # Очищаем поле поиска
         search_field.value = ""
@@ -102,6 +115,8 @@ def search_tab(page):
             table._reset_filters_full()
 
         data_server = load_data()
+        if select_server.is_api_offline():
+            show_snack_bar(page, "Нет связи с сервером, показаны сохраненные данные")
 
         modified_data = []
         for task in data_server:
@@ -292,6 +307,11 @@ def search_tab(page):
 
         data_server = load_data()
 
+        # Детали остальных выбранных задач подгружаются в кеш одним пакетным запросом
+        if len(selected_ids) > 1:
+            threading.Thread(target=cache.bind(select_server.get_task_details_batch), args=(selected_ids[1:],),
+                             daemon=True).start()
+
         new_buttons = [
             {
                 "icon": ft.icons.INFO,
@@ -552,7 +572,8 @@ def search_tab(page):
         hidden_columns=["Сальдо", "Город", "Район", "Подъезд", "Площадь", "Прописано"],
         on_selection_change=update_action_buttons,
         page_type="search",
-        search_field=search_field
+        search_field=search_field,
+        prefetch=select_server.prefetch_task_details
     )
     # filter_panel = PagePanel(page, page_type="search", search_field=search_field)
 
@@ -560,6 +581,14 @@ def search_tab(page):
     # filter_panel.set_table(table)
     # table.page_panel = filter_panel
 
+    def on_tasks_patched(cache_key, rows, removed_ids):
+        # Изменились отдельные задачи (правка, назначение, удаление): перерисовываем только их строки
+        if table.page is None or cache_key != select_server.task_list_key(select_server.TASK_FIELDS_TABLE):
+            return
+        table.update_rows(build_data(rows), removed_ids)
+
+    select_server.subscribe_rows('tasks', on_tasks_patched, owner='search_tab')
+
     # В функции search_tab заменить создание table_container
     table_container = Container(
         content=Column([
@@ -634,5 +663,26 @@ def search_tab(page):
         expand=True,
     )
     container.table = table
+
+    def dispose():
+        chunks_cancelled.set()
+        table.cancel_prefetch()
+
+    container.dispose = dispose
     page.update()
+
+    def load_remaining_chunks():
+        try:
+            for chunk in task_chunks:
+                if chunks_cancelled.is_set() or table.page is None:
+                    break
+                table.append_rows(build_data(chunk))
+        except Exception as e:
+            print(f"Ошибка при догрузке задач: {e}")
+        finally:
+            # Незавершенный поток задач с сервера закрывается, снимок при этом не сохраняется
+            task_chunks.close()
+
+    # Догрузка сохраняет снимок в кеш пользователя, открывшего страницу
+    threading.Thread(target=cache.bind(load_remaining_chunks), daemon=True).start()
     return container